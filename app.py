@@ -1,105 +1,329 @@
-from flask import Flask, request, send_file, render_template, after_this_request
+from flask import Flask, Response, request, send_file, render_template, jsonify, stream_with_context, url_for
 import os
-from werkzeug.utils import secure_filename
-import pandas as pd
+import zipfile
+from io import BytesIO, RawIOBase
 from datetime import datetime
-import glob
 
 app = Flask(__name__)
 
-# 업로드된 파일을 저장할 디렉토리
-UPLOAD_FOLDER = 'uploads'
+# 버전 번호를 확인할 변환 파일 디렉토리
 CONVERTED_FOLDER = 'converted'
-ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
+ALLOWED_EXTENSIONS = {'xlsx', 'xls', 'csv'}
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+# /api/convert 응답 형식
+API_FORMATS = ('json', 'arrow', 'html')
+
+# 업로드 최대 크기 (MB, 넘으면 413) - 요청 본문을 읽기 전에 Content-Length로 거절
+MAX_UPLOAD_MB = float(os.environ.get('LYLYL_MAX_UPLOAD_MB', 50))
+# 이보다 큰 업로드는 나눠 읽는 스트리밍 변환으로 처리 (MB, 0이면 사용 안 함)
+STREAM_UPLOAD_MB = float(os.environ.get('LYLYL_STREAM_UPLOAD_MB', 10))
+# 1이면 앱을 불러올 때 변환기(pandas, openpyxl)와 프로필을 미리 불러옴 (warm_up 참고)
+# 작업자를 fork하는 서버에서 작업자마다 import 비용이 들지 않도록 fork 전에 한 번만 불러온다.
+PRELOAD = os.environ.get('LYLYL_PRELOAD', '0') == '1'
 
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['CONVERTED_FOLDER'] = CONVERTED_FOLDER
+app.config['MAX_CONTENT_LENGTH'] = int(MAX_UPLOAD_MB * 1024 * 1024)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+_version_allocator = None
+
 def get_next_version(base_filename):
-    # 오늘 생성된 같은 날짜의 파일들 검색
-    pattern = f"{base_filename}_v*.xlsx"
-    existing_files = glob.glob(os.path.join(app.config['CONVERTED_FOLDER'], pattern))
-    
-    if not existing_files:
-        return "v01"
-    
-    # 기존 파일들의 버전 번호 추출
-    versions = []
-    for file in existing_files:
-        try:
-            version = file.split("_")[-1].replace(".xlsx", "")  # v01, v02 등 추출
-            version_num = int(version.replace("v", ""))
-            versions.append(version_num)
-        except:
-            continue
-    
-    if not versions:
-        return "v01"
-    
-    # 최대 버전 번호에 1을 더해서 반환
-    next_version = max(versions) + 1
-    return f"v{next_version:02d}"
+    # 변환 파일 디렉토리의 버전 카운터에서 원자적으로 할당 (여러 작업자가 동시에 요청해도 번호가 겹치지 않음)
+    # 카운터 파일 위치는 LYLYL_VERSION_DB로 변경 (기본값: converted/.lylyl_versions.sqlite)
+    global _version_allocator
+    if _version_allocator is None:
+        from version_allocator import VersionAllocator
+        _version_allocator = VersionAllocator(app.config['CONVERTED_FOLDER'],
+                                              path=os.environ.get('LYLYL_VERSION_DB') or None)
+    return _version_allocator.next_version(base_filename)
+
+_conversion_cache = None
+
+def get_conversion_cache():
+    # 변환 결과 캐시 (LYLYL_CACHE_MAX_ENTRIES, LYLYL_CACHE_MAX_MB, LYLYL_CACHE_DIR로 설정)
+    global _conversion_cache
+    if _conversion_cache is None:
+        from conversion_cache import ConversionCache
+        _conversion_cache = ConversionCache.from_env()
+    return _conversion_cache
+
+_job_queue = None
+
+def get_job_queue():
+    # 비동기 변환 작업 큐 (LYLYL_JOB_WORKERS, LYLYL_JOB_QUEUE_SIZE, LYLYL_JOB_TTL로 설정)
+    global _job_queue
+    if _job_queue is None:
+        from job_queue import ConversionJobQueue
+        _job_queue = ConversionJobQueue.from_env(cache=get_conversion_cache(), namer=job_output_name)
+    return _job_queue
+
+def job_output_name(result):
+    # 작업이 끝날 때 한 번만 버전을 할당 (같은 작업을 여러 번 내려받아도 같은 파일명)
+    from auto_convert_excel import ConversionResult
+    base_filename = ConversionResult(None, result.start_date, result.end_date).base_filename
+    return f"{base_filename}_{get_next_version(base_filename)}"
+
+def job_download_name(job):
+    # 완료 처리에서 파일명을 정하지 못했으면(버전 DB 오류 등) 지금 한 번 정해 작업에 저장
+    if job.output_name is None:
+        job.output_name = job_output_name(job.result)
+    return f"{job.output_name}.xlsx"
+
+def warm_up():
+    # 변환기 모듈(pandas, openpyxl)과 요청 처리에서 지연 import하는 모듈을 불러오고 프로필을 모두 컴파일해 둠
+    # gunicorn preload_app(wsgi.py)이나 LYLYL_PRELOAD=1이면 fork 전에 한 번만 실행되고 워커는 그대로 물려받는다.
+    # 작업 큐(프로세스 풀)는 fork 이후 워커에서 처음 쓸 때 만든다 (작업 프로세스도 이 상태를 물려받음).
+    from auto_convert_excel import preload
+    preload()
+    import conversion_cache  # noqa: F401
+    import job_queue  # noqa: F401
+    import report_export  # noqa: F401
+
+def upload_chunk_size(filename):
+    # 큰 업로드는 전체를 데이터프레임으로 올리지 않고 나눠 읽으며 변환 (결과는 같음)
+    # .xls는 나눠 읽을 수 없으므로 크기와 관계없이 한 번에 읽음
+    from excel_reader import DEFAULT_CHUNK_SIZE, supports_chunks
+    if (STREAM_UPLOAD_MB and supports_chunks(filename)
+            and (request.content_length or 0) > STREAM_UPLOAD_MB * 1024 * 1024):
+        return DEFAULT_CHUNK_SIZE
+    return None
+
+def selected_profile():
+    # 요청에서 고른 변환 프로필 (없으면 None = 기본 프로필)
+    # 파일 경로는 받지 않고 profiles 디렉토리에 있는 이름만 허용
+    from conversion_profile import available_profiles
+    name = request.form.get('profile') or request.args.get('profile')
+    if not name:
+        return None
+    if name not in available_profiles():
+        raise ValueError(f"알 수 없는 변환 프로필입니다: {name}")
+    return name
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    from conversion_profile import DEFAULT_PROFILE, available_profiles
+    return render_template('index.html', profiles=available_profiles(), default_profile=DEFAULT_PROFILE)
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
     if 'file' not in request.files:
         return '파일이 없습니다.'
+    files = [file for file in request.files.getlist('file') if file.filename != '']
+    if len(files) > 1:
+        # 여러 파일: 작업자 풀에서 동시에 변환해 ZIP 하나로 받기
+        return upload_bundle(files)
     file = request.files['file']
     if file.filename == '':
         return '선택된 파일이 없습니다.'
     
     if file and allowed_file(file.filename):
-        # 업로드된 파일 저장
-        filename = secure_filename(file.filename)
-        input_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(input_path)
-        
+        # async=1이면 작업 id만 바로 돌려주고 변환은 작업자 풀에서 진행
+        if request.args.get('async') == '1' or request.form.get('async') == '1':
+            return submit_job(file)
+
         try:
-            # 데이터프레임 생성하여 날짜 정보 추출
-            df = pd.read_excel(input_path)
-            start_date = pd.to_datetime(df['보고 시작'].iloc[0]).strftime('%y%m%d')
-            end_date = pd.to_datetime(df['보고 종료'].iloc[0]).strftime('%y%m%d')
-            
-            # 기본 파일명 생성 (버전 제외)
-            base_filename = f"LYLYL_{start_date}_{end_date}"
+            from conversion_cache import convert_cached
+
+            # 업로드 스트림(작은 파일은 메모리, 큰 파일은 werkzeug 임시 파일)을 복사하지 않고 바로 변환
+            # (캐시 키도 스트림을 나눠 읽어 계산, 같은 파일은 캐시 사용)
+            result = convert_cached(get_conversion_cache(), file.stream, chunk_size=upload_chunk_size(file.filename),
+                                    filename=file.filename, profile=selected_profile())
             
             # 다음 버전 번호 가져오기
-            version = get_next_version(base_filename)
+            version = get_next_version(result.base_filename)
             
             # 최종 출력 파일명 생성
-            output_filename = f"{base_filename}_{version}.xlsx"
-            output_path = os.path.join(app.config['CONVERTED_FOLDER'], output_filename)
-            
-            # 파일 변환
-            from auto_convert_excel import convert_excel_file
-            convert_excel_file(input_path, output_path)
+            output_filename = f"{result.base_filename}_{version}.xlsx"
             
-            # 파일 다운로드 후 임시 파일 삭제
-            @after_this_request
-            def remove_files(response):
-                try:
-                    os.remove(input_path)
-                    os.remove(output_path)
-                except:
-                    pass
-                return response
-            
-            return send_file(output_path, as_attachment=True, download_name=output_filename)
+            return send_file(result.output, as_attachment=True, download_name=output_filename,
+                             mimetype=XLSX_MIMETYPE)
             
         except Exception as e:
             return f'파일 처리 중 오류가 발생했습니다: {str(e)}'
     
     return '허용되지 않는 파일 형식입니다.'
 
+class _ZipBuffer(RawIOBase):
+    # ZipFile이 쓴 바이트를 모아 두었다가 응답으로 내보내는 버퍼 (되감기 불가 → 데이터 디스크립터 사용)
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def upload_bundle(files):
+    from job_queue import QueueFull, WorkerPoolBroken, as_completed_jobs
+
+    rejected = [file.filename for file in files if not allowed_file(file.filename)]
+    if rejected:
+        return f'허용되지 않는 파일 형식입니다: {", ".join(rejected)}'
+    try:
+        profile = selected_profile()
+    except ValueError as e:
+        return f'파일 처리 중 오류가 발생했습니다: {str(e)}'
+
+    # 파일마다 작업 큐(프로세스 풀)에 등록 - 일부만 받고 나머지를 거절하지 않도록 한 번에 자리를 확인
+    try:
+        jobs = get_job_queue().submit_many([(file.read(), file.filename) for file in files], profile=profile)
+    except QueueFull as e:
+        return (f'한 번에 변환할 수 있는 파일 수를 넘었습니다 (현재 가능: {e.available}개). '
+                '잠시 후 다시 시도해주세요.', 429, {'Retry-After': '5'})
+    except WorkerPoolBroken as e:
+        return str(e), 503, {'Retry-After': '5'}
+
+    def generate():
+        # 끝나는 순서대로 ZIP에 넣고 그때까지 쓴 바이트를 바로 보냄 (결과 전체를 메모리에 모으지 않음)
+        # xlsx는 이미 압축된 파일이라 다시 압축하지 않음
+        buffer = _ZipBuffer()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as bundle:
+            for job in as_completed_jobs(jobs):
+                stem = os.path.splitext(os.path.basename(job.filename))[0]
+                try:
+                    result = job.wait()
+                except Exception as e:
+                    bundle.writestr(f"{stem}_오류.txt", f"파일 처리 중 오류가 발생했습니다: {str(e)}\n")
+                else:
+                    bundle.writestr(f"{stem}_{job_download_name(job)}", result.data)
+                yield buffer.take()
+        yield buffer.take()
+
+    download_name = f"LYLYL_{datetime.now():%y%m%d_%H%M%S}.zip"
+    return Response(stream_with_context(generate()), mimetype='application/zip',
+                    headers={'Content-Disposition': f'attachment; filename="{download_name}"'})
+
+def submit_job(file):
+    from job_queue import QueueFull, WorkerPoolBroken
+    try:
+        profile = selected_profile()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        job = get_job_queue().submit(file.read(), file.filename, profile=profile)
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': '5'}
+    except WorkerPoolBroken as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+    body = job.to_dict()
+    body['status_url'] = url_for('job_status', job_id=job.id)
+    body['download_url'] = url_for('job_download', job_id=job.id)
+    return jsonify(body), 202, {'Location': body['status_url']}
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    message = f'파일이 너무 큽니다 (최대 {MAX_UPLOAD_MB:g}MB).'
+    if request.path.startswith('/jobs') or request.args.get('async') == '1':
+        return jsonify({'error': message}), 413
+    return message, 413
+
+@app.route('/api/convert', methods=['POST'])
+def api_convert():
+    # 대시보드용: xlsx를 만들지 않고 변환 결과와 색상 단계를 JSON(열 단위) / Arrow IPC / HTML 표로 반환
+    # ?format=json|arrow|html (기본값 json), ?rows=N 이면 상위 N행만
+    if 'file' not in request.files or request.files['file'].filename == '':
+        return jsonify({'error': '파일이 없습니다.'}), 400
+    file = request.files['file']
+    if not allowed_file(file.filename):
+        return jsonify({'error': '허용되지 않는 파일 형식입니다.'}), 400
+    output_format = request.args.get('format', 'json')
+    if output_format not in API_FORMATS:
+        return jsonify({'error': f'지원하지 않는 형식입니다: {output_format} (가능한 형식: {", ".join(API_FORMATS)})'}), 400
+    limit = request.args.get('rows')
+    if limit is not None:
+        try:
+            limit = int(limit)
+            if limit < 0:
+                raise ValueError
+        except ValueError:
+            return jsonify({'error': f'rows는 0 이상의 정수여야 합니다: {request.args["rows"]}'}), 400
+    try:
+        profile = selected_profile()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    import report_export
+    mimetypes = {
+        'json': 'application/json',
+        'arrow': report_export.ARROW_MIMETYPE,
+        'html': 'text/html; charset=utf-8',
+    }
+    # 같은 파일/프로필/형식이면 변환 결과 캐시에 저장한 응답을 그대로 사용
+    cache = get_conversion_cache()
+    key = cache.key(file.stream, profile=profile, api=output_format, rows=limit)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached.data, 200, {'Content-Type': mimetypes[output_format]}
+
+    from excel_reader import NotExcelFile
+    try:
+        table = report_export.convert_table(file.stream, profile=profile, limit=limit, filename=file.filename)
+        if output_format == 'arrow':
+            body = report_export.to_arrow_ipc(table)
+        elif output_format == 'html':
+            body = report_export.to_html_table(table).encode('utf-8')
+        else:
+            body = report_export.to_columnar_json(table).encode('utf-8')
+    except NotExcelFile as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'파일 처리 중 오류가 발생했습니다: {str(e)}'}), 500
+    cache.put(key, body, table.start_date, table.end_date)
+    return body, 200, {'Content-Type': mimetypes[output_format]}
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    if 'file' not in request.files or request.files['file'].filename == '':
+        return jsonify({'error': '파일이 없습니다.'}), 400
+    file = request.files['file']
+    if not allowed_file(file.filename):
+        return jsonify({'error': '허용되지 않는 파일 형식입니다.'}), 400
+    return submit_job(file)
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/download')
+def job_download(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': '작업을 찾을 수 없습니다.'}), 404
+    if job.status == 'failed':
+        return jsonify({'error': f'파일 처리 중 오류가 발생했습니다: {job.error}'}), 500
+    if job.status != 'done':
+        # 아직 변환 중
+        return jsonify(job.to_dict()), 409
+
+    result = job.result
+    if result is None:
+        # 다른 워커가 받은 작업의 결과가 그 사이 만료됨
+        return jsonify({'error': '작업을 찾을 수 없습니다.'}), 404
+    return send_file(BytesIO(result.data), as_attachment=True, download_name=job_download_name(job),
+                     mimetype=XLSX_MIMETYPE)
+
+@app.route('/metrics')
+def metrics():
+    # Prometheus 형식 단계별 지표 (소요 시간 히스토그램, 처리 행 수, 메모리)
+    from conversion_metrics import METRICS
+    return METRICS.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+if PRELOAD:
+    warm_up()
+
 if __name__ == '__main__':
-    # 업로드 및 변환 폴더가 없으면 생성
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    os.makedirs(app.config['CONVERTED_FOLDER'], exist_ok=True)
-    app.run(debug=True)
\ No newline at end of file
+    # 개발용 서버 (운영: gunicorn -c gunicorn.conf.py, wsgi.py 참고)
+    app.run(debug=True)
@@ -1,313 +1,592 @@
-import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
 import os
+import sys
 from datetime import datetime
-from openpyxl.styles import PatternFill, Font
-import glob
+import argparse
+import functools
+import hashlib
+import itertools
+from copy import copy
+import excel_reader
+from conversion_profile import available_profiles, load_profile
+from conversion_metrics import enable_stage_log, stage
+from version_allocator import VersionAllocator
+from io import BytesIO
+from typing import Any, NamedTuple
 
-def get_next_version(base_filename):
-    # 오늘 생성된 같은 날짜의 파일들 검색
-    pattern = f"{base_filename}_v*.xlsx"
-    existing_files = glob.glob(pattern)
-    
-    if not existing_files:
-        return "v01"
-    
-    # 기존 파일들의 버전 번호 추출
-    versions = []
-    for file in existing_files:
+# pandas/openpyxl은 변환하는 함수 안에서 불러온다 (모듈 import, --help, 캐시 키 계산은 가볍게 유지)
+# 작업자를 fork하기 전에 미리 불러오려면 preload() 호출
+
+def get_next_version(base_filename, extension="xlsx", directory="."):
+    # 디렉토리의 버전 카운터(.lylyl_versions.sqlite)에서 다음 버전을 원자적으로 할당
+    # (처음 할당할 때만 기존 파일 번호를 이어받음 - version_allocator 참고)
+    return VersionAllocator(directory).next_version(base_filename, extension)
+
+# 기본 변환 프로필 (profiles/lylyl.json, LYLYL_PROFILE로 변경 - conversion_profile 참고)
+# 아래 상수는 기본 프로필의 값 (다른 모듈에서 쓰는 이름 유지)
+PROFILE = load_profile()
+
+# 출력 컬럼 순서
+OUTPUT_COLUMNS = PROFILE.output_columns
+
+# 지원하는 출력 형식 (xlsx만 서식 적용)
+OUTPUT_FORMATS = ("xlsx", "csv", "parquet")
+
+
+class ConversionResult(NamedTuple):
+    """변환 결과와 보고 기간 (YYMMDD, 프로필에 보고 기간 컬럼이 없으면 None)"""
+    output: Any
+    start_date: str
+    end_date: str
+
+    @property
+    def base_filename(self):
+        # 기본 파일명 (버전 제외)
+        if self.start_date is None:
+            return "LYLYL"
+        return f"LYLYL_{self.start_date}_{self.end_date}"
+
+
+def read_export(source, engine=None, profile=None, filename=None):
+    """
+    Meta 광고 데이터 엑셀을 데이터프레임으로 읽는 함수
+
+    변환과 집계 시트에 쓰는 컬럼(프로필의 컬럼 매핑, 집계용 열)만 자료형을 지정해 읽는다.
+
+    Args:
+        source: 파일 경로, bytes 또는 파일 객체
+        engine: pandas 엑셀 엔진 (None이면 calamine이 설치되어 있을 때 calamine 사용)
+        profile: 변환 프로필 이름/경로 또는 CompiledProfile (None이면 기본 프로필)
+        filename: bytes/파일 객체의 원래 파일 이름 (.xlsx/.xls 이름인데 엑셀 형식이 아니면 NotExcelFile)
+    """
+    profile = load_profile(profile)
+    with stage("read", profile.name) as s:
+        df = excel_reader.read_export(source, columns=profile.read_columns, dtypes=profile.read_dtypes, engine=engine,
+                                      filename=filename)
+        s.rows = len(df)
+    return df
+
+
+def report_date_range(df, profile=None):
+    """
+    원본 데이터의 첫 행에서 보고 시작/종료일을 YYMMDD 형식으로 추출하는 함수
+
+    프로필에 보고 기간 컬럼(report_dates)이 없으면 (None, None)
+    """
+    import pandas as pd
+    report_dates = load_profile(profile).report_dates
+    if not report_dates:
+        return None, None
+    start_date = pd.to_datetime(df[report_dates[0]].iloc[0]).strftime('%y%m%d')
+    end_date = pd.to_datetime(df[report_dates[1]].iloc[0]).strftime('%y%m%d')
+    return start_date, end_date
+
+
+def peek_date_range(source, profile=None):
+    """파일 전체를 읽지 않고 첫 행에서 보고 시작/종료일을 추출하는 함수"""
+    profile = load_profile(profile)
+    if not profile.report_dates:
+        return None, None
+    chunks = excel_reader.iter_export_chunks(source, columns=list(profile.report_dates), chunk_size=1)
+    try:
+        return report_date_range(next(chunks), profile)
+    finally:
+        chunks.close()
+
+
+def convert_export(source, output_path=None, conditional_formatting: bool = False,
+                   output_format: str = "xlsx", chunk_size: int = None, profile=None, rollups: bool = True,
+                   filename: str = None):
+    """
+    이미 읽은 데이터프레임(또는 bytes, 파일 경로)을 변환해 저장하는 함수
+
+    업로드 파일을 한 번만 읽도록, 프런트엔드는 read_export로 읽은 데이터프레임을
+    그대로 넘기고 반환된 보고 기간으로 파일명을 만든다.
+
+    Args:
+        source: read_export로 읽은 데이터프레임, bytes, 파일 경로 또는 파일 객체
+        output_path: 변환된 파일 저장 경로 (또는 파일 객체), None이면 메모리(BytesIO)에 저장
+        conditional_formatting: True이면 조건부 서식 규칙으로 색상 적용
+        output_format: 출력 형식 (OUTPUT_FORMATS 중 하나, csv/parquet은 서식 없이 값만 저장)
+        chunk_size: 지정하면 파일을 이 행 수만큼 나눠 읽는 스트리밍 모드로 변환
+                    (xlsx 출력, 데이터프레임이 아닌 입력에만 적용 - streaming_convert 참고)
+        profile: 변환 프로필 이름/경로 또는 CompiledProfile (None이면 기본 프로필)
+        rollups: True이면 xlsx 출력에 프로필의 집계 시트(캠페인별, 주별 등)를 추가
+        filename: bytes/파일 객체 입력의 원래 파일 이름 (read_export 참고)
+
+    Returns:
+        ConversionResult (output_path 또는 BytesIO, 보고 시작일, 보고 종료일)
+    """
+    import pandas as pd
+    if chunk_size and output_format == "xlsx" and not isinstance(source, pd.DataFrame):
+        from streaming_convert import convert_streaming
+        return convert_streaming(source, output_path, chunk_size=chunk_size,
+                                 conditional_formatting=conditional_formatting, profile=profile,
+                                 rollups=rollups, filename=filename)
+
+    profile = load_profile(profile)
+    df = source if isinstance(source, pd.DataFrame) else read_export(source, profile=profile, filename=filename)
+    start_date, end_date = report_date_range(df, profile)
+    with stage("transform", profile.name, rows=len(df)):
+        prepared = profile.prepare(df)
+        converted = prepared[profile.output_columns]
+
+    output = BytesIO() if output_path is None else output_path
+    if output_format == "xlsx":
+        summary = None
+        if rollups and profile.rollup_sheets:
+            with stage("rollup", profile.name, rows=len(prepared)):
+                summary = profile.rollups(prepared)
+        write_styled_workbook(converted, output, conditional_formatting=conditional_formatting, profile=profile,
+                              rollups=summary)
+    else:
+        with stage("write", profile.name, rows=len(converted)):
+            write_plain_output(converted, output, output_format)
+    if output_path is None:
+        output.seek(0)
+    return ConversionResult(output, start_date, end_date)
+
+
+def convert_excel_bytes(data, conditional_formatting: bool = False, profile=None) -> BytesIO:
+    """
+    업로드된 엑셀(bytes 또는 파일 객체)을 디스크를 거치지 않고 변환하는 함수
+
+    Returns:
+        변환된 xlsx 내용이 담긴 BytesIO (처음 위치로 되돌려 둠)
+    """
+    return convert_export(data, conditional_formatting=conditional_formatting, profile=profile).output
+
+
+def convert_excel_file(input_path: str, output_path: str, conditional_formatting: bool = False,
+                       output_format: str = "xlsx", chunk_size: int = None, profile=None):
+    if chunk_size:
+        # 대용량 파일: 나눠 읽으면서 변환
+        return convert_export(input_path, output_path, conditional_formatting=conditional_formatting,
+                              output_format=output_format, chunk_size=chunk_size, profile=profile)
+
+    # 1. Load file (.xlsx, .xls, .csv)
+    profile = load_profile(profile)
+    df = read_export(input_path, profile=profile)
+    return convert_export(df, output_path, conditional_formatting=conditional_formatting,
+                          output_format=output_format, profile=profile)
+
+
+def write_plain_output(df, output_path, output_format):
+    """
+    변환된 데이터프레임을 서식 없이 CSV 또는 Parquet으로 저장하는 함수
+
+    스크립트/BI에서 읽을 용도라 openpyxl 서식 단계를 거치지 않는다.
+    Parquet은 pyarrow(또는 fastparquet)가 설치되어 있어야 한다.
+    """
+    if output_format == "csv":
+        df.to_csv(output_path, index=False, encoding=excel_reader.CSV_ENCODING)
+    elif output_format == "parquet":
         try:
-            version = file.split("_")[-1].replace(".xlsx", "")  # v01, v02 등 추출
-            version_num = int(version.replace("v", ""))
-            versions.append(version_num)
-        except:
-            continue
-    
-    if not versions:
-        return "v01"
-    
-    # 최대 버전 번호에 1을 더해서 반환
-    next_version = max(versions) + 1
-    return f"v{next_version:02d}"
-
-def convert_excel_file(input_path: str, output_path: str):
-    # 1. Load file
-    df = pd.read_excel(input_path)
-
-    # 2. Column mapping
-    column_mapping = {
-        "광고 이름": "제목",
-        "광고 게재": "상태",
-        "지출 금액 (KRW)": "광고비",
-        "구매": "구매",
-        "구매 전환값": "매출",
-        "구매 ROAS(광고 지출 대비 수익률)": "ROAS",
-        "CPC(전체) (KRW)": "CPC",
-        "전환율(CVR)": "CVR",
-        "CTR(전체)": "CTR",
-        "클릭(전체)": "클릭",
-        "동영상 재생": "동영상 재생",
-        "동영상 3초 이상 재생": "동영상 3초 이상 재생",
-        "동영상 100% 재생": "동영상 100% 재생",
-        "보고 시작": "보고 시작",
-        "보고 종료": "보고 종료"
+            df.to_parquet(output_path, index=False)
+        except ImportError as e:
+            raise ImportError("Parquet 저장에는 pyarrow가 필요합니다 (pip install pyarrow)") from e
+    else:
+        raise ValueError(f"지원하지 않는 출력 형식입니다: {output_format} (가능한 형식: {', '.join(OUTPUT_FORMATS)})")
+
+
+def transform_export(df, profile=None):
+    """
+    원본 데이터프레임을 출력 컬럼 순서의 변환된 데이터프레임으로 만드는 함수
+
+    컬럼 매핑, 광고비 0 제거, 상태 변환, 파생 지표(평균객단가, 후크, 지속), 정렬,
+    CVR/CTR 보정과 반올림은 모두 프로필의 변환 단계(transform)에 선언되어 있다.
+    """
+    return load_profile(profile).transform(df)
+
+
+@functools.lru_cache(maxsize=None)
+def _header_styles():
+    # 헤더 서식 (pandas to_excel 기본 헤더 서식과 동일, 처음 쓸 때 한 번 만듦)
+    from openpyxl.styles import Font, Border, Side, Alignment
+    thin = Side(style="thin")
+    return {
+        "HEADER_FONT": Font(bold=True),
+        "HEADER_BORDER": Border(left=thin, right=thin, top=thin, bottom=thin),
+        "HEADER_ALIGNMENT": Alignment(horizontal="center", vertical="top"),
     }
-    df = df[list(column_mapping.keys())].rename(columns=column_mapping)
 
-    # 3. 광고비 0 제거
-    df = df[df["광고비"] > 0].copy()
 
-    # 광고 게재 상태 변환 (대소문자 구분 없이 처리)
-    df["상태"] = df["상태"].str.upper().map({"ACTIVE": "ON", "INACTIVE": "OFF"})
+def assign_tiers(df, profile=None):
+    """
+    데이터프레임의 색상 단계를 열 단위로 계산하는 함수
 
-    # 평균객단가 계산 (0으로 나누기 방지)
-    df["평균객단가"] = df.apply(lambda row: round(row["매출"] / row["구매"]) if row["구매"] > 0 else 0, axis=1)
+    엑셀 외의 출력(HTML, CSV, JSON 등)에서도 같은 기준을 쓰기 위한 API
 
-    # 4. 후크 및 지속 계산 (소수점으로 계산)
-    df["후크"] = (df["동영상 3초 이상 재생"] / df["동영상 재생"]).round(4)
-    df["지속"] = (df["동영상 100% 재생"] / df["동영상 3초 이상 재생"]).round(4)
+    Returns:
+        "상태" 열(행 색상)과 색상 기준 지표 중 df에 있는 열로 이루어진 데이터프레임
+    """
+    return load_profile(profile).assign_tiers(df)
 
-    # 5. 상태와 광고비로 정렬 (ON이 먼저, 각 상태 내에서 광고비 높은 순)
-    # 상태를 기준으로 정렬할 때 ON이 먼저 오도록 정렬 키 설정
-    df['정렬키'] = df['상태'].map({'ON': 0, 'OFF': 1})
-    df = df.sort_values(by=['정렬키', '광고비'], ascending=[True, False])
-    df = df.drop('정렬키', axis=1)  # 정렬 후 임시 컬럼 제거
 
-    # 6. 컬럼 순서 정리
-    columns = ["상태", "보고 시작", "보고 종료", "제목", "광고비", "매출", "ROAS", "CPC", "CVR", "CTR", "후크", "지속", "클릭", "구매", "평균객단가"]
-    df = df[columns]
+def _is_number(value):
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
 
-    # 7. 엑셀로 저장 (임시)
-    df.to_excel(output_path, index=False)
 
-    # 8. 서식 적용
-    wb = load_workbook(output_path)
-    ws = wb.active
-    col_idx = {cell.value: idx + 1 for idx, cell in enumerate(ws[1])}
+def _cell_value(value):
+    # pandas의 NaN/NaT는 빈 셀로 기록 (자기 자신과 같지 않은 값)
+    if value is None or (not isinstance(value, str) and value != value):
+        return None
+    return value
 
-    # 9. 열 너비 설정
-    # 보고 시작, 보고 종료 (B, C열)
-    ws.column_dimensions['A'].width = 7  # 상태
-    ws.column_dimensions['B'].width = 10  # 보고 시작
-    ws.column_dimensions['C'].width = 10  # 보고 종료
-    
-    # 제목 (D열)
-    ws.column_dimensions['D'].width = 25
-    
-    # 광고비, 매출 (E, F열)
-    ws.column_dimensions['E'].width = 12
-    ws.column_dimensions['F'].width = 12
-    
-    # ROAS, CPC, CVR, CTR, 후크, 지속, 클릭, 구매 (G-N열)
-    for col in ['G', 'H', 'I', 'J', 'K', 'L', 'M', 'N']:
-        ws.column_dimensions[col].width = 7
 
-    # 평균객단가 (O열)
-    ws.column_dimensions['O'].width = 9
+def format_report_date(value, date_format="%m월%d일"):
+    # 보고 시작/종료: "04월14일" 형식, 변환할 수 없는 값은 그대로 둠
+    if isinstance(value, datetime):
+        return value.strftime(date_format)
+    return datetime.strptime(str(value), "%Y-%m-%d").strftime(date_format)
 
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
-        r = row[0].row
 
-        # 상태 변환 및 색상 적용 (A열부터 F열까지)
-        try:
-            status_value = ws.cell(r, col_idx["상태"]).value
-            roas_value = ws.cell(r, col_idx["ROAS"]).value
-            
-            # ON 상태에서 ROAS가 2.0 이하이거나 없는 경우 빨간색, 그 외 ON은 파란색, OFF는 회색
-            if status_value == "ON":
-                if roas_value is None or roas_value <= 2.0:
-                    status_color = PatternFill(start_color='F8D7DA', end_color='F8D7DA', fill_type='solid')  # 빨간색
-                else:
-                    status_color = PatternFill(start_color='CCE5FF', end_color='CCE5FF', fill_type='solid')  # 파란색
-            elif status_value == "OFF":
-                status_color = PatternFill(start_color='A6B2BE', end_color='A6B2BE', fill_type='solid')  # 회색
-            
-            # 상태부터 매출까지의 열에 색상 적용
-            for col_letter in ['A', 'B', 'C', 'D', 'E', 'F']:  # 상태, 보고시작, 보고종료, 제목, 광고비, 매출
-                ws[f"{col_letter}{r}"].fill = status_color
-        except:
-            pass
-
-        # 보고 시작/종료: 날짜 형식 (B, C열)
-        for key in ["보고 시작", "보고 종료"]:
-            try:
-                date_value = ws.cell(r, col_idx[key]).value
-                if date_value:
-                    if isinstance(date_value, datetime):
-                        formatted_date = date_value.strftime("%m월%d일")
-                    else:
-                        date_obj = datetime.strptime(str(date_value), "%Y-%m-%d")
-                        formatted_date = date_obj.strftime("%m월%d일")
-                    ws.cell(r, col_idx[key]).value = formatted_date
-                ws.cell(r, col_idx[key]).number_format = "@"
-            except:
-                pass
-
-        # ROAS: 0.00 (G열)
-        ws.cell(r, col_idx["ROAS"]).number_format = "0.00"
-        
-        # 광고비, 매출: 원화 형식 (천 단위 구분) (E, F열)
-        for key in ["광고비", "매출"]:
-            try:
-                val = float(ws.cell(r, col_idx[key]).value)
-                ws.cell(r, col_idx[key]).number_format = "#,##0원"
-            except:
-                pass
+# 열별 숫자 형식 (기본 프로필, 값이 숫자인 셀에만 적용)
+NUMBER_FORMATS = {key: number_format for key, number_format in PROFILE.number_formats.items()
+                  if key not in PROFILE.always_formats}
 
-        # CPC: 원화 형식 (소수점 없음) (H열)
-        try:
-            cpc_val = float(ws.cell(r, col_idx["CPC"]).value)
-            ws.cell(r, col_idx["CPC"]).number_format = "#,##0원"
-        except:
-            pass
 
-        # CVR: 보정 + 퍼센트 (I열)
-        try:
-            cvr_val = float(ws.cell(r, col_idx["CVR"]).value)
-            if cvr_val >= 100:
-                cvr_val *= 0.01
-            ws.cell(r, col_idx["CVR"]).value = round(cvr_val, 4)
-            ws.cell(r, col_idx["CVR"]).number_format = "0.00%"
-        except:
-            pass
-
-        # CTR: 무조건 0.01 보정 후 퍼센트 (J열)
-        try:
-            ctr_val = float(ws.cell(r, col_idx["CTR"]).value) * 0.01
-            ws.cell(r, col_idx["CTR"]).value = round(ctr_val, 4)
-            ws.cell(r, col_idx["CTR"]).number_format = "0.00%"
-        except:
-            pass
-
-        # 후크 / 지속: 정수 퍼센트 (K, L열)
-        for key in ["후크", "지속"]:
-            try:
-                val = float(ws.cell(r, col_idx[key]).value)
-                ws.cell(r, col_idx[key]).value = val
-                ws.cell(r, col_idx[key]).number_format = "0%"
-            except:
-                pass
-
-        # 클릭, 구매: 정수 (M, N열)
-        for key in ["클릭", "구매"]:
-            try:
-                val = float(ws.cell(r, col_idx[key]).value)
-                ws.cell(r, col_idx[key]).value = round(val, 0)
-                ws.cell(r, col_idx[key]).number_format = "#,##0"
-            except:
-                pass
+def conditional_formatting_rules(columns, max_row, profile=None):
+    """
+    색상 기준을 워크시트 조건부 서식 규칙으로 만드는 함수
 
-        # 평균객단가: 원화 형식 (O열)
-        try:
-            val = float(ws.cell(r, col_idx["평균객단가"]).value)
-            ws.cell(r, col_idx["평균객단가"]).value = round(val, 0)
-            ws.cell(r, col_idx["평균객단가"]).number_format = "#,##0원"
-        except:
-            pass
-
-        # 후크 값에 따른 셀 색상 설정
-        hook_value = ws.cell(r, col_idx['후크']).value
-        if hook_value is not None:
-            if hook_value >= 0.40:  # 40%
-                fill = PatternFill(start_color='CCE5FF', end_color='CCE5FF', fill_type='solid')  # 파란색
-            elif hook_value >= 0.30:  # 30%
-                fill = PatternFill(start_color='D4EDDA', end_color='D4EDDA', fill_type='solid')  # 초록색
-            elif hook_value >= 0.20:  # 20%
-                fill = PatternFill(start_color='FFF3CD', end_color='FFF3CD', fill_type='solid')  # 주황색
-            else:
-                fill = PatternFill(start_color='F8D7DA', end_color='F8D7DA', fill_type='solid')  # 빨간색
-        else:
-            fill = PatternFill(start_color='F8D7DA', end_color='F8D7DA', fill_type='solid')  # 빨간색 (데이터 없음)
-        
-        ws.cell(r, col_idx['후크']).fill = fill
-
-        # 지속 값에 따른 셀 색상 설정
-        retention_value = ws.cell(r, col_idx['지속']).value
-        if retention_value is not None:
-            if retention_value >= 0.30:  # 30%
-                fill = PatternFill(start_color='CCE5FF', end_color='CCE5FF', fill_type='solid')  # 파란색
-            elif retention_value >= 0.20:  # 20%
-                fill = PatternFill(start_color='D4EDDA', end_color='D4EDDA', fill_type='solid')  # 초록색
-            elif retention_value >= 0.10:  # 10%
-                fill = PatternFill(start_color='FFF3CD', end_color='FFF3CD', fill_type='solid')  # 주황색
-            else:
-                fill = PatternFill(start_color='F8D7DA', end_color='F8D7DA', fill_type='solid')  # 빨간색
-        else:
-            fill = PatternFill(start_color='F8D7DA', end_color='F8D7DA', fill_type='solid')  # 빨간색 (데이터 없음)
-        
-        ws.cell(r, col_idx['지속']).fill = fill
-
-        # ROAS 값에 따른 셀 색상 설정
-        roas_value = ws.cell(r, col_idx["ROAS"]).value
-        if roas_value is not None:
-            if roas_value >= 3.0:
-                fill = PatternFill(start_color='CCE5FF', end_color='CCE5FF', fill_type='solid')  # 파란색
-            elif roas_value >= 2.5:
-                fill = PatternFill(start_color='D4EDDA', end_color='D4EDDA', fill_type='solid')  # 초록색
-            elif roas_value >= 1.0:
-                fill = PatternFill(start_color='FFF3CD', end_color='FFF3CD', fill_type='solid')  # 주황색
-            else:
-                fill = PatternFill(start_color='F8D7DA', end_color='F8D7DA', fill_type='solid')  # 빨간색
-        else:
-            fill = PatternFill(start_color='F8D7DA', end_color='F8D7DA', fill_type='solid')  # 빨간색 (데이터 없음)
-        
-        ws.cell(r, col_idx["ROAS"]).fill = fill
-
-        # CPC 값에 따른 셀 색상 설정
-        cpc_value = ws.cell(r, col_idx["CPC"]).value
-        if cpc_value is not None:
-            if cpc_value < 1000:
-                fill = PatternFill(start_color='CCE5FF', end_color='CCE5FF', fill_type='solid')  # 파란색
-            elif cpc_value < 1500:
-                fill = PatternFill(start_color='D4EDDA', end_color='D4EDDA', fill_type='solid')  # 초록색
-            elif cpc_value < 2000:
-                fill = PatternFill(start_color='FFF3CD', end_color='FFF3CD', fill_type='solid')  # 주황색
-            else:
-                fill = PatternFill(start_color='F8D7DA', end_color='F8D7DA', fill_type='solid')  # 빨간색
+    셀마다 색상을 넣는 대신 열 범위마다 규칙을 걸기 때문에 행 수와 관계없이
+    규칙 수가 일정하고, 엑셀에서 값을 고치면 색상도 다시 계산된다.
+
+    Args:
+        columns: 출력 컬럼 이름 목록 (엑셀 열 순서)
+        max_row: 데이터가 있는 마지막 행 번호 (헤더 포함)
+
+    Returns:
+        (셀 범위, 규칙) 목록 (먼저 나온 규칙이 우선)
+    """
+    return load_profile(profile).conditional_formatting_rules(columns, max_row)
+
+
+def format_report_dates(values, date_format="%m월%d일"):
+    """
+    보고 시작/종료 열 전체를 "04월14일" 형식으로 바꾸는 함수 (format_report_date의 열 단위 버전)
+
+    날짜 열과 "YYYY-MM-DD" 문자열은 pandas로 한 번에 바꾸고, 그렇게 읽히지 않는 값만
+    format_report_date로 하나씩 바꾼다. 빈 값은 그대로 두고, 변환할 수 없는 값은 원래 값을 쓴다.
+
+    Args:
+        values: 날짜 열 (Series)
+        date_format: 출력 날짜 형식
+
+    Returns:
+        (셀 값 목록, 텍스트 형식("@")을 적용할지 목록)
+    """
+    import pandas as pd
+    cells = values.astype(object).where(values.notna(), None)
+    filled = cells.astype(bool)
+    parsed = pd.to_datetime(cells.where(filled), format="%Y-%m-%d", errors="coerce")
+    formatted = parsed.dt.strftime(date_format).tolist()
+
+    result, text = [], []
+    for value, is_filled, is_parsed, date_text in zip(cells.tolist(), filled.tolist(),
+                                                      parsed.notna().tolist(), formatted):
+        if not is_filled:
+            result.append(value)
+            text.append(True)
+        elif is_parsed:
+            result.append(date_text)
+            text.append(True)
         else:
-            fill = PatternFill(start_color='F8D7DA', end_color='F8D7DA', fill_type='solid')  # 빨간색 (데이터 없음)
-        
-        ws.cell(r, col_idx["CPC"]).fill = fill
-
-        # CVR 값에 따른 셀 색상 설정
-        cvr_value = ws.cell(r, col_idx["CVR"]).value
-        if cvr_value is not None:
-            if cvr_value >= 0.07:  # 7%
-                fill = PatternFill(start_color='CCE5FF', end_color='CCE5FF', fill_type='solid')  # 파란색
-            elif cvr_value >= 0.05:  # 5%
-                fill = PatternFill(start_color='D4EDDA', end_color='D4EDDA', fill_type='solid')  # 초록색
-            elif cvr_value >= 0.03:  # 3%
-                fill = PatternFill(start_color='FFF3CD', end_color='FFF3CD', fill_type='solid')  # 주황색
-            else:
-                fill = PatternFill(start_color='F8D7DA', end_color='F8D7DA', fill_type='solid')  # 빨간색
+            try:
+                result.append(format_report_date(value, date_format))
+                text.append(True)
+            except ValueError:
+                result.append(value)
+                text.append(False)
+    return result, text
+
+
+def iter_tier_rows(df, conditional_formatting=False, profile=None):
+    """
+    데이터프레임의 행별 (셀 값 튜플, 셀 서식 키 튜플)을 만드는 함수
+
+    셀 값(빈 값은 None, 보고 시작/종료는 "04월14일")과 셀 서식 키 (숫자 형식, 색상 단계)를
+    열 단위로 미리 계산한다. 서식이 없는 셀의 키는 None이다.
+    conditional_formatting이 True이면 셀 색상은 조건부 서식이 담당하므로 색상 단계는 비워 둔다.
+    """
+    from pandas.api.types import is_numeric_dtype
+    profile = load_profile(profile)
+
+    # 색상 단계는 열 단위로 미리 계산 (색상 기준이 없는 프로필은 열이 없음)
+    tiers = None if conditional_formatting else assign_tiers(df, profile)
+    row_tier = None
+    if tiers is not None and profile.row_tiers and profile.row_tiers["status_column"] in tiers:
+        row_tier = tiers[profile.row_tiers["status_column"]].tolist()
+    row_columns = set(profile.row_tiers["columns"]) if profile.row_tiers else set()
+
+    value_columns, key_columns = [], []
+    for column in df.columns:
+        values = df[column]
+        formats = [None] * len(df)
+        if column in profile.date_formats:
+            cells, text = format_report_dates(values, profile.date_formats[column])
+            formats = ["@" if is_text else None for is_text in text]
         else:
-            fill = PatternFill(start_color='F8D7DA', end_color='F8D7DA', fill_type='solid')  # 빨간색 (데이터 없음)
-        
-        ws.cell(r, col_idx["CVR"]).fill = fill
-
-        # CTR 값에 따른 셀 색상 설정
-        ctr_value = ws.cell(r, col_idx['CTR']).value
-        if ctr_value is not None:
-            if ctr_value >= 0.05:  # 5%
-                fill = PatternFill(start_color='CCE5FF', end_color='CCE5FF', fill_type='solid')  # 파란색
-            elif ctr_value >= 0.03:  # 3%
-                fill = PatternFill(start_color='D4EDDA', end_color='D4EDDA', fill_type='solid')  # 초록색
-            elif ctr_value >= 0.02:  # 2%
-                fill = PatternFill(start_color='FFF3CD', end_color='FFF3CD', fill_type='solid')  # 주황색
+            cells = values.astype(object).where(values.notna(), None).tolist()
+
+        # 숫자 형식 (always가 아닌 형식은 값이 숫자인 셀에만)
+        number_format = profile.number_formats.get(column)
+        if number_format is not None:
+            if column in profile.always_formats:
+                formats = [number_format] * len(df)
             else:
-                fill = PatternFill(start_color='F8D7DA', end_color='F8D7DA', fill_type='solid')  # 빨간색
+                numbers = values.notna().tolist() if is_numeric_dtype(values) else map(_is_number, cells)
+                formats = [number_format if is_number else fmt for is_number, fmt in zip(numbers, formats)]
+
+        # 색상: 지표 열은 지표별 단계, 행 색상 열은 "상태" 단계
+        if tiers is not None and column in profile.tier_thresholds and column in tiers:
+            column_tiers = tiers[column].tolist()
+        elif row_tier is not None and column in row_columns:
+            column_tiers = row_tier
         else:
-            fill = PatternFill(start_color='F8D7DA', end_color='F8D7DA', fill_type='solid')  # 빨간색 (데이터 없음)
-        
-        ws.cell(r, col_idx['CTR']).fill = fill
+            column_tiers = itertools.repeat(None)
+
+        value_columns.append(cells)
+        key_columns.append([None if fmt is None and tier is None else (fmt, tier)
+                            for fmt, tier in zip(formats, column_tiers)])
+    return zip(zip(*value_columns), zip(*key_columns))
+
+
+class _StyleTemplates(dict):
+    """
+    셀 서식 키 (숫자 형식, 색상 단계) → 워크북에 등록한 NamedStyle의 스타일 배열
+
+    키마다 NamedStyle을 한 번만 만들어 워크북에 등록하고, 셀에는 그 스타일 배열을 복사해
+    한 번에 지정한다 (셀마다 number_format, fill을 따로 넣으면 속성마다 스타일 목록을 다시 찾음).
+    """
+
+    def __init__(self, wb, profile):
+        super().__init__()
+        self.wb = wb
+        self.profile = profile
+
+    def __missing__(self, key):
+        from openpyxl.styles import NamedStyle
+        from openpyxl.styles.borders import DEFAULT_BORDER
+        from openpyxl.styles.fonts import DEFAULT_FONT
+        number_format, tier = key
+        name = " ".join(filter(None, ["LYLYL", number_format or "General", tier]))
+        # consolidate.py처럼 이미 저장된 워크북을 다시 쓰면 같은 이름의 템플릿을 그대로 씀
+        if name not in self.wb.named_styles:
+            self.wb.add_named_style(NamedStyle(
+                name=name, font=DEFAULT_FONT, border=DEFAULT_BORDER, number_format=number_format,
+                fill=self.profile.tier_fills[tier] if tier is not None else None))
+        style = self.wb._named_styles[name].as_tuple()
+        self[key] = style
+        return style
+
+
+def write_styled_workbook(df, output_path, conditional_formatting=False, profile=None, rollups=None):
+    """
+    변환된 데이터프레임을 서식과 함께 한 번에 엑셀 파일로 저장하는 함수
+
+    openpyxl write-only 모드로 값, 숫자 형식, 열 너비, 색상을 한 번에 기록한다.
+
+    Args:
+        df: 변환된 데이터프레임 (컬럼 순서는 출력 순서와 동일)
+        output_path: 변환된 파일 저장 경로
+        conditional_formatting: True이면 셀마다 색상을 넣지 않고 조건부 서식 규칙으로 색상 적용
+        profile: 변환 프로필 (숫자 형식, 열 너비, 색상 기준)
+        rollups: 변환 결과 시트 뒤에 추가할 집계 시트 {시트 이름: 데이터프레임} (CompiledProfile.rollups 결과)
+    """
+    profile = load_profile(profile)
+    with stage("style", profile.name, rows=len(df)):
+        rows = iter_tier_rows(df, conditional_formatting, profile)
+    with stage("write", profile.name, rows=len(df)):
+        wb, _ = build_styled_workbook(list(df.columns), rows, conditional_formatting, profile, rollups)
+    with stage("save", profile.name, rows=len(df)):
+        wb.save(output_path)
+
+
+def write_styled_rows(columns, rows, output_path, conditional_formatting=False, profile=None, rollups=None):
+    """
+    (셀 값 튜플, 셀 서식 키 튜플) 행(iter_tier_rows)을 차례로 받아 서식과 함께 저장하는 함수
+
+    행을 모두 메모리에 올리지 않고 받는 대로 write-only 시트에 기록한다.
 
+    Returns:
+        기록한 데이터 행 수
+    """
+    wb, row_count = build_styled_workbook(columns, rows, conditional_formatting, profile, rollups)
     wb.save(output_path)
+    return row_count
+
+
+def build_styled_workbook(columns, rows, conditional_formatting=False, profile=None, rollups=None):
+    """
+    서식이 적용된 write-only 워크북을 만드는 함수 (저장은 호출하는 쪽에서)
+
+    rollups가 있으면 변환 결과 시트 뒤에 집계 시트를 차례로 추가한다.
+
+    Returns:
+        (워크북, 기록한 데이터 행 수)
+    """
+    from openpyxl import Workbook
+    profile = load_profile(profile)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    row_count = write_styled_sheet(ws, columns, rows, conditional_formatting, profile)
+    key_columns = {name: len(by) for name, by, _ in profile.rollup_sheets}
+    for name, table in (rollups or {}).items():
+        write_table_sheet(wb.create_sheet(name), table, profile.rollup_number_formats,
+                          key_columns=key_columns.get(name, 1))
+    return wb, row_count
+
+
+def header_cells(ws, columns):
+    """굵은 글씨, 테두리, 가운데 정렬이 적용된 헤더 셀 목록을 만드는 함수"""
+    from openpyxl.cell import WriteOnlyCell
+    styles = _header_styles()
+    header = []
+    for name in columns:
+        cell = WriteOnlyCell(ws, value=name)
+        cell.font = styles["HEADER_FONT"]
+        cell.border = styles["HEADER_BORDER"]
+        cell.alignment = styles["HEADER_ALIGNMENT"]
+        header.append(cell)
+    return header
+
+
+def write_table_sheet(ws, df, number_formats, key_columns=1, first_width=25, width=12):
+    """
+    요약/집계 시트를 기록하는 함수 (헤더 서식과 열별 숫자 형식만 적용, 빈 값은 빈 셀)
+
+    Args:
+        ws: 시트 (write-only 시트 포함)
+        df: 기록할 데이터프레임
+        number_formats: {열: 숫자 형식}
+        key_columns: 앞에서부터 first_width 너비를 쓸 기준 열 수 (나머지 열은 width)
+    """
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+    for idx in range(len(df.columns)):
+        ws.column_dimensions[get_column_letter(idx + 1)].width = first_width if idx < key_columns else width
+    ws.append(header_cells(ws, list(df.columns)))
+    formats = [number_formats.get(col) for col in df.columns]
+    for values in df.itertuples(index=False, name=None):
+        cells = []
+        for value, number_format in zip(values, formats):
+            cell = WriteOnlyCell(ws, value=_cell_value(value))
+            if number_format and cell.value is not None:
+                cell.number_format = number_format
+            cells.append(cell)
+        ws.append(cells)
+
+
+def write_styled_sheet(ws, columns, rows, conditional_formatting=False, profile=None):
+    """
+    변환 결과 행을 서식과 함께 시트에 기록하는 함수
+
+    write-only 시트와 일반 시트 모두에 쓸 수 있다 (consolidate.py는 기존 워크북의 시트만 바꿔 씀).
+
+    Returns:
+        기록한 데이터 행 수
+    """
+    from openpyxl.cell import WriteOnlyCell
+    profile = load_profile(profile)
+
+    # 열 너비 설정
+    for col_letter, width in profile.column_widths.items():
+        ws.column_dimensions[col_letter].width = width
+
+    ws.append(header_cells(ws, columns))
+
+    templates = _StyleTemplates(ws.parent, profile)
+    row_count = 0
+    for values, style_keys in rows:
+        cells = []
+        for value, key in zip(values, style_keys):
+            cell = WriteOnlyCell(ws, value=value)
+            if key is not None:
+                cell._style = copy(templates[key])
+            cells.append(cell)
+        ws.append(cells)
+        row_count += 1
+
+    # write-only 모드에서는 모든 행을 기록한 뒤에 조건부 서식을 추가해야 함
+    if conditional_formatting and row_count > 0:
+        for cell_range, rule in profile.conditional_formatting_rules(columns, row_count + 1):
+            ws.conditional_formatting.add(cell_range, rule)
+
+    return row_count
+
+
+# 변환 규칙을 바꿀 때 올리는 버전 (캐시 무효화용)
+CONVERTER_VERSION = "3"
+
+
+def config_fingerprint(profile=None):
+    """
+    변환 규칙(변환기 버전과 프로필 내용)의 해시
+
+    같은 업로드라도 규칙이 바뀌면 다른 결과가 나오므로 캐시 키에 포함한다.
+    """
+    payload = f"{CONVERTER_VERSION}:{load_profile(profile).fingerprint}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def preload():
+    """
+    변환에 쓰는 무거운 모듈(pandas, openpyxl, 엑셀 엔진)을 불러오고 모든 프로필을 컴파일해 두는 함수
+
+    작업자를 fork하기 전에(gunicorn preload_app 또는 LYLYL_PRELOAD=1 - app.warm_up) 한 번 호출하면
+    작업자는 fork로 그대로 물려받아 첫 변환 때 import 비용이 들지 않는다.
+    """
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import openpyxl  # noqa: F401
+    import openpyxl.cell  # noqa: F401
+    import openpyxl.formatting.rule  # noqa: F401
+    import streaming_convert  # noqa: F401
+    if excel_reader.fast_engine_available():
+        import python_calamine  # noqa: F401
+    _header_styles()
+    for name in available_profiles():
+        load_profile(name).tier_fills
+
 
 # 테스트 실행 코드
 if __name__ == "__main__":
-    # 사용자에게 입력 파일 경로 물어보기
-    input_file = input("변환할 Excel 파일 이름을 입력하세요: ")
+    import watch_folder
+
+    parser = argparse.ArgumentParser(description="LYLYL 광고 데이터 변환기")
+    parser.add_argument("input_file", nargs="?", help="변환할 Excel/CSV 파일 (생략하면 입력을 물어봄)")
+    parser.add_argument("--watch", metavar="DIR", default=None,
+                        help="폴더를 감시하며 새로 들어오거나 바뀐 파일을 자동 변환 (watch_folder.py 참고)")
+    parser.add_argument("--format", dest="output_format", choices=OUTPUT_FORMATS, default="xlsx",
+                        help="출력 형식 (csv/parquet은 서식 없이 저장, 기본값: xlsx)")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="대용량 파일을 이 행 수만큼 나눠 읽어 메모리 사용량을 제한 (xlsx 출력, .xlsx/.csv 입력)")
+    parser.add_argument("--stage-log", action="store_true",
+                        help="단계별 소요 시간/행 수/메모리를 JSON 한 줄씩 stderr에 출력")
+    parser.add_argument("--no-rollups", dest="rollups", action="store_false",
+                        help="캠페인별/광고 세트별/상태별/주별 집계 시트를 추가하지 않음")
+    parser.add_argument("--profile", default=None,
+                        help=f"변환 프로필 이름 또는 파일 경로 (기본값: {PROFILE.name}, 사용 가능: "
+                             f"{', '.join(available_profiles())})")
+    watch_folder.build_parser(parser.add_argument_group("폴더 감시 (--watch)"))
+    args = parser.parse_args()
+
+    if args.stage_log:
+        enable_stage_log()
+
+    if args.watch:
+        watch_folder.watch(args.watch, args, output_format=args.output_format, profile=args.profile)
+        sys.exit(0)
+
+    # 파일을 지정하지 않은 경우 사용자에게 입력 파일 경로 물어보기 (터미널이 아니면 물어보지 않고 종료)
+    if not args.input_file and not sys.stdin.isatty():
+        parser.error("변환할 파일을 지정하세요 (폴더 자동 변환은 --watch 폴더)")
+    input_file = args.input_file or input("변환할 Excel 파일 이름을 입력하세요: ")
     
     # 현재 디렉토리 경로 가져오기
     current_dir = os.getcwd()
@@ -317,22 +596,27 @@ if __name__ == "__main__":
         input_file = os.path.join(current_dir, input_file)
     
     try:
-        # 데이터프레임 생성하여 날짜 정보 추출
-        df = pd.read_excel(input_file)
-        start_date = pd.to_datetime(df['보고 시작'].iloc[0]).strftime('%y%m%d')
-        end_date = pd.to_datetime(df['보고 종료'].iloc[0]).strftime('%y%m%d')
+        if args.chunk_size and excel_reader.supports_chunks(input_file):
+            # 대용량 파일: 첫 행만 읽어서 날짜 정보 추출 (변환은 나눠 읽으면서 진행, .xls는 한 번에 읽음)
+            df = None
+            start_date, end_date = peek_date_range(input_file, args.profile)
+        else:
+            # 데이터프레임 생성하여 날짜 정보 추출 (변환에도 같은 데이터프레임 사용)
+            df = read_export(input_file, profile=args.profile)
+            start_date, end_date = report_date_range(df, args.profile)
         
         # 기본 파일명 생성 (버전 제외)
-        base_filename = f"LYLYL_{start_date}_{end_date}"
+        base_filename = ConversionResult(None, start_date, end_date).base_filename
         
         # 다음 버전 번호 가져오기
-        version = get_next_version(base_filename)
+        version = get_next_version(base_filename, args.output_format, current_dir)
         
         # 최종 출력 파일명 생성
-        output_filename = f"{base_filename}_{version}.xlsx"
+        output_filename = f"{base_filename}_{version}.{args.output_format}"
         output_file = os.path.join(current_dir, output_filename)
         
-        convert_excel_file(input_file, output_file)
+        convert_export(input_file if df is None else df, output_file, output_format=args.output_format,
+                       chunk_size=args.chunk_size, profile=args.profile, rollups=args.rollups)
         print("\n✅ 변환이 완료되었습니다!")
         print(f"입력 파일: {input_file}")
         print(f"출력 파일: {output_file}")
@@ -0,0 +1,120 @@
+"""
+벤치마크용 가상 Meta 광고 데이터 생성기
+
+두 변환기(auto_convert_excel.py, convert_excel.py)의 컬럼 매핑에 있는 모든 컬럼과
+Meta 내보내기에 흔히 있는 추가 컬럼을 한국어 헤더로 만든다.
+ACTIVE/INACTIVE(대소문자 섞임), 광고비 0인 행, CVR이 퍼센트 값(100 이상)으로 들어온 행,
+동영상 재생이 0인 행을 섞는다.
+
+사용법:
+    python benchmarks/generate_export.py 10000 sample_10k.xlsx
+    python benchmarks/generate_export.py 1000000 sample_1m.csv --extra-columns 100
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+# 보고 기간 (Meta 내보내기는 날짜를 문자열로 기록)
+REPORT_START = "2025-04-14"
+REPORT_END = "2025-04-20"
+
+
+def generate_export(rows, seed=0, zero_spend_ratio=0.15, active_ratio=0.6, extra_columns=0):
+    """
+    가상 광고 데이터 데이터프레임을 만드는 함수
+
+    Args:
+        rows: 행 수
+        seed: 난수 시드 (같은 시드면 같은 데이터)
+        zero_spend_ratio: 광고비가 0인 행 비율
+        active_ratio: ACTIVE 행 비율
+        extra_columns: 변환에 쓰지 않는 추가 지표 컬럼 수 (100개 이상 컬럼 내보내기 재현용)
+    """
+    rng = np.random.default_rng(seed)
+
+    spend = rng.gamma(2.0, 40000, rows).round(0)
+    spend[rng.random(rows) < zero_spend_ratio] = 0
+    impressions = rng.integers(100, 200000, rows)
+    clicks = (impressions * rng.uniform(0.002, 0.06, rows)).astype(int)
+    purchases = (clicks * rng.uniform(0, 0.1, rows)).astype(int)
+    revenue = purchases * rng.integers(15000, 80000, rows)
+    plays = (impressions * rng.uniform(0, 0.8, rows)).astype(int)
+    plays[rng.random(rows) < 0.05] = 0  # 이미지 광고 (동영상 재생 없음)
+    plays_3s = (plays * rng.uniform(0.1, 0.6, rows)).astype(int)
+    plays_100 = (plays_3s * rng.uniform(0, 0.5, rows)).astype(int)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roas = np.where(spend > 0, revenue / spend, 0).round(2)
+        cpc = np.where(clicks > 0, spend / clicks, 0).round(0)
+        cvr = np.where(clicks > 0, purchases / clicks * 100, 0).round(2)
+        ctr = (clicks / impressions * 100).round(2)
+    # 일부 계정은 CVR을 100배 값으로 내보냄
+    cvr = np.where(rng.random(rows) < 0.1, cvr * 100, cvr)
+
+    status = np.where(rng.random(rows) < active_ratio, "active", "inactive")
+    status = np.where(rng.random(rows) < 0.5, np.char.upper(status), status)
+
+    campaign = rng.integers(0, max(rows // 200, 1), rows)
+    adset = rng.integers(0, max(rows // 20, 1), rows)
+
+    data = {
+        "캠페인 이름": [f"캠페인_{i:04d}" for i in campaign],
+        "광고 세트 이름": [f"광고세트_{i:05d}" for i in adset],
+        "광고 이름": [f"광고_{i:07d}" for i in range(rows)],
+        "광고 게재": status,
+        "지출 금액 (KRW)": spend,
+        "노출": impressions,
+        "도달": (impressions * rng.uniform(0.5, 0.95, rows)).astype(int),
+        "구매": purchases,
+        "구매 전환값": revenue,
+        "구매 ROAS(광고 지출 대비 수익률)": roas,
+        "CPC(전체) (KRW)": cpc,
+        "전환율(CVR)": cvr,
+        "CTR(전체)": ctr,
+        "클릭(전체)": clicks,
+        "동영상 재생": plays,
+        "동영상 3초 이상 재생": plays_3s,
+        "동영상 100% 재생": plays_100,
+        "보고 시작": REPORT_START,
+        "보고 종료": REPORT_END,
+    }
+    for i in range(extra_columns):
+        data[f"추가 지표 {i + 1}"] = rng.random(rows).round(4)
+    return pd.DataFrame(data)
+
+
+def write_export(df, path):
+    """생성한 데이터를 .xlsx 또는 .csv로 저장하는 함수 (xlsx는 write-only 모드로 빠르게 기록)"""
+    if path.lower().endswith(".csv"):
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+        return
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(list(df.columns))
+    for row in df.itertuples(index=False, name=None):
+        ws.append(row)
+    wb.save(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="가상 Meta 광고 데이터 생성기")
+    parser.add_argument("rows", type=int, help="행 수 (예: 1000 ~ 1000000)")
+    parser.add_argument("output", help="저장할 파일 (.xlsx 또는 .csv)")
+    parser.add_argument("--seed", type=int, default=0, help="난수 시드")
+    parser.add_argument("--zero-spend-ratio", type=float, default=0.15, help="광고비 0인 행 비율")
+    parser.add_argument("--active-ratio", type=float, default=0.6, help="ACTIVE 행 비율")
+    parser.add_argument("--extra-columns", type=int, default=0, help="변환에 쓰지 않는 추가 컬럼 수")
+    args = parser.parse_args()
+
+    if not args.output.lower().endswith((".xlsx", ".csv")):
+        print("출력 파일은 .xlsx 또는 .csv여야 합니다.")
+        sys.exit(1)
+
+    df = generate_export(args.rows, seed=args.seed, zero_spend_ratio=args.zero_spend_ratio,
+                         active_ratio=args.active_ratio, extra_columns=args.extra_columns)
+    write_export(df, args.output)
+    print(f"생성 완료: {args.output} ({len(df)}행, {len(df.columns)}열, {os.path.getsize(args.output):,} bytes)")
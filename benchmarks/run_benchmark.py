@@ -0,0 +1,213 @@
+"""
+변환기 벤치마크
+
+가상 Meta 광고 데이터(generate_export.py)로 변환기를 실행하고, 변환기가 conversion_metrics로
+기록한 단계별 시간과 메모리 증가량, 경우별 최대 메모리(RSS)와 출력 크기를 기록한다.
+결과를 JSON으로 저장해 두었다가 다음 실행 때 비교할 수 있다.
+
+단계:
+    auto  (auto_convert_excel.py, lylyl 프로필) - read, transform, style, write, save
+    basic (convert_excel.py, basic 프로필)      - read, transform, style, write, save
+--tracemalloc을 주면 메모리는 RSS 증가량 대신 파이썬 할당 최대치로 잡는다 (대신 느려짐).
+
+사용법:
+    python benchmarks/run_benchmark.py --rows 1000 10000 --save-baseline baseline.json
+    python benchmarks/run_benchmark.py --rows 1000 10000 --baseline baseline.json
+    python benchmarks/run_benchmark.py --input 실제파일.xlsx
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TARGETS = ("auto", "basic")
+
+
+def peak_rss_mb():
+    """현재 프로세스의 최대 메모리 사용량 (MB, 측정할 수 없으면 None)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 bytes, Linux는 KB 단위
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_auto(input_path, output_path):
+    import auto_convert_excel as converter
+    converter.convert_excel_file(input_path, output_path)
+
+
+def _run_basic(input_path, output_path):
+    import convert_excel
+    with contextlib.redirect_stdout(io.StringIO()):
+        ok = convert_excel.convert_excel_file(input_path, output_path)
+    if not ok:
+        raise RuntimeError(f"convert_excel.py 변환 실패: {input_path}")
+
+
+def run_case(target, input_path, repeat, trace_memory=False):
+    """
+    새 프로세스에서 한 경우를 repeat번 실행하는 함수 (최대 메모리가 다른 경우와 섞이지 않도록)
+
+    Returns:
+        {"stages": {단계: {"seconds": 최솟값, "rows", "memory_mb": 최댓값}}, "total_seconds",
+         "peak_rss_mb", "output_bytes", ...}
+    """
+    if trace_memory:
+        tracemalloc.start()
+    from conversion_metrics import collect_stages
+
+    runner = _run_auto if target == "auto" else _run_basic
+    with tempfile.TemporaryDirectory(prefix="lylyl_bench_") as tmp:
+        output_path = os.path.join(tmp, "output.xlsx")
+        best = {}
+        for _ in range(repeat):
+            with collect_stages() as records:
+                runner(input_path, output_path)
+            for record in records:
+                memory_mb = None if record.memory_bytes is None else record.memory_bytes / (1024 * 1024)
+                current = best.setdefault(record.stage, {"seconds": record.seconds, "rows": record.rows,
+                                                         "memory_mb": memory_mb})
+                current["seconds"] = min(current["seconds"], record.seconds)
+                if memory_mb is not None:
+                    current["memory_mb"] = max(current["memory_mb"] or 0, memory_mb)
+        output_bytes = os.path.getsize(output_path)
+
+    return {
+        "target": target,
+        "input_rows": best.get("read", {}).get("rows"),
+        "input_bytes": os.path.getsize(input_path),
+        "output_bytes": output_bytes,
+        "repeat": repeat,
+        "memory": "tracemalloc" if trace_memory else "rss",
+        "stages": best,
+        "total_seconds": sum(stage["seconds"] for stage in best.values()),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _run_isolated(target, input_path, repeat, trace_memory=False):
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+        return executor.submit(run_case, target, input_path, repeat, trace_memory).result()
+
+
+def _format_change(current, baseline):
+    if not baseline:
+        return ""
+    change = (current - baseline) / baseline * 100
+    return f"{change:+.1f}%"
+
+
+def print_report(results, baseline=None, threshold=None):
+    """
+    결과 표를 출력하고, 기준 결과가 있으면 단계별 변화율을 함께 출력하는 함수
+
+    Returns:
+        threshold(%)보다 느려진 (경우, 단계) 목록
+    """
+    regressions = []
+    baseline_results = (baseline or {}).get("results", {})
+    for case, result in results.items():
+        base = baseline_results.get(case)
+        rss = result["peak_rss_mb"]
+        print(f"\n[{case}] 입력 {result['input_bytes']:,} bytes → 출력 {result['output_bytes']:,} bytes"
+              + (f" ({_format_change(result['output_bytes'], base['output_bytes'])})" if base else "")
+              + (f", 최대 RSS {rss:.1f}MB" if rss is not None else ""))
+        print(f"  {'단계':<14} {'행':>8} {'시간(초)':>10} {'메모리(MB)':>12} {'기준 대비':>10}")
+        stages = dict(result["stages"])
+        stages["total"] = {"seconds": result["total_seconds"], "rows": None, "memory_mb": None}
+        for name, values in stages.items():
+            base_seconds = None
+            if base:
+                base_seconds = (base["total_seconds"] if name == "total"
+                                else base["stages"].get(name, {}).get("seconds"))
+            memory = values.get("memory_mb")
+            memory = f"{memory:.1f}" if memory is not None else "-"
+            rows = values.get("rows")
+            rows = f"{rows:,}" if rows is not None else "-"
+            print(f"  {name:<14} {rows:>8} {values['seconds']:>10.3f} {memory:>12}"
+                  f" {_format_change(values['seconds'], base_seconds):>10}")
+            if threshold is not None and base_seconds and \
+                    (values["seconds"] - base_seconds) / base_seconds * 100 > threshold:
+                regressions.append((case, name))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LYLYL 변환기 벤치마크")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000],
+                        help="생성할 가상 데이터 행 수 (여러 개 가능)")
+    parser.add_argument("--input", nargs="+", help="가상 데이터 대신 사용할 실제 파일")
+    parser.add_argument("--target", choices=TARGETS + ("all",), default="all",
+                        help="벤치마크할 변환기 (auto: auto_convert_excel.py, basic: convert_excel.py)")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (시간은 최솟값)")
+    parser.add_argument("--extra-columns", type=int, default=0, help="가상 데이터의 추가 컬럼 수")
+    parser.add_argument("--data-dir", help="가상 데이터를 저장/재사용할 디렉토리 (기본: 임시 디렉토리)")
+    parser.add_argument("--baseline", help="비교할 기준 결과 JSON")
+    parser.add_argument("--save-baseline", help="결과를 저장할 JSON 경로")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="메모리를 파이썬 할당 최대치로 측정 (정확하지만 느려짐)")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="기준보다 이 비율(%%) 이상 느려진 단계가 있으면 종료 코드 1")
+    args = parser.parse_args()
+
+    from generate_export import generate_export, write_export
+
+    targets = TARGETS if args.target == "all" else (args.target,)
+    with tempfile.TemporaryDirectory(prefix="lylyl_bench_data_") as tmp:
+        data_dir = args.data_dir or tmp
+        os.makedirs(data_dir, exist_ok=True)
+
+        inputs = {}
+        if args.input:
+            for path in args.input:
+                inputs[os.path.basename(path)] = path
+        else:
+            for rows in args.rows:
+                path = os.path.join(data_dir, f"synthetic_{rows}_{args.extra_columns}.xlsx")
+                if not os.path.exists(path):
+                    print(f"가상 데이터 생성 중: {rows}행")
+                    write_export(generate_export(rows, extra_columns=args.extra_columns), path)
+                inputs[f"{rows}rows"] = path
+
+        results = {}
+        for name, path in inputs.items():
+            for target in targets:
+                case = f"{target}:{name}"
+                print(f"실행 중: {case}")
+                results[case] = _run_isolated(target, path, args.repeat, args.tracemalloc)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    regressions = print_report(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        report = {
+            "environment": {"python": platform.python_version(), "platform": platform.platform()},
+            "results": results,
+        }
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.save_baseline}")
+
+    if regressions:
+        print("\n기준보다 느려진 단계:", ", ".join(f"{case} {stage}" for case, stage in regressions))
+        sys.exit(1)
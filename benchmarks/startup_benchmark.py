@@ -0,0 +1,172 @@
+"""
+시작 시간(콜드 스타트) 벤치마크
+
+매번 새 파이썬 프로세스를 띄워 CLI 도움말, 앱 import, 캐시 적중, 첫 변환까지 걸리는 시간과
+그 과정에서 불러온 무거운 모듈(pandas, numpy, openpyxl)을 기록한다.
+cron 배치 CLI와 짧게 사는 작업자는 매번 이 시간을 먼저 치르므로, 변환하지 않는 경로
+(--help, 캐시 적중)에서는 무거운 모듈이 보이지 않아야 한다.
+
+경우:
+    python        빈 인터프리터 (기준)
+    auto --help   auto_convert_excel.py --help
+    basic --help  convert_excel.py --help
+    import app    app.py import (Flask 포함, 변환기는 요청 처리 때 불러옴)
+    cache hit     디스크 변환 캐시에서 같은 업로드의 결과 찾기 (conversion_cache)
+    warm up       app.warm_up() - fork 전에 한 번 치르는 비용 (wsgi.py, LYLYL_PRELOAD=1)
+    first convert 200행 가상 데이터 첫 변환 (import 포함)
+
+사용법:
+    python benchmarks/startup_benchmark.py --repeat 5 --save-baseline startup.json
+    python benchmarks/startup_benchmark.py --baseline startup.json --threshold 20
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 시작 시간을 좌우하는 모듈
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "flask", "pyarrow", "python_calamine")
+
+# 실행 후 불러온 무거운 모듈을 마지막 줄에 JSON으로 출력
+_PROBE = f"""
+import json as _json, sys as _sys
+print(_json.dumps(sorted(name for name in {HEAVY_MODULES!r} if name in _sys.modules)))
+"""
+
+_RUN_SCRIPT = """
+import runpy, sys
+sys.argv = {argv!r}
+try:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+except SystemExit:
+    pass
+"""
+
+
+def _script(path, *args):
+    return _RUN_SCRIPT.format(argv=[os.path.join(ROOT, path), *args])
+
+
+def build_cases(input_path, cache_dir):
+    """경우 이름 → 새 프로세스에서 실행할 코드"""
+    return {
+        "python": "pass",
+        "auto --help": _script("auto_convert_excel.py", "--help"),
+        "basic --help": _script("convert_excel.py", "--help"),
+        "import app": "import app",
+        "cache hit": (
+            "from conversion_cache import ConversionCache\n"
+            f"cache = ConversionCache(directory={cache_dir!r})\n"
+            f"data = open({input_path!r}, 'rb').read()\n"
+            "assert cache.get(cache.key(data)) is not None, 'cache miss'\n"
+        ),
+        "warm up": "import app\napp.warm_up()",
+        "first convert": f"import auto_convert_excel\nauto_convert_excel.convert_export({input_path!r})",
+    }
+
+
+def prepare_cache(input_path, cache_dir):
+    """cache hit 경우를 위해 디스크 캐시에 변환 결과를 한 번 넣어 두는 함수"""
+    from conversion_cache import ConversionCache, convert_cached
+    with open(input_path, "rb") as f:
+        data = f.read()
+    convert_cached(ConversionCache(directory=cache_dir), data)
+
+
+def run_case(code, repeat):
+    """
+    코드를 새 프로세스에서 repeat번 실행하는 함수
+
+    Returns:
+        {"min_seconds", "median_seconds", "modules": 불러온 무거운 모듈 목록}
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    env.pop("LYLYL_PRELOAD", None)
+    times, modules = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, "-c", code + _PROBE], cwd=ROOT, env=env,
+                                   capture_output=True, text=True)
+        times.append(time.perf_counter() - start)
+        if completed.returncode != 0:
+            raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "실행 실패")
+        modules = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {"min_seconds": min(times), "median_seconds": statistics.median(times), "modules": modules}
+
+
+def print_report(results, baseline=None, threshold=None):
+    """
+    결과 표를 출력하는 함수 (기준 결과가 있으면 최솟값 기준 변화율 포함)
+
+    Returns:
+        threshold(%)보다 느려진 경우 목록
+    """
+    regressions = []
+    baseline_results = (baseline or {}).get("results", {})
+    print(f"\n{'경우':<14} {'최소(초)':>9} {'중앙값(초)':>10} {'기준 대비':>10}  불러온 모듈")
+    for case, result in results.items():
+        change = ""
+        base = baseline_results.get(case, {}).get("min_seconds")
+        if base:
+            percent = (result["min_seconds"] - base) / base * 100
+            change = f"{percent:+.1f}%"
+            if threshold is not None and percent > threshold:
+                regressions.append(case)
+        print(f"{case:<14} {result['min_seconds']:>9.3f} {result['median_seconds']:>10.3f} {change:>10}  "
+              f"{', '.join(result['modules']) or '-'}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LYLYL 시작 시간 벤치마크")
+    parser.add_argument("--repeat", type=int, default=5, help="경우별 반복 횟수 (최솟값과 중앙값 기록)")
+    parser.add_argument("--case", nargs="+", help="실행할 경우 이름 (기본: 전체)")
+    parser.add_argument("--baseline", help="비교할 기준 결과 JSON")
+    parser.add_argument("--save-baseline", help="결과를 저장할 JSON 경로")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="기준보다 이 비율(%%) 이상 느려진 경우가 있으면 종료 코드 1")
+    args = parser.parse_args()
+
+    from generate_export import generate_export, write_export
+
+    with tempfile.TemporaryDirectory(prefix="lylyl_startup_") as tmp:
+        input_path = os.path.join(tmp, "synthetic_200.xlsx")
+        cache_dir = os.path.join(tmp, "cache")
+        write_export(generate_export(200), input_path)
+        prepare_cache(input_path, cache_dir)
+
+        cases = build_cases(input_path, cache_dir)
+        results = {}
+        for case, code in cases.items():
+            if args.case and case not in args.case:
+                continue
+            print(f"실행 중: {case}")
+            results[case] = run_case(code, args.repeat)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    regressions = print_report(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        report = {
+            "environment": {"python": platform.python_version(), "platform": platform.platform()},
+            "results": results,
+        }
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.save_baseline}")
+
+    if regressions:
+        print("\n기준보다 느려진 경우:", ", ".join(regressions))
+        sys.exit(1)
@@ -0,0 +1,376 @@
+"""
+주간 광고 데이터 누적 (여러 주 추세 워크북)
+
+매주 내보낸 Meta 광고 데이터를 변환해 SQLite 마스터 저장소에
+(광고 이름, 보고 시작, 보고 종료) 키로 upsert하고 (여러 주가 담긴 내보내기는 행마다 자기 주로), 추세 워크북에서는 바뀐 주의 시트만 다시 만든다.
+  - 같은 파일을 다시 넣으면 (내용 해시가 같으면) 건너뛴다.
+  - 같은 주의 내보내기를 다시 넣으면 바뀐 행만 갱신하고, 없어진 행은 지운다.
+  - 워크북의 요약/추세 시트는 저장소에서 집계해 매번 다시 만들고,
+    주별 상세 시트는 바뀐 주만 다시 만든다 (나머지 시트는 기존 워크북에서 그대로 유지).
+매주 원본 파일 전체를 다시 읽어 합치지 않으므로, 한 번 실행하는 비용은 새 내보내기 크기에 비례한다.
+
+같은 주에 광고 이름이 같은 행이 여러 개면 변환 결과 순서(상태, 광고비 순)대로 순번을 붙여 구분한다.
+
+사용법:
+    python consolidate.py LYLYL광고2025.4.14.2025.4.20.xlsx
+    python consolidate.py 지난주.xlsx 이번주.csv --store lylyl_master.sqlite --workbook LYLYL_추세.xlsx
+    python consolidate.py --rebuild    (저장소에서 추세 워크북 전체를 다시 만듦)
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import NamedTuple
+
+import auto_convert_excel as converter
+
+# numpy/pandas/openpyxl은 실제로 저장소를 갱신하거나 워크북을 만들 때 불러온다 (CLI 도움말은 이 모듈 없이 동작)
+
+DEFAULT_STORE = "lylyl_master.sqlite"
+DEFAULT_WORKBOOK = "LYLYL_추세.xlsx"
+
+# 저장소에 행마다 저장하는 값 (보고 시작/종료는 주 키로 저장)
+VALUE_COLUMNS = [col for col in converter.OUTPUT_COLUMNS if col not in ("보고 시작", "보고 종료", "제목")]
+
+SUMMARY_SHEET = "주간 요약"
+TREND_SHEETS = {"추세_광고비": "광고비", "추세_ROAS": "ROAS"}
+
+SUMMARY_COLUMNS = ["보고 시작", "보고 종료", "광고 수", "광고비", "매출", "ROAS", "구매", "클릭", "평균객단가"]
+SUMMARY_FORMATS = dict(converter.NUMBER_FORMATS, ROAS="0.00", **{"광고 수": "#,##0"})
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class UpsertResult(NamedTuple):
+    """내보내기 하나를 저장소에 반영한 결과"""
+    week: tuple
+    inserted: int
+    updated: int
+    unchanged: int
+    removed: int
+    skipped: bool = False
+
+    @property
+    def changed(self):
+        return bool(self.inserted or self.updated or self.removed)
+
+
+def week_label(week):
+    """주 키 (보고 시작, 보고 종료 ISO 날짜)를 시트 이름으로 쓰는 YYMMDD-YYMMDD로 바꾸는 함수"""
+    import pandas as pd
+    start, end = (pd.Timestamp(day).strftime("%y%m%d") for day in week)
+    return f"{start}-{end}"
+
+
+def _iso_dates(values):
+    import pandas as pd
+    dates = pd.to_datetime(values)
+    if dates.isna().any():
+        raise ValueError("보고 시작/보고 종료가 비어 있는 행이 있습니다.")
+    return dates.dt.strftime("%Y-%m-%d")
+
+
+class MasterStore:
+    """
+    주간 변환 결과를 누적하는 SQLite 저장소
+
+    ads: 주(week_start, week_end), 제목, 순번을 키로 변환된 지표와 행 해시를 저장
+    weeks: 주별 원본 파일 해시, 행 수, 워크북에 다시 그려야 하는지(dirty)
+    """
+
+    def __init__(self, path=DEFAULT_STORE):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        value_columns = ", ".join(f"{_quote(col)} {'TEXT' if col == '상태' else 'REAL'}" for col in VALUE_COLUMNS)
+        with self._conn:
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS ads (
+                    week_start TEXT NOT NULL,
+                    week_end TEXT NOT NULL,
+                    "제목" TEXT NOT NULL,
+                    "순번" INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    row_hash INTEGER NOT NULL,
+                    {value_columns},
+                    PRIMARY KEY (week_start, week_end, "제목", "순번")
+                )""")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS weeks (
+                    week_start TEXT NOT NULL,
+                    week_end TEXT NOT NULL,
+                    source_hash TEXT,
+                    row_count INTEGER NOT NULL,
+                    updated_at REAL NOT NULL,
+                    dirty INTEGER NOT NULL,
+                    PRIMARY KEY (week_start, week_end)
+                )""")
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def upsert_export(self, source, force=False):
+        """
+        Meta 내보내기 파일 하나를 변환해 저장소에 반영하는 함수
+
+        행마다 자기 보고 시작/보고 종료 주에 넣는다 (여러 주가 담긴 내보내기는 주마다 따로 반영).
+
+        Args:
+            source: 파일 경로 또는 bytes (.xlsx, .xls, .csv)
+            force: True이면 같은 파일을 이미 넣었어도 다시 비교해 반영
+
+        Returns:
+            주별 UpsertResult 목록 (오래된 주부터)
+        """
+        if isinstance(source, (bytes, bytearray)):
+            data, filename = bytes(source), None
+        else:
+            with open(source, "rb") as f:
+                data = f.read()
+            filename = os.fspath(source)
+        source_hash = hashlib.sha256(data).hexdigest()
+
+        df = converter.read_export(data, filename=filename)
+        # 내보내기에 있는 주 (광고비 0 행만 있는 주도 포함: 그 주는 저장된 행을 지움)
+        weeks = sorted(set(zip(_iso_dates(df["보고 시작"]), _iso_dates(df["보고 종료"]))))
+        converted = converter.transform_export(df)
+        by_week = converted.groupby([_iso_dates(converted["보고 시작"]), _iso_dates(converted["보고 종료"])],
+                                    sort=False)
+        week_frames = {week: frame for week, frame in by_week}
+
+        results = []
+        for week in weeks:
+            row = self._conn.execute("SELECT source_hash, row_count FROM weeks WHERE week_start = ? AND week_end = ?",
+                                     week).fetchone()
+            if row is not None and row[0] == source_hash and not force:
+                results.append(UpsertResult(week, 0, 0, row[1], 0, skipped=True))
+                continue
+            results.append(self.upsert_week(week, week_frames.get(week, converted.iloc[:0]), source_hash))
+        return results
+
+    def upsert_week(self, week, converted, source_hash=None):
+        """
+        변환된 한 주 데이터(transform_export 결과)를 저장소에 upsert하는 함수
+
+        새 행과 값이 바뀐 행만 쓰고, 이번 데이터에 없는 행은 지운다.
+        하나라도 바뀌면 그 주를 워크북에 다시 그릴 주(dirty)로 표시한다.
+        """
+        import numpy as np
+        import pandas as pd
+        converted = converted.reset_index(drop=True)
+        titles = converted["제목"].astype(str)
+        occurrences = converted.groupby(titles, sort=False).cumcount().to_numpy()
+        hashes = pd.util.hash_pandas_object(converted[["제목"] + VALUE_COLUMNS], index=False)
+        hashes = hashes.to_numpy().astype(np.int64)
+
+        existing = {
+            (title, occurrence): (row_hash, position)
+            for title, occurrence, row_hash, position in self._conn.execute(
+                'SELECT "제목", "순번", row_hash, position FROM ads WHERE week_start = ? AND week_end = ?', week)
+        }
+
+        values = converted[VALUE_COLUMNS].astype(object).where(converted[VALUE_COLUMNS].notna(), None)
+        records = []
+        inserted = updated = 0
+        seen = set()
+        for position, (title, occurrence, row_hash, row_values) in enumerate(
+                zip(titles, occurrences, hashes, values.itertuples(index=False, name=None))):
+            key = (title, int(occurrence))
+            seen.add(key)
+            previous = existing.get(key)
+            if previous is None:
+                inserted += 1
+            elif previous[0] != row_hash:
+                updated += 1
+            elif previous[1] == position:
+                continue
+            records.append((*week, title, int(occurrence), position, int(row_hash), *row_values))
+        removed = [key for key in existing if key not in seen]
+
+        columns = ["week_start", "week_end", "제목", "순번", "position", "row_hash"] + VALUE_COLUMNS
+        updates = ", ".join(f"{_quote(col)} = excluded.{_quote(col)}" for col in columns[4:])
+        changed = bool(inserted or updated or removed)
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT INTO ads ({', '.join(_quote(col) for col in columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))}) "
+                f'ON CONFLICT (week_start, week_end, "제목", "순번") DO UPDATE SET {updates}',
+                records)
+            self._conn.executemany(
+                'DELETE FROM ads WHERE week_start = ? AND week_end = ? AND "제목" = ? AND "순번" = ?',
+                [(*week, *key) for key in removed])
+            self._conn.execute(
+                "INSERT INTO weeks (week_start, week_end, source_hash, row_count, updated_at, dirty) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (week_start, week_end) DO UPDATE SET source_hash = excluded.source_hash, "
+                "row_count = excluded.row_count, updated_at = excluded.updated_at, "
+                "dirty = MAX(weeks.dirty, excluded.dirty)",
+                (*week, source_hash, len(converted), time.time(), int(changed)))
+
+        unchanged = len(converted) - inserted - updated
+        return UpsertResult(week, inserted, updated, unchanged, len(removed))
+
+    def weeks(self):
+        """저장된 주 목록 (오래된 주부터)"""
+        return [tuple(row) for row in self._conn.execute(
+            "SELECT week_start, week_end FROM weeks ORDER BY week_start, week_end")]
+
+    def dirty_weeks(self):
+        """마지막으로 워크북을 만든 뒤 바뀐 주 목록"""
+        return [tuple(row) for row in self._conn.execute(
+            "SELECT week_start, week_end FROM weeks WHERE dirty = 1 ORDER BY week_start, week_end")]
+
+    def mark_rendered(self, weeks):
+        with self._conn:
+            self._conn.executemany("UPDATE weeks SET dirty = 0 WHERE week_start = ? AND week_end = ?", weeks)
+
+    def week_frame(self, week):
+        """한 주의 변환 결과를 출력 컬럼 순서(OUTPUT_COLUMNS)의 데이터프레임으로 읽는 함수"""
+        import pandas as pd
+        df = pd.read_sql_query(
+            f'SELECT "제목", {", ".join(_quote(col) for col in VALUE_COLUMNS)} FROM ads '
+            "WHERE week_start = ? AND week_end = ? ORDER BY position",
+            self._conn, params=week)
+        df["보고 시작"], df["보고 종료"] = week
+        return df[converter.OUTPUT_COLUMNS]
+
+    def weekly_summary(self):
+        """주별 합계 (광고 수, 광고비, 매출, 구매, 클릭과 합계로 다시 계산한 ROAS, 평균객단가)"""
+        import pandas as pd
+        df = pd.read_sql_query(
+            'SELECT week_start AS "보고 시작", week_end AS "보고 종료", COUNT(*) AS "광고 수", '
+            'SUM("광고비") AS "광고비", SUM("매출") AS "매출", SUM("구매") AS "구매", SUM("클릭") AS "클릭" '
+            "FROM ads GROUP BY week_start, week_end ORDER BY week_start, week_end",
+            self._conn)
+        df["ROAS"] = (df["매출"] / df["광고비"].where(df["광고비"] > 0)).round(2)
+        df["평균객단가"] = (df["매출"] / df["구매"].where(df["구매"] > 0)).round()
+        return df[SUMMARY_COLUMNS]
+
+    def trend(self, metric):
+        """
+        광고별 주간 추세표 (행: 제목, 열: 주)
+
+        metric이 ROAS이면 주별 매출 합계 / 광고비 합계, 그 외는 합계. 전체 광고비가 큰 광고부터.
+        """
+        import pandas as pd
+        df = pd.read_sql_query(
+            'SELECT "제목", week_start, week_end, SUM("광고비") AS "광고비", SUM("매출") AS "매출" '
+            'FROM ads GROUP BY "제목", week_start, week_end',
+            self._conn)
+        if df.empty:
+            return pd.DataFrame(columns=["제목"])
+        if metric == "ROAS":
+            df["ROAS"] = (df["매출"] / df["광고비"].where(df["광고비"] > 0)).round(2)
+        df["주"] = [week_label(week) for week in zip(df["week_start"], df["week_end"])]
+        table = df.pivot(index="제목", columns="주", values=metric)
+        order = df.groupby("제목")["광고비"].sum().sort_values(ascending=False, kind="stable").index
+        return table.loc[order, sorted(table.columns)].reset_index()
+
+
+def update_trend_workbook(store, path=DEFAULT_WORKBOOK, rebuild=False):
+    """
+    저장소 내용으로 추세 워크북을 갱신하는 함수
+
+    워크북이 이미 있으면 불러와서 요약/추세 시트와 바뀐 주의 상세 시트만 다시 만들고,
+    없거나 rebuild=True이면 모든 시트를 새로 만든다. 임시 파일에 저장한 뒤 바꿔치기한다.
+
+    Returns:
+        다시 만든 주 상세 시트 수
+    """
+    from openpyxl import Workbook, load_workbook
+    weeks = store.weeks()
+    if rebuild or not os.path.exists(path):
+        wb = Workbook()
+        wb.remove(wb.active)
+        dirty = list(weeks)
+    else:
+        wb = load_workbook(path)
+        dirty = [week for week in store.dirty_weeks()] + \
+                [week for week in weeks if week_label(week) not in wb.sheetnames]
+
+    # 요약/추세 시트는 저장소에서 집계해 다시 만듦 (주 수 × 광고 수 크기)
+    for title in [SUMMARY_SHEET, *TREND_SHEETS]:
+        if title in wb.sheetnames:
+            wb.remove(wb[title])
+    converter.write_table_sheet(wb.create_sheet(SUMMARY_SHEET), store.weekly_summary(), SUMMARY_FORMATS,
+                                first_width=10, width=12)
+    for title, metric in TREND_SHEETS.items():
+        trend = store.trend(metric)
+        converter.write_table_sheet(wb.create_sheet(title), trend,
+                                    {col: SUMMARY_FORMATS[metric] for col in trend.columns[1:]}, width=14)
+
+    # 바뀐 주의 상세 시트만 다시 만듦
+    for week in dict.fromkeys(dirty):
+        title = week_label(week)
+        if title in wb.sheetnames:
+            wb.remove(wb[title])
+        df = store.week_frame(week)
+        converter.write_styled_sheet(wb.create_sheet(title), converter.OUTPUT_COLUMNS, converter.iter_tier_rows(df))
+
+    # 시트 순서: 요약, 추세, 주별 상세 (오래된 주부터)
+    order = [SUMMARY_SHEET, *TREND_SHEETS] + [week_label(week) for week in weeks]
+    for index, title in enumerate(order):
+        wb.move_sheet(title, offset=index - wb.sheetnames.index(title))
+    wb.active = 0
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".lylyl_", suffix=".xlsx", dir=directory)
+    os.close(fd)
+    try:
+        wb.save(tmp_path)
+        # mkstemp 권한(0600) 대신 새로 만든 파일과 같은 권한으로
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    store.mark_rendered(dirty)
+    return len(set(dirty))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LYLYL 주간 광고 데이터 누적")
+    parser.add_argument("exports", nargs="*", help="추가할 주간 내보내기 파일 (.xlsx/.xls/.csv)")
+    parser.add_argument("--store", default=DEFAULT_STORE, help=f"마스터 저장소 SQLite 파일 (기본값: {DEFAULT_STORE})")
+    parser.add_argument("--workbook", default=DEFAULT_WORKBOOK, help=f"추세 워크북 (기본값: {DEFAULT_WORKBOOK})")
+    parser.add_argument("--force", action="store_true", help="이미 넣은 파일도 다시 비교해 반영")
+    parser.add_argument("--rebuild", action="store_true", help="추세 워크북의 모든 시트를 다시 만듦")
+    args = parser.parse_args()
+
+    with MasterStore(args.store) as store:
+        failed = False
+        for path in args.exports:
+            try:
+                results = store.upsert_export(path, force=args.force)
+            except Exception as e:
+                print(f"❌ 실패: {os.path.basename(path)} - {e}")
+                failed = True
+                continue
+            for result in results:
+                if result.skipped:
+                    print(f"건너뜀: {os.path.basename(path)} ({week_label(result.week)}, 이미 반영된 파일)")
+                else:
+                    print(f"✅ {os.path.basename(path)} ({week_label(result.week)}): 추가 {result.inserted}, "
+                          f"변경 {result.updated}, 유지 {result.unchanged}, 삭제 {result.removed}")
+
+        if not store.weeks():
+            print("저장된 데이터가 없습니다. 주간 내보내기 파일을 지정해주세요.")
+            sys.exit(1)
+        if args.rebuild or store.dirty_weeks() or not os.path.exists(args.workbook):
+            rendered = update_trend_workbook(store, args.workbook, rebuild=args.rebuild)
+            print(f"추세 워크북 갱신: {args.workbook} (주별 시트 {rendered}개 다시 만듦)")
+        else:
+            print(f"바뀐 내용이 없어 추세 워크북을 그대로 둡니다: {args.workbook}")
+        sys.exit(1 if failed else 0)
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import NamedTuple
+
+from auto_convert_excel import ConversionResult, config_fingerprint, convert_export
+
+# 기본 캐시 한도
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256MB
+
+# 파일 객체를 해시할 때 한 번에 읽는 크기
+_DIGEST_BLOCK = 1024 * 1024
+
+
+def upload_digest(source):
+    """
+    업로드 내용의 SHA-256 (bytes 또는 파일 객체)
+
+    파일 객체는 전체를 메모리에 올리지 않고 나눠 읽어 해시한 뒤 처음 위치로 되돌린다.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    source.seek(0)
+    for block in iter(lambda: source.read(_DIGEST_BLOCK), b""):
+        digest.update(block)
+    source.seek(0)
+    return digest.hexdigest()
+
+
+class CachedConversion(NamedTuple):
+    """캐시에 저장된 변환 결과"""
+    data: bytes
+    start_date: str
+    end_date: str
+
+
+class ConversionCache:
+    """
+    업로드 내용(SHA-256)과 변환 규칙 해시를 키로 하는 변환 결과 LRU 캐시
+
+    directory를 지정하면 로컬 디스크에, 아니면 메모리에 저장한다.
+    항목 수(max_entries)나 전체 크기(max_bytes)를 넘으면 가장 오래 쓰지 않은 항목부터 지운다.
+    디스크 캐시는 디렉토리가 곧 목록이라, 같은 디렉토리를 쓰는 여러 프로세스(gunicorn 작업자 등)가
+    서로 저장한 결과를 함께 쓰고 한도도 디렉토리 전체 기준으로 지킨다 (사용 순서는 파일 수정 시각).
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, directory=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._lock = threading.Lock()
+        # 메모리 캐시: 키 → 크기 (앞쪽이 가장 오래 쓰지 않은 항목)
+        self._sizes = OrderedDict()
+        self._memory = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, prefix="LYLYL_CACHE"):
+        """
+        환경 변수로 캐시를 만드는 함수
+
+        - {prefix}_MAX_ENTRIES: 최대 항목 수 (0이면 캐시 사용 안 함)
+        - {prefix}_MAX_MB: 최대 전체 크기 (MB)
+        - {prefix}_DIR: 디스크 캐시 디렉토리 (없으면 메모리)
+        """
+        max_entries = int(os.environ.get(f"{prefix}_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+        max_mb = float(os.environ.get(f"{prefix}_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024)))
+        directory = os.environ.get(f"{prefix}_DIR") or None
+        return cls(max_entries=max_entries, max_bytes=int(max_mb * 1024 * 1024), directory=directory)
+
+    @staticmethod
+    def key(data, **options):
+        """
+        업로드 내용, 변환 규칙, 변환 옵션으로 캐시 키를 만드는 함수
+
+        변환 규칙은 options["profile"] 프로필의 내용으로 정해지므로 프로필 파일을 고치면 키가 바뀐다.
+        """
+        digest = upload_digest(data)
+        option_text = json.dumps(options, sort_keys=True, default=str)
+        fingerprint = config_fingerprint(options.get("profile"))
+        config = hashlib.sha256(f"{fingerprint}:{option_text}".encode("utf-8")).hexdigest()
+        return f"{digest}-{config[:16]}"
+
+    @property
+    def total_bytes(self):
+        return sum(size for _, size in self._entries())
+
+    def __len__(self):
+        return len(self._entries())
+
+    def get(self, key):
+        """캐시된 결과를 돌려주고 가장 최근에 쓴 항목으로 표시 (없으면 None)"""
+        with self._lock:
+            if not self.directory:
+                if key not in self._memory:
+                    return None
+                self._sizes.move_to_end(key)
+                return self._memory[key]
+            # 다른 프로세스가 저장한 항목도 파일이 있으면 그대로 사용
+            try:
+                with open(self._data_path(key), "rb") as f:
+                    data = f.read()
+                with open(self._meta_path(key), encoding="utf-8") as f:
+                    meta = json.load(f)
+                os.utime(self._data_path(key))
+            except FileNotFoundError:
+                # 없는 항목 (다른 프로세스가 지웠거나 아직 쓰는 중)
+                return None
+            except (OSError, ValueError):
+                # 깨진 항목
+                self._remove(key)
+                return None
+            return CachedConversion(data, meta["start_date"], meta["end_date"])
+
+    def put(self, key, data, start_date, end_date):
+        """변환 결과를 저장하고 한도를 넘으면 오래된 항목을 지움"""
+        if self.max_entries <= 0 or len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if self.directory:
+                self._write_file(self._data_path(key), data)
+                meta = json.dumps({"start_date": start_date, "end_date": end_date})
+                self._write_file(self._meta_path(key), meta.encode("utf-8"))
+            else:
+                self._memory[key] = CachedConversion(data, start_date, end_date)
+                self._sizes[key] = len(data)
+                self._sizes.move_to_end(key)
+            entries = self._entries()
+            count, total = len(entries), sum(size for _, size in entries)
+            for old_key, size in entries:
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                self._remove(old_key)
+                count, total = count - 1, total - size
+
+    def clear(self):
+        with self._lock:
+            for key, _ in self._entries():
+                self._remove(key)
+
+    def _remove(self, key):
+        self._sizes.pop(key, None)
+        self._memory.pop(key, None)
+        if self.directory:
+            for path in (self._data_path(key), self._meta_path(key)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _data_path(self, key):
+        return os.path.join(self.directory, f"{key}.bin")
+
+    def _meta_path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    @staticmethod
+    def _write_file(path, data):
+        # 임시 파일에 쓴 뒤 이름을 바꿔서 읽는 쪽이 반쯤 쓴 파일을 보지 않도록 함
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _entries(self):
+        # (키, 크기) 목록, 앞쪽이 가장 오래 쓰지 않은 항목
+        if not self.directory:
+            return list(self._sizes.items())
+        # 디스크 캐시는 매번 디렉토리를 훑어 다른 프로세스가 저장하거나 지운 항목까지 반영
+        # (사용할 때마다 get이 수정 시각을 갱신하므로 수정 시각 순이 LRU 순서)
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".bin"):
+                continue
+            key = name[:-len(".bin")]
+            try:
+                stat = os.stat(self._data_path(key))
+            except OSError:
+                continue
+            if not os.path.exists(self._meta_path(key)):
+                continue
+            entries.append((stat.st_mtime, key, stat.st_size))
+        return [(key, size) for _, key, size in sorted(entries)]
+
+
+def convert_cached(cache, data, chunk_size=None, filename=None, **options):
+    """
+    캐시를 거쳐 업로드(bytes 또는 파일 객체)를 변환하는 함수
+
+    같은 내용과 옵션으로 이미 변환한 적이 있으면 변환 없이 저장된 결과를 돌려준다.
+
+    Args:
+        cache: ConversionCache (None이면 캐시 없이 변환)
+        data: 업로드된 파일 내용 (bytes) 또는 처음부터 다시 읽을 수 있는 파일 객체
+        chunk_size: 지정하면 나눠 읽는 스트리밍 변환 (결과가 같으므로 캐시 키에는 넣지 않음)
+        filename: 업로드 파일 이름 (엑셀 형식 확인용, 캐시 키에는 넣지 않음)
+        options: convert_export 옵션 (conditional_formatting, output_format, profile)
+
+    Returns:
+        ConversionResult (output은 BytesIO)
+    """
+    if cache is None:
+        return convert_export(data, chunk_size=chunk_size, filename=filename, **options)
+
+    key = cache.key(data, **options)
+    cached = cache.get(key)
+    if cached is not None:
+        return ConversionResult(BytesIO(cached.data), cached.start_date, cached.end_date)
+
+    result = convert_export(data, chunk_size=chunk_size, filename=filename, **options)
+    cache.put(key, result.output.getvalue(), result.start_date, result.end_date)
+    return result
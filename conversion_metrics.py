@@ -0,0 +1,280 @@
+"""
+변환 단계별 계측
+
+변환기는 단계(read, transform, style, write, save ...)마다 stage()로 감싸서
+소요 시간, 처리한 행 수, 메모리 증가량을 기록한다. 기록은 다음 세 곳으로 나간다.
+  - 훅: add_stage_hook(콜백)으로 등록한 함수에 StageRecord 전달
+  - 구조화 로그: "lylyl.metrics" 로거에 JSON 한 줄 (INFO, enable_stage_log() 또는 LYLYL_STAGE_LOG=1)
+  - METRICS: 프로세스 안에서 누적하는 Prometheus 형식 지표 (app.py의 /metrics)
+    LYLYL_METRICS_DIR을 지정하면 프로세스마다 누적값을 그 디렉토리에 쓰고 /metrics는 모두 합쳐 보여준다
+    (gunicorn 워커 여럿이 같은 지표를 내도록, gunicorn.conf.py 참고)
+
+메모리는 tracemalloc이 켜져 있으면 (python -X tracemalloc 또는 PYTHONTRACEMALLOC=1)
+단계 중 파이썬 할당 최대치, 아니면 단계 중 최대 RSS 증가량이다.
+RSS 증가량은 프로세스 최대치를 넘어선 만큼만 잡히므로 같은 크기의 변환을 반복하면 0에 가깝다.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger("lylyl.metrics")
+
+# 단계 소요 시간 히스토그램 구간 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class StageRecord(NamedTuple):
+    """변환 단계 하나의 측정값"""
+    converter: str
+    stage: str
+    seconds: float
+    rows: Optional[int]
+    memory_bytes: Optional[int]
+
+
+class _Stage:
+    # with 블록 안에서 처리한 행 수를 채울 수 있도록 넘겨주는 객체
+    def __init__(self, rows):
+        self.rows = rows
+
+
+_hooks = []
+_hooks_lock = threading.Lock()
+
+
+def add_stage_hook(hook):
+    """단계가 끝날 때마다 hook(StageRecord)를 호출하도록 등록하는 함수"""
+    with _hooks_lock:
+        _hooks.append(hook)
+    return hook
+
+
+def remove_stage_hook(hook):
+    with _hooks_lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+def _peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 bytes, Linux는 KB 단위
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@contextmanager
+def stage(name, converter, rows=None):
+    """
+    변환 단계 하나를 측정하는 컨텍스트 매니저
+
+    예외로 끝난 단계는 기록하지 않는다.
+
+    Args:
+        name: 단계 이름 (read, transform, style, write, save ...)
+        converter: 변환기 이름 (변환 프로필 이름 - lylyl, basic 등 - 또는 streaming)
+        rows: 처리한 행 수 (블록 안에서 s.rows = ... 로 나중에 채워도 됨)
+    """
+    current = _Stage(rows)
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        memory_before = tracemalloc.get_traced_memory()[0]
+    else:
+        memory_before = _peak_rss_bytes()
+    start = time.perf_counter()
+
+    yield current
+
+    seconds = time.perf_counter() - start
+    if tracing:
+        memory = max(tracemalloc.get_traced_memory()[1] - memory_before, 0)
+    elif memory_before is not None:
+        memory = _peak_rss_bytes() - memory_before
+    else:
+        memory = None
+    record = StageRecord(converter, name, seconds, current.rows, memory)
+    logger.info(json.dumps({"event": "conversion_stage", **record._asdict()}, ensure_ascii=False))
+    dispatch(record)
+
+
+def dispatch(record):
+    """
+    등록된 훅에 단계 기록을 전달하는 함수
+
+    작업 프로세스에서 받은 기록을 현재 프로세스의 훅과 METRICS에 반영할 때도 쓴다.
+    훅에서 난 오류는 로그만 남기고 변환은 계속한다.
+    """
+    with _hooks_lock:
+        hooks = list(_hooks)
+    for hook in hooks:
+        try:
+            hook(record)
+        except Exception:
+            logger.exception("단계 훅 실행 중 오류: %r", hook)
+
+
+@contextmanager
+def collect_stages():
+    """
+    블록 안에서 끝난 단계 기록을 목록으로 모으는 컨텍스트 매니저
+
+    훅은 프로세스 전체에 등록되므로, 여러 스레드가 동시에 변환하면 다른 변환의 기록도 섞인다.
+    """
+    records = []
+    add_stage_hook(records.append)
+    try:
+        yield records
+    finally:
+        remove_stage_hook(records.append)
+
+
+class _JsonMessageFormatter(logging.Formatter):
+    def format(self, record):
+        return record.getMessage()
+
+
+def enable_stage_log(stream=None):
+    """단계 기록을 stream(기본 stderr)에 JSON 한 줄씩 출력하도록 설정하는 함수"""
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(_JsonMessageFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return handler
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_float(value):
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class StageMetrics:
+    """
+    단계 기록을 (변환기, 단계)별로 누적해 Prometheus 텍스트 형식으로 내보내는 집계기
+
+    소요 시간은 히스토그램이므로 Prometheus에서
+    histogram_quantile(0.95, rate(lylyl_stage_duration_seconds_bucket[5m]))로 p50/p95를 구한다.
+    값은 프로세스마다 따로 쌓인다 (작업 프로세스의 기록은 job_queue가 dispatch로 넘겨받음).
+    directory를 지정하면 기록할 때마다 이 프로세스의 누적값을 {directory}/{pid}.json에 쓰고,
+    render()는 디렉토리의 모든 프로세스 값을 합친다 (끝난 프로세스의 값도 남겨 카운터가 줄지 않음).
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, directory=None):
+        self.buckets = tuple(sorted(buckets))
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._series = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def observe(self, record):
+        key = (record.converter, record.stage)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "buckets": [0] * len(self.buckets), "count": 0, "seconds": 0.0,
+                    "rows": 0, "memory": 0, "memory_max": 0,
+                }
+            for i, bound in enumerate(self.buckets):
+                if record.seconds <= bound:
+                    series["buckets"][i] += 1
+            series["count"] += 1
+            series["seconds"] += record.seconds
+            series["rows"] += record.rows or 0
+            if record.memory_bytes is not None:
+                series["memory"] += record.memory_bytes
+                series["memory_max"] = max(series["memory_max"], record.memory_bytes)
+            if self.directory:
+                self._write_snapshot()
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+            if self.directory:
+                self._write_snapshot()
+
+    def _write_snapshot(self):
+        # 잠금 안에서 호출: 임시 파일에 쓴 뒤 이름을 바꿔 읽는 쪽이 반쯤 쓴 파일을 보지 않도록 함
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([[converter, name, values] for (converter, name), values in self._series.items()], f)
+        os.replace(tmp_path, path)
+
+    def _merged_series(self):
+        # 디렉토리의 모든 프로세스 누적값 합계 (이 프로세스 값도 파일에 있음)
+        merged = {}
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for converter, stage_name, values in snapshot:
+                series = merged.get((converter, stage_name))
+                if series is None:
+                    merged[(converter, stage_name)] = dict(values, buckets=list(values["buckets"]))
+                    continue
+                series["buckets"] = [a + b for a, b in zip(series["buckets"], values["buckets"])]
+                for field in ("count", "seconds", "rows", "memory"):
+                    series[field] += values[field]
+                series["memory_max"] = max(series["memory_max"], values["memory_max"])
+        return merged
+
+    def render(self):
+        """Prometheus 텍스트 노출 형식 (text/plain; version=0.0.4) 문자열"""
+        if self.directory:
+            series = self._merged_series()
+        else:
+            with self._lock:
+                series = {key: dict(value, buckets=list(value["buckets"])) for key, value in self._series.items()}
+
+        lines = [
+            "# HELP lylyl_stage_duration_seconds 변환 단계별 소요 시간",
+            "# TYPE lylyl_stage_duration_seconds histogram",
+        ]
+        for (converter, name), values in sorted(series.items()):
+            labels = f'converter="{_escape_label(converter)}",stage="{_escape_label(name)}"'
+            for bound, count in zip(self.buckets, values["buckets"]):
+                lines.append(f'lylyl_stage_duration_seconds_bucket{{{labels},le="{_format_float(bound)}"}} {count}')
+            lines.append(f'lylyl_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {values["count"]}')
+            lines.append(f"lylyl_stage_duration_seconds_sum{{{labels}}} {_format_float(values['seconds'])}")
+            lines.append(f"lylyl_stage_duration_seconds_count{{{labels}}} {values['count']}")
+
+        for metric, kind, help_text, field in (
+            ("lylyl_stage_rows_total", "counter", "변환 단계별 처리한 행 수", "rows"),
+            ("lylyl_stage_memory_bytes_total", "counter", "변환 단계별 메모리 증가량 합계", "memory"),
+            ("lylyl_stage_memory_peak_bytes", "gauge", "변환 단계별 메모리 증가량 최댓값", "memory_max"),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for (converter, name), values in sorted(series.items()):
+                labels = f'converter="{_escape_label(converter)}",stage="{_escape_label(name)}"'
+                lines.append(f"{metric}{{{labels}}} {values[field]}")
+        return "\n".join(lines) + "\n"
+
+
+# 프로세스 전체 집계 (모든 단계 기록을 받음)
+METRICS = StageMetrics(directory=os.environ.get("LYLYL_METRICS_DIR") or None)
+add_stage_hook(METRICS.observe)
+
+if os.environ.get("LYLYL_STAGE_LOG") == "1":
+    enable_stage_log()
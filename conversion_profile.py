@@ -0,0 +1,493 @@
+"""
+변환 프로필
+
+컬럼 매핑, 파생 지표, 보정 규칙, 정렬, 출력 컬럼, 숫자 형식, 색상 기준을 JSON(또는 YAML) 파일로
+선언하고, 프로세스마다 한 번만 읽어 열 단위 변환 계획과 미리 만든 서식으로 컴파일한다.
+계정별 규칙이 다르면 profiles/ 에 파일을 추가하면 된다 (코드 수정 없음).
+
+프로필 선택: 이름(profiles/이름.json|.yaml|.yml) 또는 파일 경로
+  - LYLYL_PROFILE: 기본 프로필 (기본값: lylyl)
+  - LYLYL_PROFILE_DIR: 프로필 디렉토리 (기본값: 이 파일 옆의 profiles/)
+
+변환 단계 (transform, 순서대로 열 단위로 실행):
+  filter  {"column", "gt"|"ge"|"lt"|"le"|"eq"|"ne": 값}       조건을 만족하는 행만 남김
+  map     {"column", "values": {원래 값: 새 값}, "case": "upper"|"lower"}   없는 값은 빈 값
+  ratio   {"column", "numerator", "denominator", "round", "zero"}   zero: 분모가 0 이하/빈 값일 때 값 (없으면 빈 값)
+  scale   {"column", "factor", "min", "round"}                 min이 있으면 min 이상인 값만 곱함
+          round는 곱한 값을 파이썬 round()로 반올림 (원래 변환기와 같은 결과)
+  round   {"columns", "digits"}                                엑셀 셀에 기록되는 값(유효숫자 16자리)을 파이썬 round()로 반올림
+  numeric {"columns"}                                          숫자로 변환 (변환할 수 없으면 빈 값)
+  sort    {"by": [{"column", "order": [값 순서]} | {"column", "descending": true}]}   안정 정렬
+
+집계 시트 (rollups, 선택):
+  columns   집계에만 쓰는 원본 열 {원본 열: 이름} (캠페인, 광고 세트 등 출력 컬럼에 없는 열)
+  sums      행 합계를 구할 열 (변환 후 이름)
+  metrics   합계로 다시 계산할 비율 지표 [{"column", "numerator", "denominator", "round", "zero"}]
+            (행 값의 평균이 아니라 합계의 비율)
+  sheets    [{"name": 시트 이름, "by": [기준 열], "sort": [정렬 기준]}]   기준 열이 없는 원본이면 그 시트는 건너뜀
+            행은 기준 열 순서로 놓은 뒤 sort로 안정 정렬 (동점 행 순서가 원본 행 순서, 나눠 읽기와 관계없음)
+
+pandas/numpy/openpyxl은 변환·서식 단계에서 처음 쓸 때 불러온다. 프로필 컴파일, 캐시 키(fingerprint),
+CLI 도움말은 이 무거운 모듈 없이 동작한다.
+"""
+import functools
+import hashlib
+import json
+import os
+
+PROFILE_DIR = os.environ.get("LYLYL_PROFILE_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "profiles")
+DEFAULT_PROFILE = os.environ.get("LYLYL_PROFILE", "lylyl")
+PROFILE_EXTENSIONS = (".json", ".yaml", ".yml")
+
+_COMPARISONS = {
+    "gt": lambda values, target: values > target,
+    "ge": lambda values, target: values >= target,
+    "lt": lambda values, target: values < target,
+    "le": lambda values, target: values <= target,
+    "eq": lambda values, target: values == target,
+    "ne": lambda values, target: values != target,
+}
+
+
+class ProfileError(ValueError):
+    """프로필 파일을 찾을 수 없거나 내용이 잘못된 경우"""
+
+
+def available_profiles():
+    """PROFILE_DIR에 있는 프로필 이름 목록"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    names = {os.path.splitext(name)[0] for name in os.listdir(PROFILE_DIR) if name.endswith(PROFILE_EXTENSIONS)}
+    return sorted(names)
+
+
+def resolve_profile_path(profile=None):
+    """프로필 이름 또는 경로를 파일 경로로 바꾸는 함수"""
+    profile = profile or DEFAULT_PROFILE
+    if profile.endswith(PROFILE_EXTENSIONS) or os.sep in profile:
+        if os.path.exists(profile):
+            return os.path.abspath(profile)
+    else:
+        for extension in PROFILE_EXTENSIONS:
+            path = os.path.join(PROFILE_DIR, profile + extension)
+            if os.path.exists(path):
+                return path
+    raise ProfileError(f"프로필을 찾을 수 없습니다: {profile} (사용 가능: {', '.join(available_profiles())})")
+
+
+def read_profile_file(path):
+    """프로필 파일(JSON 또는 YAML)을 dict로 읽는 함수 (YAML은 PyYAML이 필요)"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        try:
+            import yaml
+        except ImportError as e:
+            raise ImportError("YAML 프로필에는 PyYAML이 필요합니다 (pip install pyyaml)") from e
+        return yaml.safe_load(f)
+
+
+def load_profile(profile=None):
+    """
+    프로필을 읽어 컴파일한 CompiledProfile을 돌려주는 함수
+
+    같은 파일은 프로세스에서 한 번만 컴파일한다 (파일을 고치면 수정 시각이 바뀌어 다시 컴파일).
+
+    Args:
+        profile: 프로필 이름, 파일 경로, 이미 컴파일된 CompiledProfile 또는 None(기본 프로필)
+    """
+    if isinstance(profile, CompiledProfile):
+        return profile
+    path = resolve_profile_path(profile)
+    return _load_compiled(path, os.stat(path).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=32)
+def _load_compiled(path, mtime_ns):
+    return CompiledProfile(read_profile_file(path), source=path)
+
+
+def _numeric(values):
+    import pandas as pd
+    return pd.to_numeric(values, errors="coerce").astype(float)
+
+
+def _round_cell(value, digits):
+    # 원래 변환기는 계산한 값을 엑셀에 한 번 저장했다가(openpyxl: 유효숫자 16자리) 다시 읽어 round() 했음
+    return round(float("%.16g" % value), digits)
+
+
+def _round_like_python(values, digits, round_value=round):
+    # 파이썬 round()와 같은 값으로 반올림 (pandas/numpy round는 소수점을 옮긴 값의 오차 때문에
+    # 0.00205 같은 값에서 결과가 다름). 옮긴 값의 소수 부분이 0.5에 가까운 값만 round_value로 다시 계산하고
+    # 나머지는 numpy 결과를 그대로 쓴다 (반올림 방향이 같으면 결과 float도 같음).
+    import numpy as np
+    import pandas as pd
+    array = values.to_numpy(dtype=float)
+    rounded = np.round(array, digits)
+    with np.errstate(invalid="ignore"):
+        scaled = array * 10.0 ** digits
+        near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-9 * np.maximum(1.0, np.abs(scaled))
+    if near_half.any():
+        rounded[near_half] = [round_value(value, digits) for value in array[near_half].tolist()]
+    return pd.Series(rounded, index=values.index)
+
+
+def _compile_step(step):
+    # 변환 단계 하나를 데이터프레임 → 데이터프레임 함수로 만듦
+    op = step.get("op")
+    if op == "filter":
+        (name, target), = [(key, step[key]) for key in _COMPARISONS if key in step]
+        compare = _COMPARISONS[name]
+        column = step["column"]
+        return lambda df: df[compare(_numeric(df[column]), target)].copy()
+
+    if op == "map":
+        column, values, case = step["column"], step["values"], step.get("case")
+
+        def apply_map(df):
+            source = df[column]
+            if case == "upper":
+                source = source.str.upper()
+            elif case == "lower":
+                source = source.str.lower()
+            df[column] = source.map(values).astype(object)
+            return df
+        return apply_map
+
+    if op == "ratio":
+        column, digits = step["column"], step.get("round")
+
+        def apply_ratio(df):
+            numerator, denominator = _numeric(df[step["numerator"]]), _numeric(df[step["denominator"]])
+            # 분모가 0 이하이거나 빈 값이면 inf/NaN이 나오지 않도록 나누기 전에 걸러내고 zero 값으로 채움
+            valid = denominator > 0
+            values = (numerator / denominator.where(valid)).where(valid, step.get("zero", float("nan")))
+            df[column] = values if digits is None else values.round(digits)
+            return df
+        return apply_ratio
+
+    if op == "scale":
+        column, factor, minimum, digits = step["column"], step["factor"], step.get("min"), step.get("round")
+
+        def apply_scale(df):
+            values = _numeric(df[column])
+            scaled = values * factor if minimum is None else values.where(~(values >= minimum), values * factor)
+            df[column] = scaled if digits is None else _round_like_python(scaled, digits)
+            return df
+        return apply_scale
+
+    if op == "round":
+        columns, digits = step["columns"], step.get("digits", 0)
+
+        def apply_round(df):
+            for column in columns:
+                df[column] = _round_like_python(_numeric(df[column]), digits, _round_cell)
+            return df
+        return apply_round
+
+    if op == "numeric":
+        columns = step["columns"]
+
+        def apply_numeric(df):
+            for column in columns:
+                df[column] = _numeric(df[column])
+            return df
+        return apply_numeric
+
+    if op == "sort":
+        keys = step["by"]
+
+        def apply_sort(df):
+            by, ascending, temporary = [], [], []
+            for index, key in enumerate(keys):
+                if "order" in key:
+                    # 지정한 순서대로, 목록에 없는 값은 맨 뒤
+                    name = f"__sort_{index}"
+                    df[name] = df[key["column"]].map({value: rank for rank, value in enumerate(key["order"])})
+                    temporary.append(name)
+                    by.append(name)
+                else:
+                    by.append(key["column"])
+                ascending.append(not key.get("descending", False))
+            df = df.sort_values(by=by, ascending=ascending, kind="stable")
+            return df.drop(columns=temporary)
+        return apply_sort
+
+    raise ProfileError(f"알 수 없는 변환 단계입니다: {op}")
+
+
+class CompiledProfile:
+    """
+    한 번 컴파일된 변환 프로필
+
+    transform()은 원본 데이터프레임을 출력 컬럼 순서의 변환 결과로 만들고,
+    색상 단계(assign_tiers), 조건부 서식 규칙, 숫자 형식, 색상 서식(tier_fills)은 미리 만들어 둔다.
+    """
+
+    def __init__(self, spec, source=None):
+        try:
+            self.spec = spec
+            self.source = source
+            self.name = spec["name"]
+            self.column_mapping = dict(spec["columns"])
+            self.dtypes = dict(spec.get("dtypes", {}))
+            self.output_columns = list(spec["output_columns"])
+            self.report_dates = tuple(spec["report_dates"]) if spec.get("report_dates") else None
+            self._steps = [_compile_step(step) for step in spec.get("transform", [])]
+            self.sort_keys = [key for step in spec.get("transform", []) if step.get("op") == "sort"
+                              for key in step["by"]]
+
+            # 서식
+            self.column_widths = dict(spec.get("column_widths", {}))
+            self.date_formats = dict(spec.get("date_formats", {}))
+            self.number_formats = {}
+            self.always_formats = set()
+            for column, number_format in spec.get("number_formats", {}).items():
+                if isinstance(number_format, dict):
+                    if number_format.get("always"):
+                        self.always_formats.add(column)
+                    number_format = number_format["format"]
+                self.number_formats[column] = number_format
+
+            # 색상 기준
+            tiers = spec.get("tiers", {})
+            self.tier_colors = dict(tiers.get("colors", {}))
+            self.default_tier = tiers.get("default")
+            self.tier_thresholds = {
+                metric: (direction, [(cutoff, tier) for cutoff, tier in cutoffs])
+                for metric, (direction, cutoffs) in tiers.get("metrics", {}).items()
+            }
+            self.row_tiers = tiers.get("rows")
+
+            # 집계 시트
+            rollups = spec.get("rollups", {})
+            self.rollup_columns = dict(rollups.get("columns", {}))
+            self.rollup_count_column = rollups.get("count_column", "행 수")
+            self.rollup_sum_columns = list(rollups.get("sums", []))
+            self._rollup_metrics = [_compile_step(dict(metric, op="ratio")) for metric in rollups.get("metrics", [])]
+            self.rollup_sheets = [
+                (sheet["name"], list(sheet["by"]), _compile_step({"op": "sort", "by": sheet["sort"]}) if sheet.get("sort") else (lambda df: df))
+                for sheet in rollups.get("sheets", [])
+            ]
+            self.rollup_output_columns = list(rollups.get("output_columns") or [
+                self.rollup_count_column, *self.rollup_sum_columns,
+                *(metric["column"] for metric in rollups.get("metrics", []))])
+            self.rollup_number_formats = dict(self.number_formats, **rollups.get("number_formats", {}))
+
+            # 원본에서 읽을 열과 형식 (집계에만 쓰는 열 포함)
+            self.read_columns = list(dict.fromkeys([*self.column_mapping, *self.rollup_columns]))
+            self.read_dtypes = dict(self.dtypes, **rollups.get("dtypes", {}))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ProfileError(f"프로필 형식이 잘못되었습니다 ({source or spec.get('name')}): {e!r}") from e
+
+        for direction, cutoffs in self.tier_thresholds.values():
+            if direction not in (">=", "<"):
+                raise ProfileError(f"색상 기준 비교 방향은 >= 또는 < 여야 합니다: {direction}")
+            for _, tier in cutoffs:
+                if tier not in self.tier_colors:
+                    raise ProfileError(f"색상이 정의되지 않은 단계입니다: {tier}")
+
+        payload = json.dumps(spec, ensure_ascii=False, sort_keys=True, default=str)
+        self.fingerprint = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def __repr__(self):
+        return f"<CompiledProfile {self.name} ({self.source})>"
+
+    @functools.cached_property
+    def tier_fills(self):
+        """색상 단계별 공유 셀 서식 {단계: PatternFill} (서식을 처음 쓸 때 한 번 만듦)"""
+        from openpyxl.styles import PatternFill
+        return {tier: PatternFill(start_color=color, end_color=color, fill_type="solid")
+                for tier, color in self.tier_colors.items()}
+
+    @property
+    def status_order(self):
+        """정렬 기준 중 첫 번째 순서 목록 ({값: 순위}), 없으면 빈 dict"""
+        for key in self.sort_keys:
+            if "order" in key:
+                return {value: rank for rank, value in enumerate(key["order"])}
+        return {}
+
+    # --- 변환 ---
+
+    def prepare(self, df):
+        """
+        변환 단계까지 실행한 데이터프레임 (출력 컬럼 + 원본에 있는 집계용 열, 열 순서는 정리 전)
+
+        transform()과 rollup_sums()가 같은 결과를 나눠 쓸 수 있도록 따로 둔다.
+        """
+        mapping = dict(self.column_mapping)
+        mapping.update((source, name) for source, name in self.rollup_columns.items() if source in df.columns)
+        df = df[list(mapping)].rename(columns=mapping)
+        for step in self._steps:
+            df = step(df)
+        return df
+
+    def transform(self, df):
+        """원본 데이터프레임을 출력 컬럼 순서의 변환된 데이터프레임으로 만드는 함수"""
+        return self.prepare(df)[self.output_columns]
+
+    # --- 집계 시트 ---
+
+    def rollup_sums(self, prepared):
+        """
+        집계 시트별 기준 열 묶음의 행 수와 합계 {시트 이름: 데이터프레임}
+
+        합계는 더할 수 있으므로 묶음(chunk)마다 따로 구한 결과를 finish_rollups()로 합칠 수 있다.
+
+        Args:
+            prepared: prepare() 결과
+        """
+        import pandas as pd
+        sums = [column for column in self.rollup_sum_columns if column in prepared.columns]
+        partial = {}
+        for name, by, _ in self.rollup_sheets:
+            if not all(column in prepared.columns for column in by):
+                continue
+            grouped = prepared.groupby(by, dropna=False, sort=False)
+            table = grouped[sums].sum(min_count=1) if sums else pd.DataFrame(index=grouped.size().index)
+            table.insert(0, self.rollup_count_column, grouped.size())
+            partial[name] = table.reset_index()
+        return partial
+
+    def finish_rollups(self, partials):
+        """
+        rollup_sums() 결과(여러 묶음)를 합쳐 비율 지표를 다시 계산한 집계 시트 {시트 이름: 데이터프레임}
+
+        Args:
+            partials: rollup_sums() 결과 목록
+        """
+        import pandas as pd
+        rollups = {}
+        for name, by, sort in self.rollup_sheets:
+            tables = [partial[name] for partial in partials if name in partial]
+            if not tables:
+                continue
+            table = pd.concat(tables, ignore_index=True) if len(tables) > 1 else tables[0]
+            if len(tables) > 1:
+                table = table.groupby(by, dropna=False, sort=False).sum(min_count=1).reset_index()
+            for column in self.rollup_sum_columns:
+                if column not in table.columns:
+                    table[column] = float("nan")
+            for metric in self._rollup_metrics:
+                table = metric(table)
+            # 묶음이 처음 나온 순서는 나눠 읽은 방식(각 묶음이 이미 정렬됨)에 따라 달라지므로
+            # 기준 열 순서로 먼저 놓아 동점 행도 항상 같은 순서가 되게 함
+            table = sort(table.sort_values(by, kind="stable", ignore_index=True))
+            columns = [*by, *(column for column in self.rollup_output_columns if column not in by)]
+            rollups[name] = table[columns].reset_index(drop=True)
+        return rollups
+
+    def rollups(self, prepared):
+        """prepare() 결과 전체의 집계 시트 {시트 이름: 데이터프레임}"""
+        return self.finish_rollups([self.rollup_sums(prepared)])
+
+    def row_sort_key(self, columns):
+        """
+        변환 결과 행(값 튜플)의 정렬 키 함수 (transform의 정렬과 같은 순서)
+
+        정렬된 묶음을 병합할 때 쓴다 (streaming_convert).
+        """
+        getters = []
+        for key in self.sort_keys:
+            index = columns.index(key["column"])
+            if "order" in key:
+                order = {value: rank for rank, value in enumerate(key["order"])}
+                getters.append(lambda values, i=index, o=order: o.get(values[i], len(o)))
+            elif key.get("descending"):
+                getters.append(lambda values, i=index: -values[i])
+            else:
+                getters.append(lambda values, i=index: values[i])
+        return lambda values: tuple(getter(values) for getter in getters)
+
+    # --- 색상 단계 ---
+
+    def metric_tiers(self, values, metric):
+        """지표 열 전체의 색상 단계 Series"""
+        import numpy as np
+        import pandas as pd
+        direction, cutoffs = self.tier_thresholds[metric]
+        numeric = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+        if direction == ">=":
+            conditions = [numeric >= cutoff for cutoff, _ in cutoffs]
+        else:
+            conditions = [numeric < cutoff for cutoff, _ in cutoffs]
+        tiers = np.select(conditions, [tier for _, tier in cutoffs], default=self.default_tier)
+        return pd.Series(tiers, index=values.index, dtype=object)
+
+    def status_tiers(self, status, metric_values):
+        """행 색상 단계 Series (규칙에 맞지 않는 행은 None)"""
+        import numpy as np
+        import pandas as pd
+        rules = self.row_tiers["rules"]
+        metric_values = pd.to_numeric(metric_values, errors="coerce")
+        conditions = []
+        for rule in rules:
+            condition = (status == rule["status"]).to_numpy()
+            if "above" in rule:
+                condition = condition & (metric_values > rule["above"]).to_numpy()
+            conditions.append(condition)
+        tiers = np.select(conditions, [rule["tier"] for rule in rules], default=None)
+        return pd.Series(tiers, index=status.index, dtype=object)
+
+    def assign_tiers(self, df):
+        """
+        데이터프레임의 색상 단계를 열 단위로 계산하는 함수
+
+        Returns:
+            행 색상 기준 열(상태)과 지표 열로 이루어진 데이터프레임 (색상 기준이 없으면 열 없음)
+        """
+        import pandas as pd
+        tiers = pd.DataFrame(index=df.index)
+        rows = self.row_tiers
+        if rows and rows["status_column"] in df.columns and rows["metric"] in df.columns:
+            tiers[rows["status_column"]] = self.status_tiers(df[rows["status_column"]], df[rows["metric"]])
+        for metric in self.tier_thresholds:
+            if metric in df.columns:
+                tiers[metric] = self.metric_tiers(df[metric], metric)
+        return tiers
+
+    def conditional_formatting_rules(self, columns, max_row):
+        """
+        색상 기준을 워크시트 조건부 서식 규칙으로 만드는 함수
+
+        Returns:
+            (셀 범위, 규칙) 목록 (먼저 나온 규칙이 우선)
+        """
+        from openpyxl.formatting.rule import FormulaRule
+        from openpyxl.utils import get_column_letter
+        letters = {name: get_column_letter(idx + 1) for idx, name in enumerate(columns)}
+        rules = []
+
+        rows = self.row_tiers
+        if rows and rows["status_column"] in letters and rows["metric"] in letters:
+            fill_columns = rows["columns"]
+            status_range = f"{letters[fill_columns[0]]}2:{letters[fill_columns[-1]]}{max_row}"
+            status = f"${letters[rows['status_column']]}2"
+            metric = f"${letters[rows['metric']]}2"
+            for rule in rows["rules"]:
+                formula = f'{status}="{rule["status"]}"'
+                if "above" in rule:
+                    formula = f'AND({formula},ISNUMBER({metric}),{metric}>{_formula_number(rule["above"])})'
+                rules.append((status_range, FormulaRule(formula=[formula], fill=self.tier_fills[rule["tier"]],
+                                                        stopIfTrue=True)))
+
+        for metric, (direction, cutoffs) in self.tier_thresholds.items():
+            if metric not in letters:
+                continue
+            cell = f"{letters[metric]}2"
+            cell_range = f"{letters[metric]}2:{letters[metric]}{max_row}"
+            for cutoff, tier in cutoffs:
+                formula = f"AND(ISNUMBER({cell}),{cell}{direction}{_formula_number(cutoff)})"
+                rules.append((cell_range, FormulaRule(formula=[formula], fill=self.tier_fills[tier], stopIfTrue=True)))
+            if self.default_tier:
+                rules.append((cell_range, FormulaRule(formula=["TRUE"], fill=self.tier_fills[self.default_tier],
+                                                      stopIfTrue=True)))
+        return rules
+
+
+def _formula_number(value):
+    # 수식에 쓸 숫자 표기 (3.0 → 3, 0.4 → 0.4)
+    return f"{value:g}"
@@ -1,153 +1,228 @@
-import pandas as pd
-from openpyxl import load_workbook
 import sys
 import os
+import argparse
+import contextlib
+import io
+from conversion_metrics import enable_stage_log, stage
+from conversion_profile import available_profiles, load_profile
+from excel_reader import read_export, read_header
 
-def convert_excel_file(input_path: str, output_path: str):
+# pandas/openpyxl은 변환할 때 불러온다 (--help와 인자 오류는 바로 응답)
+
+# 기본 변환 프로필 (profiles/basic.json: 컬럼 매핑, 파생 지표, 숫자 형식)
+DEFAULT_PROFILE = "basic"
+PROFILE = load_profile(DEFAULT_PROFILE)
+
+# 지원하는 출력 형식 (xlsx만 서식 적용)
+OUTPUT_FORMATS = ("xlsx", "csv", "parquet")
+
+# 입력으로 받는 파일 확장자
+INPUT_EXTENSIONS = (".xlsx", ".csv")
+
+def convert_excel_file(input_path: str, output_path: str, output_format: str = "xlsx",
+                       profile=DEFAULT_PROFILE):
     """
     광고 데이터 엑셀 파일을 변환하는 함수
     
     Args:
-        input_path: 원본 엑셀 파일 경로
+        input_path: 원본 엑셀(.xlsx) 또는 CSV 파일 경로
         output_path: 변환된 파일 저장 경로
+        output_format: 출력 형식 (xlsx, csv, parquet - csv/parquet은 서식 없이 값만 저장)
+        profile: 변환 프로필 이름/경로 또는 CompiledProfile (기본값: basic)
+    
+    Returns:
+        변환에 성공하면 True, 실패하면 False
     """
+    # 서식 저장은 auto_convert_excel의 write-only 저장 함수를 같이 씀
+    import auto_convert_excel
+
     print(f"파일 변환 시작: {input_path}")
     
-    # 1. 파일 로드
+    # 1. 파일 로드 (매핑된 컬럼만)
     try:
-        df = pd.read_excel(input_path)
+        profile = load_profile(profile)
+        column_mapping = profile.column_mapping
+        with stage("read", profile.name) as s:
+            df = read_export(input_path, columns=column_mapping, dtypes=profile.dtypes)
+            s.rows = len(df)
         print(f"파일 로드 완료: 총 {len(df)} 행")
     except Exception as e:
         print(f"파일 로드 오류: {e}")
-        return
+        return False
     
-    # 2. 컬럼 매핑
-    column_mapping = {
-        "광고 이름": "제목",
-        "지출 금액 (KRW)": "광고비",
-        "구매": "구매",
-        "구매 전환값": "매출",
-        "구매 ROAS(광고 지출 대비 수익률)": "ROAS",
-        "CPC(전체) (KRW)": "CPC",
-        "전환율(CVR)": "CVR",
-        "CTR(전체)": "CTR",
-        "클릭(전체)": "클릭",
-        "동영상 재생": "동영상 재생",
-        "동영상 3초 이상 재생": "동영상 3초 이상 재생",
-        "동영상 100% 재생": "동영상 100% 재생",
-    }
-    
-    # 필수 컬럼 확인
+    # 2. 필수 컬럼 확인
     missing_columns = [col for col in column_mapping.keys() if col not in df.columns]
     if missing_columns:
         print(f"경고: 다음 컬럼이 누락되었습니다: {', '.join(missing_columns)}")
-        print("가능한 컬럼:", ', '.join(df.columns))
-        return
-    
-    df = df[list(column_mapping.keys())].rename(columns=column_mapping)
-    print("컬럼 매핑 완료")
-    
-    # 3. 광고비 0 제거
-    initial_rows = len(df)
-    df = df[df["광고비"] > 0].copy()
-    removed_rows = initial_rows - len(df)
-    print(f"광고비 0인 행 {removed_rows}개 제거됨, 남은 행: {len(df)}개")
+        print("가능한 컬럼:", ', '.join(str(col) for col in read_header(input_path)))
+        return False
     
-    # 4. 후크 및 지속 계산 (0.01 보정 적용)
-    df["후크"] = (df["동영상 3초 이상 재생"] / df["동영상 재생"]).round(4) * 0.01
-    df["지속"] = (df["동영상 100% 재생"] / df["동영상 3초 이상 재생"]).round(4) * 0.01
-    print("후크 및 지속 지표 계산 완료")
+    # 3. 컬럼 매핑, 광고비 0 제거, 후크/지속 계산, CVR/CTR 보정 (프로필의 변환 단계)
+    with stage("transform", profile.name, rows=len(df)):
+        initial_rows = len(df)
+        df = profile.transform(df)
+    print(f"광고비 0인 행 {initial_rows - len(df)}개 제거됨, 남은 행: {len(df)}개")
     
-    # 5. 컬럼 순서 정리
-    columns = ["제목", "광고비", "구매", "매출", "ROAS", "CPC", "CVR", "CTR", "클릭",
-               "후크", "지속", "동영상 재생", "동영상 3초 이상 재생", "동영상 100% 재생"]
-    df = df[columns]
-    
-    # 6. 엑셀로 저장 (임시)
-    df.to_excel(output_path, index=False)
-    print(f"기본 데이터 저장 완료: {output_path}")
+    # CSV / Parquet: 서식 없이 값만 저장
+    if output_format in ("csv", "parquet"):
+        try:
+            with stage("write", profile.name, rows=len(df)):
+                auto_convert_excel.write_plain_output(df, output_path, output_format)
+        except ImportError as e:
+            print(e)
+            return False
+        print(f"변환 완료! 결과가 {output_path}에 저장되었습니다.")
+        return True
     
-    # 7. 서식 적용
+    # 4. 서식과 함께 한 번에 저장 (숫자 형식은 프로필의 number_formats)
     try:
-        wb = load_workbook(output_path)
-        ws = wb.active
-        col_idx = {cell.value: idx + 1 for idx, cell in enumerate(ws[1])}
-        
         print("셀 서식 적용 중...")
-        for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
-            r = row[0].row
-            # ROAS: 0.00
-            ws.cell(r, col_idx["ROAS"]).number_format = "0.00"
-            # CPC: 정수
-            ws.cell(r, col_idx["CPC"]).number_format = "0"
-            # CVR: 보정 + 퍼센트
-            try:
-                cvr_val = float(ws.cell(r, col_idx["CVR"]).value)
-                if cvr_val >= 100:
-                    cvr_val *= 0.01
-                ws.cell(r, col_idx["CVR"]).value = round(cvr_val, 4)
-                ws.cell(r, col_idx["CVR"]).number_format = "0.00%"
-            except:
-                pass
-            # CTR: 무조건 0.01 보정 후 퍼센트
-            try:
-                ctr_val = float(ws.cell(r, col_idx["CTR"]).value) * 0.01
-                ws.cell(r, col_idx["CTR"]).value = round(ctr_val, 4)
-                ws.cell(r, col_idx["CTR"]).number_format = "0.00%"
-            except:
-                pass
-            # 후크 / 지속: 정수 % (이미 0.01 곱해졌으므로 100 곱하지 않음)
-            for key in ["후크", "지속"]:
-                try:
-                    val = float(ws.cell(r, col_idx[key]).value)
-                    ws.cell(r, col_idx[key]).value = round(val, 4)
-                    ws.cell(r, col_idx[key]).number_format = "0.00%"
-                except:
-                    pass
-        
-        wb.save(output_path)
+        auto_convert_excel.write_styled_workbook(df, output_path, profile=profile)
         print("셀 서식 적용 완료")
         print(f"변환 완료! 결과가 {output_path}에 저장되었습니다.")
+        return True
     except Exception as e:
         print(f"서식 적용 중 오류 발생: {e}")
+        return False
+
+def print_usage():
+    print("\n===== LYLYL 광고 데이터 변환기 =====")
+    print("사용법:")
+    print("  1. 파일 지정: python convert_excel.py 원본파일.xlsx [결과파일.xlsx] [--format xlsx|csv|parquet]")
+    print("  2. 현재 폴더 모든 파일: python convert_excel.py all [--format xlsx|csv|parquet] [--jobs N]")
+    print("\n예시:")
+    print("  python convert_excel.py LYLYL광고2025.4.14.2025.4.20.xlsx")
+    print("  python convert_excel.py LYLYL광고2025.4.14.2025.4.20.xlsx 변환결과.xlsx")
+    print("  python convert_excel.py LYLYL광고2025.4.14.2025.4.20.csv --format parquet")
+    print("  python convert_excel.py all")
+    print("  python convert_excel.py all --jobs 4")
+
+def converted_path(input_path: str, output_format: str) -> str:
+    # 출력 파일명 자동 생성 (원본파일_변환.형식)
+    base_name = os.path.splitext(input_path)[0]
+    return f"{base_name}_변환.{output_format}"
+
+def _convert_one(input_path: str, output_path: str, output_format: str, profile=DEFAULT_PROFILE):
+    """
+    작업 프로세스에서 파일 하나를 변환하는 함수
+
+    여러 파일의 출력이 섞이지 않도록 진행 메시지를 모아서 돌려준다.
+
+    Returns:
+        (성공 여부, 진행 메시지, 오류 메시지)
+    """
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            ok = convert_excel_file(input_path, output_path, output_format, profile)
+        # 실패한 경우 마지막 진행 메시지(오류 내용)를 오류 메시지로 사용
+        lines = log.getvalue().strip().splitlines()
+        return ok, log.getvalue(), None if ok else (lines[-1] if lines else "변환 실패")
+    except Exception as e:
+        return False, log.getvalue(), str(e)
+
+def convert_all(files, output_format: str = "xlsx", jobs: int = None, profile=DEFAULT_PROFILE):
+    """
+    여러 파일을 프로세스 풀에서 나눠 변환하는 함수
+
+    Args:
+        files: 원본 파일 경로 목록
+        output_format: 출력 형식
+        jobs: 동시에 변환할 프로세스 수 (None이면 CPU 수, 1이면 현재 프로세스에서 순서대로)
+        profile: 변환 프로필 이름 또는 경로 (작업 프로세스마다 시작할 때 한 번만 컴파일)
+
+    Returns:
+        {원본 파일 경로: 오류 메시지 (성공이면 None)}
+    """
+    jobs = jobs or os.cpu_count() or 1
+    jobs = min(jobs, len(files))
+    results = {}
+
+    def report(input_path, ok, log, error):
+        print(f"\n처리 중: {os.path.basename(input_path)}")
+        print(log, end="")
+        if ok:
+            print(f"✅ 성공: {os.path.basename(input_path)}")
+        else:
+            print(f"❌ 실패: {os.path.basename(input_path)} - {error}")
+        results[input_path] = None if ok else error
+
+    if jobs <= 1:
+        for input_path in files:
+            report(input_path, *_convert_one(input_path, converted_path(input_path, output_format),
+                                             output_format, profile))
+        return results
+
+    # 작업 프로세스를 fork하기 전에 pandas/openpyxl을 한 번 불러와 두면 작업 프로세스마다 다시 불러오지 않음
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from auto_convert_excel import preload
+    preload()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=load_profile, initargs=(profile,)) as executor:
+        futures = {
+            executor.submit(_convert_one, input_path, converted_path(input_path, output_format),
+                            output_format, profile): input_path
+            for input_path in files
+        }
+        for future in as_completed(futures):
+            input_path = futures[future]
+            try:
+                report(input_path, *future.result())
+            except Exception as e:
+                # 작업 프로세스가 비정상 종료된 경우 등
+                report(input_path, False, "", str(e))
+    return results
+
+def print_summary(results):
+    failed = {path: error for path, error in results.items() if error}
+    print("\n===== 변환 결과 =====")
+    print(f"전체 {len(results)}개 / 성공 {len(results) - len(failed)}개 / 실패 {len(failed)}개")
+    for path, error in failed.items():
+        print(f"  - {os.path.basename(path)}: {error}")
 
 # 메인 실행 부분
 if __name__ == "__main__":
     # 인자가 없는 경우 사용법 안내
     if len(sys.argv) < 2:
-        print("\n===== LYLYL 광고 데이터 변환기 =====")
-        print("사용법:")
-        print("  1. 파일 지정: python convert_excel.py 원본파일.xlsx [결과파일.xlsx]")
-        print("  2. 현재 폴더 모든 파일: python convert_excel.py all")
-        print("\n예시:")
-        print("  python convert_excel.py LYLYL광고2025.4.14.2025.4.20.xlsx")
-        print("  python convert_excel.py LYLYL광고2025.4.14.2025.4.20.xlsx 변환결과.xlsx")
-        print("  python convert_excel.py all")
+        print_usage()
         sys.exit(1)
     
-    # 'all' 옵션: 현재 폴더의 모든 xlsx 파일 처리
-    if sys.argv[1].lower() == 'all':
-        print("현재 폴더의 모든 엑셀 파일을 처리합니다...")
+    parser = argparse.ArgumentParser(description="LYLYL 광고 데이터 변환기")
+    parser.add_argument("input", help="원본 파일 (.xlsx/.csv) 또는 all")
+    parser.add_argument("output", nargs="?", help="결과 파일 경로 (생략하면 원본파일_변환.형식)")
+    parser.add_argument("--format", dest="output_format", choices=OUTPUT_FORMATS, default="xlsx",
+                        help="출력 형식 (csv/parquet은 서식 없이 저장, 기본값: xlsx)")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="all 모드에서 동시에 변환할 프로세스 수 (기본값: CPU 수)")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE,
+                        help=f"변환 프로필 이름 또는 파일 경로 (기본값: {DEFAULT_PROFILE}, 사용 가능: "
+                             f"{', '.join(available_profiles())})")
+    parser.add_argument("--stage-log", action="store_true",
+                        help="단계별 소요 시간/행 수/메모리를 JSON 한 줄씩 stderr에 출력")
+    args = parser.parse_args()
+
+    if args.stage_log:
+        enable_stage_log()
+    
+    # 'all' 옵션: 현재 폴더의 모든 xlsx/csv 파일 처리
+    if args.input.lower() == 'all':
+        print("현재 폴더의 모든 엑셀/CSV 파일을 처리합니다...")
         current_dir = os.getcwd()
-        excel_files = [f for f in os.listdir(current_dir) if f.endswith('.xlsx') and not f.endswith('_변환.xlsx')]
+        excel_files = [f for f in os.listdir(current_dir)
+                       if f.endswith(INPUT_EXTENSIONS) and not os.path.splitext(f)[0].endswith('_변환')]
         
         if not excel_files:
             print("변환할 엑셀 파일을 찾을 수 없습니다.")
             sys.exit(1)
             
-        for file in excel_files:
-            input_path = os.path.join(current_dir, file)
-            output_path = os.path.join(current_dir, file.replace('.xlsx', '_변환.xlsx'))
-            print(f"\n처리 중: {file}")
-            convert_excel_file(input_path, output_path)
+        input_paths = [os.path.join(current_dir, file) for file in excel_files]
+        results = convert_all(input_paths, args.output_format, args.jobs, args.profile)
+        print_summary(results)
+        if any(results.values()):
+            sys.exit(1)
     else:
         # 단일 파일 처리
-        input_path = sys.argv[1]
-        if len(sys.argv) > 2:
-            output_path = sys.argv[2]
-        else:
-            # 출력 파일명 자동 생성
-            base_name = os.path.splitext(input_path)[0]
-            output_path = f"{base_name}_변환.xlsx"
+        input_path = args.input
+        output_path = args.output or converted_path(input_path, args.output_format)
             
-        convert_excel_file(input_path, output_path)
\ No newline at end of file
+        if not convert_excel_file(input_path, output_path, args.output_format, args.profile):
+            sys.exit(1)
@@ -0,0 +1,197 @@
+import importlib.util
+import os
+from io import BytesIO
+
+# pandas/openpyxl은 실제로 읽을 때 불러온다 (CLI 도움말, 캐시 적중 시에는 불러오지 않음)
+
+# 설치되어 있으면 우선 사용하는 빠른 엑셀 엔진 (pip install python-calamine)
+FAST_ENGINE = "calamine"
+
+# Meta CSV 내보내기 인코딩 (BOM이 있어도 없어도 읽힘)
+CSV_ENCODING = "utf-8-sig"
+
+# 나눠 읽기(스트리밍 변환)의 기본 행 수
+DEFAULT_CHUNK_SIZE = 20000
+
+# 엑셀 파일 시작 바이트 (xlsx: zip, xls: OLE)
+_EXCEL_SIGNATURES = (b"PK\x03\x04", b"\xd0\xcf\x11\xe0")
+
+# 내용이 엑셀 형식이어야 하는 확장자
+EXCEL_EXTENSIONS = (".xlsx", ".xls")
+
+
+class NotExcelFile(ValueError):
+    """엑셀 이름(.xlsx, .xls)이지만 내용이 엑셀 형식이 아닌 파일 (손상되었거나 이름만 바꾼 파일)"""
+
+
+def fast_engine_available():
+    """python-calamine이 설치되어 있는지 확인하는 함수"""
+    return importlib.util.find_spec("python_calamine") is not None
+
+
+def default_engine():
+    """사용할 pandas 엑셀 엔진 (calamine이 없으면 None = pandas 기본 엔진)"""
+    return FAST_ENGINE if fast_engine_available() else None
+
+
+def _as_source(source):
+    # bytes는 파일 객체로 감싸고, 파일 객체는 처음 위치에서 읽도록 되돌림
+    if isinstance(source, (bytes, bytearray)):
+        return BytesIO(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+def is_csv(source, filename=None):
+    """
+    입력이 CSV인지 확인하는 함수
+
+    .csv 경로는 확장자로, 그 밖에는 엑셀 시작 바이트가 아닌 경우 CSV로 본다.
+    이름(경로 또는 filename)이 .xlsx/.xls인데 내용이 엑셀 형식이 아니면 CSV로 읽지 않고 NotExcelFile.
+
+    Args:
+        source: 파일 경로, bytes 또는 파일 객체
+        filename: bytes/파일 객체의 원래 파일 이름 (업로드 파일명 등, 없으면 None)
+    """
+    if isinstance(source, (str, os.PathLike)):
+        filename = os.fspath(source)
+        if filename.lower().endswith(".csv"):
+            return True
+        with open(filename, "rb") as f:
+            head = f.read(4)
+    elif isinstance(source, (bytes, bytearray)):
+        head = bytes(source[:4])
+    elif hasattr(source, "read") and hasattr(source, "seek"):
+        source.seek(0)
+        head = source.read(4)
+        source.seek(0)
+    else:
+        return False
+    if head.startswith(_EXCEL_SIGNATURES):
+        return False
+    if filename and os.fspath(filename).lower().endswith(EXCEL_EXTENSIONS):
+        raise NotExcelFile(f"엑셀 파일이 아닙니다: {os.path.basename(os.fspath(filename))}")
+    return True
+
+
+def supports_chunks(filename):
+    """나눠 읽을 수 있는 파일(.xlsx, .csv)인지 확장자로 확인하는 함수 (.xls는 read_export로 한 번에 읽음)"""
+    return os.fspath(filename).lower().endswith((".xlsx", ".csv"))
+
+
+def _read(source, usecols, dtypes, engine, csv):
+    import pandas as pd
+    if csv:
+        return pd.read_csv(_as_source(source), usecols=usecols, dtype=dtypes, encoding=CSV_ENCODING)
+    return pd.read_excel(_as_source(source), usecols=usecols, dtype=dtypes, engine=engine)
+
+
+def read_export(source, columns=None, dtypes=None, engine=None, filename=None):
+    """
+    광고 데이터 엑셀(또는 CSV)을 필요한 컬럼만 골라 읽는 함수
+
+    Args:
+        source: 파일 경로, bytes 또는 파일 객체 (.xlsx, .xls, .csv)
+        columns: 읽을 원본 컬럼 이름 목록 (None이면 전체, 파일에 없는 컬럼은 무시)
+        dtypes: 미리 지정할 컬럼별 자료형 {원본 컬럼 이름: dtype}
+        engine: pandas 엑셀 엔진 (None이면 calamine이 설치되어 있을 때 calamine 사용)
+        filename: bytes/파일 객체의 원래 파일 이름 (엑셀 이름인데 엑셀 형식이 아니면 NotExcelFile)
+
+    Returns:
+        읽은 데이터프레임 (columns에 있는 컬럼 중 파일에 있는 것만 포함)
+    """
+    csv = is_csv(source, filename)
+    if engine is None and not csv:
+        engine = default_engine()
+
+    usecols = None
+    if columns is not None:
+        wanted = set(columns)
+        usecols = lambda name: name in wanted
+
+    try:
+        return _read(source, usecols, dtypes, engine, csv)
+    except ValueError:
+        if not dtypes:
+            raise
+        # 숫자 컬럼에 문자가 섞인 파일 등은 자료형 지정 없이 다시 읽음
+        return _read(source, usecols, None, engine, csv)
+
+
+def read_header(source, engine=None, filename=None):
+    """엑셀(또는 CSV) 파일의 컬럼 이름만 읽는 함수 (누락 컬럼 안내용, filename은 read_export와 같음)"""
+    import pandas as pd
+    if is_csv(source, filename):
+        return list(pd.read_csv(_as_source(source), nrows=0, encoding=CSV_ENCODING).columns)
+    if engine is None:
+        engine = default_engine()
+    return list(pd.read_excel(_as_source(source), nrows=0, engine=engine).columns)
+
+
+def _coerce_dtypes(df, dtypes):
+    # 숫자로 바꿀 수 없는 값은 NaN으로 (나눠 읽을 때는 다시 읽을 수 없으므로)
+    import pandas as pd
+    for name, dtype in (dtypes or {}).items():
+        if name not in df.columns:
+            continue
+        if dtype == "object":
+            df[name] = df[name].astype(object)
+        else:
+            df[name] = pd.to_numeric(df[name], errors="coerce").astype(dtype)
+    return df
+
+
+def _chunk_frame(rows, names, dtypes):
+    import pandas as pd
+    return _coerce_dtypes(pd.DataFrame(rows, columns=names), dtypes)
+
+
+def iter_export_chunks(source, columns=None, dtypes=None, chunk_size=DEFAULT_CHUNK_SIZE, filename=None):
+    """
+    광고 데이터를 chunk_size 행씩 나눠 읽는 함수 (메모리에는 한 묶음만 올라감)
+
+    xlsx는 openpyxl 읽기 전용 모드로 행을 차례로 읽고, CSV는 pandas chunksize로 읽는다.
+    (.xls는 나눠 읽을 수 없으므로 read_export 사용)
+
+    Args:
+        source: 파일 경로, bytes 또는 파일 객체 (.xlsx, .csv)
+        columns: 읽을 원본 컬럼 이름 목록 (None이면 전체, 파일에 없는 컬럼은 무시)
+        dtypes: 컬럼별 자료형 {원본 컬럼 이름: dtype}
+        chunk_size: 한 번에 읽을 행 수
+        filename: bytes/파일 객체의 원래 파일 이름 (read_export와 같음)
+
+    Yields:
+        최대 chunk_size 행의 데이터프레임
+    """
+    import pandas as pd
+    from openpyxl import load_workbook
+    wanted = set(columns) if columns is not None else None
+
+    if is_csv(source, filename):
+        usecols = (lambda name: name in wanted) if wanted is not None else None
+        for chunk in pd.read_csv(_as_source(source), usecols=usecols, chunksize=chunk_size, encoding=CSV_ENCODING):
+            yield _coerce_dtypes(chunk, dtypes)
+        return
+
+    wb = load_workbook(_as_source(source), read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        keep = [(idx, name) for idx, name in enumerate(header)
+                if name is not None and (wanted is None or name in wanted)]
+        names = [name for _, name in keep]
+
+        buffer = []
+        for row in rows:
+            # 완전히 빈 행은 건너뜀
+            if not any(value is not None for value in row):
+                continue
+            buffer.append([row[idx] if idx < len(row) else None for idx, _ in keep])
+            if len(buffer) >= chunk_size:
+                yield _chunk_frame(buffer, names, dtypes)
+                buffer = []
+        if buffer:
+            yield _chunk_frame(buffer, names, dtypes)
+    finally:
+        wb.close()
@@ -0,0 +1,52 @@
+"""
+app.py 운영 서버 설정 (gunicorn -c gunicorn.conf.py)
+
+환경 변수:
+  - LYLYL_BIND: 주소 (기본값: 0.0.0.0:8000)
+  - LYLYL_WEB_WORKERS: 워커 프로세스 수 (기본값: CPU 수, 변환은 CPU 작업)
+  - LYLYL_WEB_THREADS: 워커당 스레드 수 (기본값: 2, 업로드 수신/다운로드 중에도 다른 요청을 받도록)
+  - LYLYL_WEB_TIMEOUT: 요청 하나의 최대 처리 시간 (초, 기본값: 120)
+  - LYLYL_JOB_DIR, LYLYL_METRICS_DIR: 워커끼리 공유할 작업 상태/결과, 지표 디렉토리
+    (워커가 여럿이고 지정하지 않으면 시작할 때 임시 디렉토리를 만들고 종료할 때 지움)
+업로드 크기 제한은 app.py의 LYLYL_MAX_UPLOAD_MB (MAX_CONTENT_LENGTH).
+
+작업 큐(/jobs)와 /metrics 지표는 워커 프로세스마다 따로 있으므로, 워커가 여럿이면 위 디렉토리로
+다른 워커가 받은 작업의 상태/다운로드와 전체 워커의 지표 합계를 보여준다.
+대기열 한도(LYLYL_JOB_WORKERS, LYLYL_JOB_QUEUE_SIZE)는 워커마다 적용된다.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+wsgi_app = "wsgi:app"
+bind = os.environ.get("LYLYL_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("LYLYL_WEB_WORKERS", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("LYLYL_WEB_THREADS", 2))
+timeout = int(os.environ.get("LYLYL_WEB_TIMEOUT", 120))
+graceful_timeout = 30
+
+# 마스터에서 앱(변환기 모듈, 프로필)을 한 번 불러온 뒤 워커를 fork
+preload_app = True
+
+# 워커끼리 공유할 디렉토리 (앱을 불러오기 전에 환경 변수로 지정해 워커가 물려받음)
+_shared_dirs = []
+if workers > 1:
+    for name, prefix in (("LYLYL_JOB_DIR", "lylyl_jobs_"), ("LYLYL_METRICS_DIR", "lylyl_metrics_")):
+        if not os.environ.get(name):
+            os.environ[name] = tempfile.mkdtemp(prefix=prefix)
+            _shared_dirs.append(os.environ[name])
+
+# 큰 변환을 반복하면 pandas 메모리가 조각나므로 일정 요청마다 워커를 새로 띄움
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_exit(server):
+    # 직접 만든 임시 디렉토리만 지움 (환경 변수로 지정한 디렉토리는 그대로)
+    for path in _shared_dirs:
+        shutil.rmtree(path, ignore_errors=True)
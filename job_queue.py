@@ -0,0 +1,439 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import conversion_metrics
+from conversion_cache import CachedConversion
+
+# 기본 설정
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MAX_PENDING = 8
+DEFAULT_JOB_TTL = 600  # 완료된 작업 결과 보관 시간 (초)
+
+
+class QueueFull(Exception):
+    """대기 중인 작업이 한도를 넘었을 때 발생 (HTTP 429, available: 지금 더 받을 수 있는 작업 수)"""
+
+    def __init__(self, message, available=0):
+        super().__init__(message)
+        self.available = available
+
+
+class WorkerPoolBroken(Exception):
+    """작업 프로세스가 비정상 종료(메모리 부족 등)되어 풀을 다시 만들었을 때 발생 (HTTP 503, 다시 요청하면 새 풀에서 처리)"""
+
+
+def _warm_worker():
+    # 작업 프로세스 시작 시 pandas/openpyxl과 프로필을 미리 불러옴 (첫 작업이 기다리지 않도록)
+    # 이미 불러온 프로세스(preload 후 fork)에서는 바로 끝남
+    # 단계 기록은 요청을 받은 프로세스가 dispatch로 받아 집계하므로 여기서는 공유 지표 파일에 쓰지 않음
+    conversion_metrics.METRICS.directory = None
+    from auto_convert_excel import preload
+    preload()
+
+
+def _convert_job(data, filename, options):
+    # 작업 프로세스에서 실행: 결과를 프로세스 간에 넘길 수 있도록 bytes로 돌려줌
+    # 단계 기록도 함께 돌려줘서 요청을 받은 프로세스의 지표(/metrics)에 반영
+    from auto_convert_excel import convert_export
+    with conversion_metrics.collect_stages() as stages:
+        result = convert_export(data, filename=filename, **options)
+    return CachedConversion(result.output.getvalue(), result.start_date, result.end_date), stages
+
+
+class Job:
+    """변환 작업 하나의 상태"""
+
+    def __init__(self, filename, future=None, result=None):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.created_at = time.time()
+        self.finished_at = time.time() if result is not None else None
+        self._future = future
+        self._result = result
+        # 다운로드 파일명 (확장자 제외, 큐의 namer로 완료될 때 한 번만 정함)
+        self.output_name = None
+        # 완료 처리(지표, 캐시, 파일명)까지 끝나면 설정
+        self._finished = threading.Event()
+        if result is not None:
+            self._finished.set()
+
+    @property
+    def status(self):
+        # queued → running → done / failed (변환이 끝나도 완료 처리 전까지는 running)
+        if self._result is not None:
+            return "done"
+        if self._finished.is_set():
+            return "failed" if self._future.exception() is not None else "done"
+        if self._future.running() or self._future.done():
+            return "running"
+        return "queued"
+
+    @property
+    def result(self):
+        """완료된 변환 결과 (CachedConversion), 완료 전이면 None"""
+        if self._result is None and self._finished.is_set() and self._future.exception() is None:
+            self._result = self._future.result()[0]
+        return self._result
+
+    def wait(self, timeout=None):
+        """작업이 끝날 때까지 기다려 결과(CachedConversion)를 돌려주는 함수 (변환이 실패했으면 그 예외 발생)"""
+        if self._result is None:
+            result = self._future.result(timeout)[0]
+            self._finished.wait(timeout)
+            self._result = result
+        return self._result
+
+    @property
+    def error(self):
+        if self._future is not None and self._future.done() and self._future.exception() is not None:
+            return str(self._future.exception())
+        return None
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class StoredJob:
+    """
+    다른 웹 워커가 받은 작업 (JobStore에서 읽은 상태, Job과 같은 속성)
+
+    작업을 받은 워커만 실행 상태를 알기 때문에 완료 전에는 queued로 보인다.
+    """
+
+    def __init__(self, record, store):
+        self.id = record["job_id"]
+        self.filename = record["filename"]
+        self.status = record["status"]
+        self.error = record["error"]
+        self.created_at = record["created_at"]
+        self.finished_at = record["finished_at"]
+        self.output_name = record.get("output_name")
+        self._record = record
+        self._store = store
+
+    @property
+    def result(self):
+        """완료된 변환 결과 (CachedConversion), 완료 전이거나 결과가 이미 지워졌으면 None"""
+        if self.status != "done":
+            return None
+        return self._store.result(self.id, self._record)
+
+    def to_dict(self):
+        return {key: self._record[key]
+                for key in ("job_id", "filename", "status", "error", "created_at", "finished_at")}
+
+
+class JobStore:
+    """
+    작업 상태와 결과를 디렉토리에 저장해 여러 웹 워커(gunicorn)가 함께 보도록 하는 저장소
+
+    작업 id마다 {id}.json(상태)과 {id}.bin(변환 결과)을 둔다. 작업을 받은 워커가 등록할 때와
+    끝날 때 쓰고, 다른 워커는 /jobs/<id> 요청에서 읽기만 한다.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def save(self, job):
+        """작업 상태를 저장 (완료된 작업은 결과도 함께, 결과를 먼저 써서 done 상태에는 항상 결과가 있음)"""
+        result = job.result
+        if result is not None:
+            self._write_file(self._path(job.id, ".bin"), result.data)
+        record = {
+            **job.to_dict(),
+            "output_name": job.output_name,
+            "start_date": result.start_date if result is not None else None,
+            "end_date": result.end_date if result is not None else None,
+            "pid": os.getpid(),
+        }
+        self._write_file(self._path(job.id, ".json"), json.dumps(record, ensure_ascii=False).encode("utf-8"))
+
+    def load(self, job_id):
+        """저장된 작업 (없으면 None)"""
+        # 작업 id는 uuid hex만 받음 (경로 조작 방지)
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self._path(job_id, ".json"), encoding="utf-8") as f:
+                return StoredJob(json.load(f), self)
+        except (OSError, ValueError):
+            return None
+
+    def result(self, job_id, record):
+        try:
+            with open(self._path(job_id, ".bin"), "rb") as f:
+                return CachedConversion(f.read(), record["start_date"], record["end_date"])
+        except OSError:
+            return None
+
+    def remove(self, job_id):
+        for suffix in (".json", ".bin"):
+            try:
+                os.remove(self._path(job_id, suffix))
+            except OSError:
+                pass
+
+    def expire(self, ttl):
+        """
+        끝난 지 ttl초가 지난 작업과, 받은 워커가 끝나서(재시작 등) 더는 완료되지 않을 작업을 지우는 함수
+        """
+        now = time.time()
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            job_id = name[:-len(".json")]
+            job = self.load(job_id)
+            if job is None:
+                continue
+            if job.finished_at is not None:
+                expired = now - job.finished_at > ttl
+            else:
+                expired = not _process_alive(job._record["pid"])
+            if expired:
+                self.remove(job_id)
+
+    def _path(self, job_id, suffix):
+        return os.path.join(self.directory, f"{job_id}{suffix}")
+
+    @staticmethod
+    def _write_file(path, data):
+        # 임시 파일에 쓴 뒤 이름을 바꿔서 다른 워커가 반쯤 쓴 파일을 읽지 않도록 함
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # 다른 사용자의 프로세스 (살아 있음)
+        pass
+    return True
+
+
+def as_completed_jobs(jobs):
+    """
+    작업을 끝나는 순서대로 돌려주는 제너레이터
+
+    캐시에서 바로 완료된 작업을 먼저 돌려주고, 나머지는 변환이 끝나는 대로 돌려준다.
+    """
+    pending = {}
+    for job in jobs:
+        if job._future is None:
+            yield job
+        else:
+            pending[job._future] = job
+    for future in as_completed(pending):
+        yield pending[future]
+
+
+class ConversionJobQueue:
+    """
+    변환 작업을 제한된 작업자 풀에서 비동기로 처리하는 큐
+
+    실행 중 + 대기 중인 작업이 max_workers + max_pending을 넘으면 QueueFull을 발생시켜
+    요청을 거절한다 (백프레셔). 완료된 작업은 ttl초가 지나면 지운다.
+    namer를 지정하면 작업이 끝날 때 결과(CachedConversion)로 한 번 호출해 Job.output_name에 저장한다
+    (버전 번호처럼 다운로드할 때마다 새로 정하면 안 되는 파일명).
+
+    작업과 한도는 큐를 만든 프로세스에 있다. 여러 웹 워커가 각자 큐를 가질 때 store(JobStore)를
+    지정하면 다른 워커가 받은 작업도 get()으로 상태와 결과를 볼 수 있다.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, max_pending=DEFAULT_MAX_PENDING,
+                 ttl=DEFAULT_JOB_TTL, cache=None, use_processes=True, namer=None, store=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.cache = cache
+        self.namer = namer
+        self.store = store
+        # 변환은 CPU 작업이므로 기본은 프로세스 풀
+        self.use_processes = use_processes
+        self._executor = self._new_executor()
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, cache=None, namer=None, prefix="LYLYL_JOB"):
+        """
+        환경 변수로 작업 큐를 만드는 함수
+
+        - {prefix}_WORKERS: 동시에 변환할 작업 수
+        - {prefix}_QUEUE_SIZE: 추가로 대기할 수 있는 작업 수
+        - {prefix}_TTL: 완료된 작업 결과 보관 시간 (초)
+        - {prefix}_DIR: 작업 상태/결과를 웹 워커끼리 공유할 디렉토리 (없으면 이 프로세스에만 보관,
+          gunicorn.conf.py는 워커가 여럿이면 임시 디렉토리를 지정)
+        """
+        directory = os.environ.get(f"{prefix}_DIR") or None
+        return cls(
+            max_workers=int(os.environ.get(f"{prefix}_WORKERS", DEFAULT_MAX_WORKERS)),
+            max_pending=int(os.environ.get(f"{prefix}_QUEUE_SIZE", DEFAULT_MAX_PENDING)),
+            ttl=float(os.environ.get(f"{prefix}_TTL", DEFAULT_JOB_TTL)),
+            cache=cache,
+            namer=namer,
+            store=JobStore(directory) if directory else None,
+        )
+
+    @property
+    def capacity(self):
+        """실행 중 + 대기 중으로 받을 수 있는 최대 작업 수"""
+        return self.max_workers + self.max_pending
+
+    def active_count(self):
+        """실행 중이거나 대기 중인 작업 수"""
+        with self._lock:
+            return self._active_count()
+
+    def submit(self, data, filename, **options):
+        """
+        변환 작업을 등록하는 함수
+
+        캐시에 같은 결과가 있으면 바로 완료된 작업으로 등록한다.
+
+        Returns:
+            Job
+
+        Raises:
+            QueueFull: 실행 중 + 대기 중인 작업이 한도를 넘은 경우
+            WorkerPoolBroken: 작업 프로세스가 비정상 종료되어 풀을 다시 만든 경우
+        """
+        return self.submit_many([(data, filename)], **options)[0]
+
+    def submit_many(self, uploads, **options):
+        """
+        여러 변환 작업을 한 번에 등록하는 함수 (일부만 받고 나머지를 거절하지 않음)
+
+        캐시에 없는 작업을 모두 받을 자리가 있는지 확인하고 풀에 넣는 것을 한 잠금 안에서 해서
+        동시에 들어온 요청이 한도를 넘지 않게 한다.
+
+        Args:
+            uploads: (파일 데이터, 파일 이름) 목록
+
+        Returns:
+            Job 목록 (uploads 순서)
+
+        Raises:
+            QueueFull: 자리가 모자란 경우 (아무 작업도 등록하지 않음)
+            WorkerPoolBroken: 작업 프로세스가 비정상 종료되어 풀을 다시 만든 경우
+        """
+        self._expire()
+
+        jobs, pending = [], []
+        for data, filename in uploads:
+            key = None
+            if self.cache is not None:
+                key = self.cache.key(data, **options)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    job = Job(filename, result=cached)
+                    self._name(job, cached)
+                    jobs.append(job)
+                    continue
+            job = Job(filename)
+            jobs.append(job)
+            pending.append((job, data, key))
+
+        with self._lock:
+            available = self.capacity - self._active_count()
+            if len(pending) > available:
+                raise QueueFull("변환 대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요.", max(available, 0))
+            try:
+                for job, data, _ in pending:
+                    job._future = self._executor.submit(_convert_job, data, job.filename, options)
+            except BrokenExecutor:
+                # 작업 프로세스 하나가 죽으면 풀 전체가 더 이상 작업을 받지 않으므로 새 풀로 바꿈
+                self._restart_executor()
+                raise WorkerPoolBroken("변환 작업자가 비정상 종료되어 다시 시작했습니다. 잠시 후 다시 시도해주세요.")
+            for job in jobs:
+                self._jobs[job.id] = job
+
+        # 완료 처리(_finish)가 저장하기 전에 등록 상태를 먼저 저장
+        for job in jobs:
+            self._save(job)
+        for job, _, key in pending:
+            job._future.add_done_callback(lambda f, job=job, key=key: self._finish(job, key, f))
+        return jobs
+
+    def get(self, job_id):
+        """
+        작업 id로 작업을 찾는 함수 (없거나 만료되었으면 None)
+
+        이 프로세스가 받은 작업이 아니면 store에 저장된 작업(StoredJob)을 돌려준다.
+        """
+        self._expire()
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = self.store.load(job_id)
+        return job
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def _new_executor(self):
+        if self.use_processes:
+            return ProcessPoolExecutor(max_workers=self.max_workers, initializer=_warm_worker)
+        return ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def _restart_executor(self):
+        # 잠금 안에서 호출: 이미 깨진 풀의 작업은 실패로 끝나 있으므로 기다리지 않음
+        broken, self._executor = self._executor, self._new_executor()
+        broken.shutdown(wait=False)
+
+    def _active_count(self):
+        # 잠금 안에서 호출
+        return sum(1 for job in self._jobs.values() if job.status in ("queued", "running"))
+
+    def _finish(self, job, key, future):
+        try:
+            if future.exception() is not None:
+                return
+            result, stages = future.result()
+            if self.use_processes:
+                # 스레드 풀이면 같은 프로세스에서 이미 훅이 호출됨
+                for record in stages:
+                    conversion_metrics.dispatch(record)
+            if self.cache is not None and key is not None:
+                self.cache.put(key, result.data, result.start_date, result.end_date)
+            self._name(job, result)
+        finally:
+            job.finished_at = time.time()
+            job._finished.set()
+            self._save(job)
+
+    def _name(self, job, result):
+        if self.namer is not None:
+            job.output_name = self.namer(result)
+
+    def _save(self, job):
+        if self.store is not None:
+            self.store.save(job)
+
+    def _expire(self):
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and now - job.finished_at > self.ttl]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if self.store is not None:
+            for job_id in expired:
+                self.store.remove(job_id)
+            self.store.expire(self.ttl)
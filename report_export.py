@@ -0,0 +1,218 @@
+"""
+변환 결과를 엑셀 없이 내보내기 (대시보드용 JSON / Arrow / HTML 표)
+
+openpyxl로 xlsx를 만들지 않고, 변환된 데이터프레임과 엑셀과 같은 기준의 색상 단계(assign_tiers)를
+그대로 직렬화한다.
+  - 열 단위 JSON: {"columns": [...], "data": {열: [값...]}, "tiers": {열: [단계...]}, ...}
+  - Arrow IPC 스트림: 값 열 + "열:tier" 색상 단계 열 (pyarrow 필요)
+  - HTML 표: 엑셀과 같은 숫자 형식과 셀 색상(style 속성)을 적용한 <table>
+"""
+import html
+import json
+from datetime import date, datetime
+from typing import NamedTuple, Optional
+
+import pandas as pd
+
+import auto_convert_excel as converter
+from conversion_metrics import stage
+from conversion_profile import load_profile
+
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+
+# 색상 단계 열 이름 접미사 (Arrow)
+TIER_SUFFIX = ":tier"
+
+# 엑셀 숫자 형식 → 화면 표시 형식 (HTML 표, Streamlit 미리보기)
+DISPLAY_FORMATS = {
+    "#,##0원": "{:,.0f}원",
+    "#,##0": "{:,.0f}",
+    "0.00": "{:.2f}",
+    "0": "{:.0f}",
+    "0.00%": "{:.2%}",
+    "0%": "{:.0%}",
+}
+
+
+class ConvertedTable(NamedTuple):
+    """엑셀로 저장하기 전의 변환 결과"""
+    data: pd.DataFrame
+    tiers: pd.DataFrame
+    start_date: Optional[str]
+    end_date: Optional[str]
+    profile: object
+
+
+def convert_table(source, profile=None, limit=None, filename=None):
+    """
+    업로드(bytes, 파일 객체, 경로)를 읽어 변환하고 색상 단계까지 계산하는 함수
+
+    Args:
+        source: 원본 파일 경로, bytes 또는 파일 객체
+        profile: 변환 프로필 이름/경로 또는 CompiledProfile (None이면 기본 프로필)
+        limit: 지정하면 변환 결과의 상위 limit행만 (정렬 후)
+        filename: bytes/파일 객체의 원래 파일 이름 (엑셀 이름인데 엑셀 형식이 아니면 NotExcelFile)
+    """
+    profile = load_profile(profile)
+    df = converter.read_export(source, profile=profile, filename=filename)
+    start_date, end_date = converter.report_date_range(df, profile)
+    with stage("transform", profile.name, rows=len(df)):
+        converted = converter.transform_export(df, profile)
+    if limit is not None:
+        converted = converted.head(limit)
+    with stage("style", profile.name, rows=len(converted)):
+        tiers = converter.assign_tiers(converted, profile)
+    return ConvertedTable(converted, tiers, start_date, end_date, profile)
+
+
+def _json_values(values):
+    # NaN → null, 날짜 → YYYY-MM-DD, numpy 값 → 파이썬 값
+    if pd.api.types.is_float_dtype(values):
+        return [None if value != value else value for value in values.tolist()]
+    return [None if value is None or (not isinstance(value, str) and pd.isna(value))
+            else value.strftime("%Y-%m-%d") if isinstance(value, (datetime, date)) else value
+            for value in values.tolist()]
+
+
+def to_columnar_json(table):
+    """
+    변환 결과를 열 단위 JSON 문자열로 만드는 함수
+
+    tiers의 행 색상 열(상태)은 row_tier_columns 열 전체에 적용되는 단계이고,
+    나머지는 해당 지표 셀의 단계다. 색상 단계가 없는 셀은 null.
+    """
+    profile = table.profile
+    body = {
+        "profile": profile.name,
+        "start_date": table.start_date,
+        "end_date": table.end_date,
+        "rows": len(table.data),
+        "columns": list(table.data.columns),
+        "data": {column: _json_values(table.data[column]) for column in table.data.columns},
+        "tiers": {column: _json_values(table.tiers[column]) for column in table.tiers.columns},
+        "row_tier_columns": profile.row_tiers["columns"] if profile.row_tiers else [],
+        "tier_colors": profile.tier_colors,
+        "number_formats": profile.number_formats,
+    }
+    return json.dumps(body, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+
+def to_arrow_ipc(table):
+    """
+    변환 결과를 Arrow IPC 스트림(bytes)으로 만드는 함수
+
+    색상 단계는 "열:tier" 문자열 열로, 프로필 이름/보고 기간/색상 코드는 스키마 메타데이터로 넣는다.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("Arrow 출력에는 pyarrow가 필요합니다 (pip install pyarrow)") from e
+
+    frame = table.data.copy()
+    for column in frame.columns:
+        if frame[column].dtype == object:
+            frame[column] = _json_values(frame[column])
+    for column in table.tiers.columns:
+        frame[f"{column}{TIER_SUFFIX}"] = table.tiers[column].astype(object).where(table.tiers[column].notna(), None)
+    arrow_table = pa.Table.from_pandas(frame, preserve_index=False)
+    metadata = {
+        "profile": table.profile.name,
+        "start_date": table.start_date or "",
+        "end_date": table.end_date or "",
+        "tier_colors": json.dumps(table.profile.tier_colors),
+        "row_tier_columns": json.dumps(table.profile.row_tiers["columns"] if table.profile.row_tiers else [],
+                                       ensure_ascii=False),
+    }
+    arrow_table = arrow_table.replace_schema_metadata({**(arrow_table.schema.metadata or {}), **metadata})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
+        writer.write_table(arrow_table)
+    return sink.getvalue().to_pybytes()
+
+
+def _display_date(value, date_format):
+    # 엑셀과 같은 "04월14일" 형식, 변환할 수 없는 값은 그대로
+    try:
+        return converter.format_report_date(value, date_format)
+    except (TypeError, ValueError):
+        return value
+
+
+def _general(value):
+    # 숫자 형식이 없는 셀: 엑셀 "일반" 형식처럼 정수는 소수점 없이
+    if isinstance(value, float):
+        return f"{value:.10g}"
+    return str(value)
+
+
+def display_formatters(df, profile=None):
+    """열별 화면 표시 함수 {열: 값 → 문자열} (엑셀 숫자/날짜 형식과 같은 모양, 빈 값은 호출하는 쪽에서 처리)"""
+    profile = load_profile(profile)
+    formatters = {key: DISPLAY_FORMATS[number_format].format
+                  for key, number_format in profile.number_formats.items()
+                  if key in df and number_format in DISPLAY_FORMATS}
+    for key, date_format in profile.date_formats.items():
+        if key in df:
+            formatters[key] = lambda value, date_format=date_format: str(_display_date(value, date_format))
+    return formatters
+
+
+def tier_fill_colors(df, tiers, profile=None):
+    """
+    셀별 배경색 코드(RRGGBB) 데이터프레임 (df와 같은 모양, 색상이 없는 셀은 NaN)
+
+    엑셀과 같이 행 색상(상태 단계)을 먼저 칠하고 지표 색상으로 덮어쓴다.
+    """
+    profile = load_profile(profile)
+    colors = pd.DataFrame(index=df.index, columns=df.columns, dtype=object)
+    if profile.row_tiers and profile.row_tiers["status_column"] in tiers:
+        row_colors = tiers[profile.row_tiers["status_column"]].map(profile.tier_colors)
+        for key in profile.row_tiers["columns"]:
+            if key in colors:
+                colors[key] = row_colors
+    for key in profile.tier_thresholds:
+        if key in tiers and key in colors:
+            colors[key] = tiers[key].map(profile.tier_colors)
+    return colors
+
+
+def styled_table(df, profile=None, tiers=None):
+    """
+    엑셀과 같은 숫자 형식과 색상 단계를 적용한 pandas Styler를 만드는 함수 (Streamlit 미리보기 등 작은 표용)
+
+    Args:
+        df: 변환된 데이터프레임
+        profile: 변환 프로필
+        tiers: assign_tiers 결과 (None이면 여기서 계산)
+    """
+    profile = load_profile(profile)
+    if tiers is None:
+        tiers = converter.assign_tiers(df, profile)
+    styles = ("background-color: #" + tier_fill_colors(df, tiers, profile)).fillna("")
+    return (df.style.apply(lambda _: styles, axis=None)
+            .format(display_formatters(df, profile), na_rep="")
+            .hide(axis="index"))
+
+
+def to_html_table(table):
+    """
+    변환 결과를 HTML <table> 문자열로 만드는 함수
+
+    숫자 형식은 엑셀과 같은 모양으로, 색상은 셀마다 style 속성으로 넣는다 (따로 CSS가 필요 없음).
+    Styler보다 훨씬 빨라 큰 표도 열 단위로 바로 만든다.
+    """
+    df = table.data
+    colors = tier_fill_colors(df, table.tiers, table.profile)
+    formatters = display_formatters(df, table.profile)
+
+    cells = []
+    for column in df.columns:
+        format_value = formatters.get(column, _general)
+        texts = ["" if value is None or (not isinstance(value, str) and pd.isna(value))
+                 else html.escape(format_value(value)) for value in df[column].tolist()]
+        styles = (' style="background-color:#' + colors[column] + '"').fillna("").tolist()
+        cells.append([f"<td{style}>{text}</td>" for style, text in zip(styles, texts)])
+
+    header = "".join(f"<th>{html.escape(str(column))}</th>" for column in df.columns)
+    body = "".join(f"<tr>{''.join(row)}</tr>" for row in zip(*cells))
+    return f'<table class="lylyl-report"><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>'
@@ -0,0 +1,128 @@
+"""
+대용량 광고 데이터 스트리밍 변환
+
+입력을 chunk_size 행씩 읽어 변환하고, 묶음마다 정렬해 임시 파일로 내보낸 뒤
+(정렬된 묶음), 모든 묶음을 상태/광고비 순으로 병합하면서 write-only 시트에 기록한다.
+정렬이 안정적이므로 결과는 한 번에 변환한 것(auto_convert_excel.convert_export)과 같다.
+
+최대 메모리는 입력 크기와 관계없이 대략 다음을 넘지 않는다.
+  - 원본 한 묶음(chunk_size 행)과 그 변환 결과
+  - 병합 버퍼: 묶음 수 × SPILL_BATCH_SIZE 행
+  - openpyxl 읽기 전용/write-only 워크북 (행을 임시 파일로 바로 내보냄)
+예) 10만 행 파일: 한 번에 변환하면 최대 약 400MB, chunk_size 20,000이면 약 180MB
+(pandas/openpyxl 자체 약 100MB 포함). 행 수가 늘어도 묶음 수만큼의 병합 버퍼만 늘어난다.
+메모리가 더 빠듯하면 chunk_size를 줄이면 된다 (묶음 수가 늘어 병합이 조금 느려짐).
+"""
+import heapq
+import os
+import pickle
+import tempfile
+from io import BytesIO
+from itertools import islice
+
+import auto_convert_excel as converter
+import excel_reader
+from conversion_metrics import stage
+from conversion_profile import load_profile
+
+# 정렬된 묶음을 임시 파일에 쓰고 다시 읽을 때 한 번에 다루는 행 수
+SPILL_BATCH_SIZE = 1000
+
+
+def _write_run(directory, index, rows):
+    # 정렬된 묶음을 SPILL_BATCH_SIZE 행씩 나눠 임시 파일에 저장
+    path = os.path.join(directory, f"run_{index:05d}.pkl")
+    rows = iter(rows)
+    with open(path, "wb") as f:
+        while True:
+            batch = list(islice(rows, SPILL_BATCH_SIZE))
+            if not batch:
+                break
+            pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _read_run(path):
+    # 임시 파일의 묶음을 SPILL_BATCH_SIZE 행씩 읽어 한 행씩 돌려줌
+    with open(path, "rb") as f:
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+            yield from batch
+
+
+def _merge_key(profile, columns):
+    # transform_export와 같은 순서 (기본 프로필: ON → OFF → 그 외, 각 상태 내에서 광고비 높은 순)
+    row_key = profile.row_sort_key(columns)
+
+    def key(row):
+        return row_key(row[0])
+    return key
+
+
+def convert_streaming(source, output_path=None, chunk_size=excel_reader.DEFAULT_CHUNK_SIZE,
+                      conditional_formatting=False, profile=None, rollups=True, filename=None):
+    """
+    대용량 파일을 나눠 읽어 메모리 사용량을 제한하며 변환하는 함수
+
+    Args:
+        source: 파일 경로, bytes 또는 파일 객체 (.xlsx, .csv)
+        output_path: 변환된 파일 저장 경로 (또는 파일 객체), None이면 메모리(BytesIO)에 저장
+        chunk_size: 한 번에 읽고 변환할 행 수
+        conditional_formatting: True이면 조건부 서식 규칙으로 색상 적용
+        profile: 변환 프로필 이름/경로 또는 CompiledProfile (None이면 기본 프로필)
+        rollups: True이면 집계 시트 추가 (묶음별 합계를 모아 마지막에 비율 지표 계산)
+        filename: bytes/파일 객체 입력의 원래 파일 이름 (엑셀 이름인데 엑셀 형식이 아니면 NotExcelFile)
+
+    Returns:
+        ConversionResult (output_path 또는 BytesIO, 보고 시작일, 보고 종료일)
+    """
+    profile = load_profile(profile)
+    columns = profile.output_columns
+    date_range = None
+    partial_rollups = []
+    rollup_rows = 0
+
+    with tempfile.TemporaryDirectory(prefix="lylyl_") as spill_dir:
+        # 1차: 묶음별로 변환·정렬해서 임시 파일로 내보내기
+        run_paths = []
+        with stage("spill", "streaming", rows=0) as s:
+            chunks = excel_reader.iter_export_chunks(
+                source, columns=profile.read_columns, dtypes=profile.read_dtypes, chunk_size=chunk_size,
+                filename=filename)
+            for chunk in chunks:
+                s.rows += len(chunk)
+                if date_range is None:
+                    date_range = converter.report_date_range(chunk, profile)
+                prepared = profile.prepare(chunk)
+                if rollups and profile.rollup_sheets:
+                    partial_rollups.append(profile.rollup_sums(prepared))
+                    rollup_rows += len(prepared)
+                converted = prepared[columns]
+                if converted.empty:
+                    continue
+                rows = converter.iter_tier_rows(converted, conditional_formatting, profile)
+                run_paths.append(_write_run(spill_dir, len(run_paths), rows))
+
+        if date_range is None:
+            raise ValueError("변환할 데이터가 없습니다.")
+
+        summary = None
+        if partial_rollups:
+            # 행 수는 한 번에 변환할 때(len(prepared))와 같이 묶음 합계에 들어간 전체 행 수
+            with stage("rollup", profile.name, rows=rollup_rows):
+                summary = profile.finish_rollups(partial_rollups)
+
+        # 2차: 정렬된 묶음을 병합하면서 바로 기록
+        merged = heapq.merge(*(_read_run(path) for path in run_paths),
+                             key=_merge_key(profile, columns))
+        output = BytesIO() if output_path is None else output_path
+        with stage("merge_write", "streaming") as s:
+            s.rows = converter.write_styled_rows(columns, merged, output, conditional_formatting, profile,
+                                                 rollups=summary)
+
+    if output_path is None:
+        output.seek(0)
+    return converter.ConversionResult(output, *date_range)
@@ -1,9 +1,9 @@
 import streamlit as st
-import pandas as pd
-import os
-from auto_convert_excel import convert_excel_file
+from io import BytesIO
+from auto_convert_excel import ConversionResult, read_export, report_date_range, write_styled_workbook
+from conversion_profile import DEFAULT_PROFILE, available_profiles, load_profile
+from report_export import styled_table
 from datetime import datetime
-import tempfile
 
 st.set_page_config(
     page_title="LYLYL 광고 데이터 변환기",
@@ -15,48 +15,79 @@ st.title("LYLYL 광고 데이터 변환기")
 
 st.markdown("""
 ### 사용 방법
-1. Meta 광고 데이터 Excel 파일(.xlsx 또는 .xls)을 선택하세요.
+1. Meta 광고 데이터 Excel 파일(.xlsx, .xls) 또는 CSV 파일을 선택하세요.
 2. '변환하기' 버튼을 클릭하면 자동으로 데이터가 변환됩니다.
 3. 변환된 파일은 자동으로 다운로드됩니다.
 4. 파일명은 'LYLYL_시작일_종료일_버전.xlsx' 형식으로 저장됩니다.
 """)
 
-uploaded_file = st.file_uploader("Excel 파일을 선택하세요", type=['xlsx', 'xls'])
+# 미리보기 기본 행 수
+PREVIEW_ROWS = 20
 
-if uploaded_file is not None:
-    try:
-        # 임시 파일로 저장
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_input:
-            tmp_input.write(uploaded_file.getvalue())
-            input_path = tmp_input.name
+# 스크립트는 위젯을 건드릴 때마다 처음부터 다시 실행되므로, 무거운 단계는 업로드 내용(bytes)을 키로 캐시한다.
+# 같은 파일을 다시 올리거나 다른 세션에서 올려도 읽기/변환을 다시 하지 않는다.
+@st.cache_data(max_entries=16, show_spinner="파일을 읽고 변환하는 중...")
+def load_converted(data, profile, filename=None):
+    # 업로드 파일을 한 번만 읽어서 파일명(보고 기간), 변환 결과, 집계 시트(캠페인별, 주별 등)를 함께 만듦
+    # (filename은 엑셀 이름인데 엑셀 형식이 아닌 파일을 거절하는 데 사용)
+    compiled = load_profile(profile)
+    df = read_export(data, profile=compiled, filename=filename)
+    start_date, end_date = report_date_range(df, compiled)
+    prepared = compiled.prepare(df)
+    rollups = compiled.rollups(prepared) if compiled.rollup_sheets else None
+    return prepared[compiled.output_columns], rollups, ConversionResult(None, start_date, end_date).base_filename
+
+@st.cache_data(max_entries=16, show_spinner="엑셀 파일을 만드는 중...")
+def build_workbook(data, profile, filename=None):
+    converted, rollups, _ = load_converted(data, profile, filename)
+    output = BytesIO()
+    write_styled_workbook(converted, output, profile=profile, rollups=rollups)
+    return output.getvalue()
+
+uploaded_file = st.file_uploader("Excel 또는 CSV 파일을 선택하세요", type=['xlsx', 'xls', 'csv'])
 
-        # 임시 출력 파일 경로 생성
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_output:
-            output_path = tmp_output.name
+# 변환 프로필 (profiles 디렉토리의 JSON/YAML, 프로세스마다 한 번만 컴파일)
+profiles = available_profiles()
+profile = DEFAULT_PROFILE
+if len(profiles) > 1:
+    profile = st.selectbox("변환 프로필", profiles,
+                           index=profiles.index(DEFAULT_PROFILE) if DEFAULT_PROFILE in profiles else 0)
 
-        # 파일 변환
-        convert_excel_file(input_path, output_path)
+if uploaded_file is not None:
+    try:
+        # 같은 업로드와 프로필이면 세션에 보관한 결과를 그대로 사용
+        # (다운로드 버튼이나 미리보기 행 수를 바꿔 다시 실행될 때 업로드 내용을 다시 해시하지 않음)
+        key = (uploaded_file.file_id, profile)
+        conversion = st.session_state.get("conversion")
+        if conversion is None or conversion["key"] != key:
+            data = uploaded_file.getvalue()
+            converted, _, base_filename = load_converted(data, profile, uploaded_file.name)
+            conversion = {
+                "key": key,
+                "converted": converted,
+                "filename": f"{base_filename}.xlsx",
+                "xlsx": build_workbook(data, profile, uploaded_file.name),
+            }
+            st.session_state["conversion"] = conversion
 
         # 변환된 파일 다운로드 버튼 생성
-        with open(output_path, 'rb') as f:
-            df = pd.read_excel(input_path)
-            start_date = pd.to_datetime(df['보고 시작'].iloc[0]).strftime('%y%m%d')
-            end_date = pd.to_datetime(df['보고 종료'].iloc[0]).strftime('%y%m%d')
-            output_filename = f"LYLYL_{start_date}_{end_date}.xlsx"
-            
-            st.download_button(
-                label="변환된 파일 다운로드",
-                data=f,
-                file_name=output_filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-            
-        # 임시 파일 삭제
-        os.unlink(input_path)
-        os.unlink(output_path)
+        st.download_button(
+            label="변환된 파일 다운로드",
+            data=conversion["xlsx"],
+            file_name=conversion["filename"],
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
 
         st.success("✅ 변환이 완료되었습니다!")
-        
+
+        # 미리보기 (캐시된 변환 결과에서 상위 N행만)
+        converted = conversion["converted"]
+        st.subheader(f"미리보기 (전체 {len(converted):,}행)")
+        rows = st.number_input("표시할 행 수", min_value=1, max_value=max(len(converted), 1),
+                               value=min(PREVIEW_ROWS, max(len(converted), 1)), step=10)
+        # 엑셀과 같은 숫자 형식과 색상 단계 (report_export.styled_table)
+        st.dataframe(styled_table(converted.head(int(rows)), profile), use_container_width=True, hide_index=True)
+
     except Exception as e:
         st.error(f"❌ 오류가 발생했습니다: {str(e)}")
-        st.error("파일 형식을 확인해주세요.") 
\ No newline at end of file
+        st.error("파일 형식을 확인해주세요.")
@@ -0,0 +1,50 @@
+"""app.py 요청 검증 테스트"""
+import io
+
+import pytest
+
+import app
+from generate_export import generate_export, write_export
+
+
+@pytest.fixture
+def client():
+    app.app.config["TESTING"] = True
+    return app.app.test_client()
+
+
+@pytest.fixture
+def export_bytes(tmp_path):
+    path = tmp_path / "export.xlsx"
+    write_export(generate_export(50, seed=5), str(path))
+    return path.read_bytes()
+
+
+def post_convert(client, data, rows):
+    return client.post(f"/api/convert?rows={rows}", data={"file": (io.BytesIO(data), "export.xlsx")},
+                       content_type="multipart/form-data")
+
+
+@pytest.mark.parametrize("rows", ["-1", "abc", "1.5", ""])
+def test_api_convert_rejects_invalid_rows(client, export_bytes, rows):
+    response = post_convert(client, export_bytes, rows)
+    assert response.status_code == 400
+    assert "rows" in response.get_json()["error"]
+
+
+def test_api_convert_limits_rows(client, export_bytes):
+    response = post_convert(client, export_bytes, "3")
+    assert response.status_code == 200
+    assert response.get_json()["rows"] == 3
+
+
+def test_api_convert_rejects_non_excel_xlsx(client):
+    response = post_convert(client, b"\xe4\xb8\x80not,a,workbook\n1,2,3\n", "3")
+    assert response.status_code == 400
+    assert "엑셀 파일이 아닙니다" in response.get_json()["error"]
+
+
+def test_upload_rejects_non_excel_xlsx(client):
+    response = client.post("/upload", data={"file": (io.BytesIO(b"a,b\n1,2\n"), "export.xlsx")},
+                           content_type="multipart/form-data")
+    assert "엑셀 파일이 아닙니다" in response.get_data(as_text=True)
@@ -0,0 +1,37 @@
+"""consolidate.py 마스터 저장소 테스트"""
+import auto_convert_excel as converter
+from consolidate import MasterStore
+from generate_export import generate_export, write_export
+
+FIRST_WEEK = ("2025-04-14", "2025-04-20")
+SECOND_WEEK = ("2025-04-21", "2025-04-27")
+
+
+def two_week_export(path):
+    # 앞 절반은 첫 주, 뒤 절반은 다음 주 (Meta 기간 나누기 내보내기)
+    df = generate_export(400, seed=3)
+    second = df.index >= len(df) // 2
+    df.loc[second, "보고 시작"], df.loc[second, "보고 종료"] = SECOND_WEEK
+    write_export(df, str(path))
+    return df
+
+
+def test_upsert_two_week_export(tmp_path):
+    export = tmp_path / "export.xlsx"
+    df = two_week_export(export)
+
+    with MasterStore(str(tmp_path / "store.sqlite")) as store:
+        results = store.upsert_export(str(export))
+        assert [result.week for result in results] == [FIRST_WEEK, SECOND_WEEK]
+        assert store.weeks() == [FIRST_WEEK, SECOND_WEEK]
+        assert store.dirty_weeks() == [FIRST_WEEK, SECOND_WEEK]
+
+        for week, result in zip([FIRST_WEEK, SECOND_WEEK], results):
+            expected = converter.transform_export(df[df["보고 시작"] == week[0]])
+            stored = store.week_frame(week)
+            assert result.inserted == len(expected) == len(stored)
+            assert list(stored["제목"]) == list(expected["제목"])
+            assert set(stored["보고 시작"]) == {week[0]}
+
+        # 같은 파일을 다시 넣으면 두 주 모두 건너뜀
+        assert all(result.skipped for result in store.upsert_export(str(export)))
@@ -0,0 +1,39 @@
+"""conversion_cache.py 디스크 캐시를 여러 프로세스(인스턴스)가 함께 쓰는지 확인하는 테스트"""
+import os
+
+from conversion_cache import ConversionCache
+
+
+def test_disk_cache_shared_between_instances(tmp_path):
+    first = ConversionCache(directory=str(tmp_path))
+    second = ConversionCache(directory=str(tmp_path))
+    first.put("a", b"converted", "250414", "250420")
+
+    cached = second.get("a")
+    assert cached is not None
+    assert (cached.data, cached.start_date, cached.end_date) == (b"converted", "250414", "250420")
+
+
+def test_disk_cache_limits_hold_across_instances(tmp_path):
+    first = ConversionCache(max_entries=2, directory=str(tmp_path))
+    second = ConversionCache(max_entries=2, directory=str(tmp_path))
+    first.put("a", b"1", None, None)
+    second.put("b", b"2", None, None)
+    # 사용 순서는 수정 시각이므로 시각을 직접 정해 순서를 고정
+    os.utime(tmp_path / "a.bin", (1, 1))
+    os.utime(tmp_path / "b.bin", (2, 2))
+    first.put("c", b"3", None, None)
+
+    assert len(second) == 2
+    assert second.get("a") is None
+    assert second.get("b") is not None and first.get("c") is not None
+
+
+def test_disk_cache_limits_total_bytes(tmp_path):
+    cache = ConversionCache(max_bytes=10, directory=str(tmp_path))
+    cache.put("a", b"x" * 6, None, None)
+    os.utime(tmp_path / "a.bin", (1, 1))
+    ConversionCache(max_bytes=10, directory=str(tmp_path)).put("b", b"y" * 6, None, None)
+
+    assert cache.get("a") is None
+    assert cache.total_bytes == 6
@@ -0,0 +1,30 @@
+"""conversion_metrics.py 지표를 여러 프로세스(gunicorn 워커)가 디렉토리로 합쳐 내보내는지 확인하는 테스트"""
+import multiprocessing
+
+from conversion_metrics import StageMetrics, StageRecord
+
+
+def observe_in_process(directory, seconds):
+    metrics = StageMetrics(directory=directory)
+    for value in seconds:
+        metrics.observe(StageRecord("lylyl", "read", value, 10, 100))
+
+
+def test_shared_directory_merges_processes(tmp_path):
+    directory = str(tmp_path)
+    processes = [multiprocessing.Process(target=observe_in_process, args=(directory, seconds))
+                 for seconds in ([0.01, 0.2], [0.2, 3.0])]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    metrics = StageMetrics(directory=directory)
+    metrics.observe(StageRecord("lylyl", "read", 0.5, 5, 400))
+
+    # 어느 프로세스에서 내보내도 모든 프로세스의 합계
+    text = metrics.render()
+    labels = 'converter="lylyl",stage="read"'
+    assert f"lylyl_stage_duration_seconds_count{{{labels}}} 5" in text
+    assert f'lylyl_stage_duration_seconds_bucket{{{labels},le="0.25"}} 3' in text
+    assert f"lylyl_stage_rows_total{{{labels}}} 45" in text
+    assert f"lylyl_stage_memory_peak_bytes{{{labels}}} 400" in text
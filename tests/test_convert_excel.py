@@ -0,0 +1,45 @@
+"""
+convert_excel.py(basic 프로필) 결과가 처음 변환기의 계산과 같은지 확인하는 회귀 테스트
+
+처음 변환기는 후크/지속을 pandas round(4) 후 0.01을 곱해 엑셀에 한 번 저장하고,
+다시 읽은 값과 CVR/CTR 보정 값을 파이썬 round(값, 4)로 기록했다.
+"""
+import openpyxl
+import pandas as pd
+import pytest
+
+import convert_excel
+from generate_export import generate_export, write_export
+
+
+def baseline_values(input_path):
+    # 처음 convert_excel.py의 계산 (엑셀 저장은 openpyxl처럼 유효숫자 16자리)
+    df = pd.read_excel(input_path)
+    df = df[df["지출 금액 (KRW)"] > 0]
+    stored = lambda value: float("%.16g" % value)
+    hook = (df["동영상 3초 이상 재생"] / df["동영상 재생"]).round(4) * 0.01
+    hold = (df["동영상 100% 재생"] / df["동영상 3초 이상 재생"]).round(4) * 0.01
+    cvr = [round(v * 0.01 if v >= 100 else v, 4) for v in df["전환율(CVR)"].map(stored)]
+    ctr = [round(v * 0.01, 4) for v in df["CTR(전체)"].map(stored)]
+    return {
+        "후크": [round(stored(v), 4) if v == v else None for v in hook],
+        "지속": [round(stored(v), 4) if v == v else None for v in hold],
+        "CVR": cvr,
+        "CTR": ctr,
+    }
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_matches_baseline_arithmetic(tmp_path, seed):
+    input_path, output_path = tmp_path / "export.xlsx", tmp_path / "converted.xlsx"
+    write_export(generate_export(4000, seed=seed), str(input_path))
+    convert_excel.convert_excel_file(str(input_path), str(output_path))
+
+    ws = openpyxl.load_workbook(output_path, read_only=True).active
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows)
+    columns = dict(zip(header, zip(*rows)))
+    for name, expected in baseline_values(input_path).items():
+        actual = [None if value is None or value != value else value for value in columns[name]]
+        mismatches = [(a, e) for a, e in zip(actual, expected) if a != e]
+        assert not mismatches, f"{name}: {len(mismatches)}개 다름, 예: {mismatches[:3]}"
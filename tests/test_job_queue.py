@@ -0,0 +1,123 @@
+"""app.py 비동기 작업 API(/jobs) 테스트: 백프레셔(429), 변환 실패(500), 작업자 풀 복구(503), 다운로드 파일명"""
+import io
+import os
+import threading
+
+import pytest
+
+import app
+import job_queue
+from conversion_cache import CachedConversion
+from generate_export import generate_export, write_export
+from version_allocator import VersionAllocator
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    app.app.config["TESTING"] = True
+    # 버전 카운터는 테스트 디렉토리에
+    monkeypatch.setattr(app, "_version_allocator", VersionAllocator(str(tmp_path)))
+    return app.app.test_client()
+
+
+@pytest.fixture
+def use_queue(monkeypatch):
+    queues = []
+
+    def use(**options):
+        queue = job_queue.ConversionJobQueue(namer=app.job_output_name, **options)
+        monkeypatch.setattr(app, "_job_queue", queue)
+        queues.append(queue)
+        return queue
+
+    yield use
+    for queue in queues:
+        queue.shutdown()
+
+
+@pytest.fixture
+def export_bytes(tmp_path):
+    path = tmp_path / "export.xlsx"
+    write_export(generate_export(50, seed=5), str(path))
+    return path.read_bytes()
+
+
+def post_job(client, data, filename="export.xlsx"):
+    return client.post("/jobs", data={"file": (io.BytesIO(data), filename)}, content_type="multipart/form-data")
+
+
+def test_queue_full_returns_429(client, use_queue, monkeypatch):
+    release = threading.Event()
+
+    def blocked_job(data, filename, options):
+        release.wait(10)
+        return CachedConversion(b"converted", "250414", "250420"), []
+
+    monkeypatch.setattr(job_queue, "_convert_job", blocked_job)
+    queue = use_queue(max_workers=1, max_pending=0, use_processes=False)
+    first = post_job(client, b"first")
+    assert first.status_code == 202
+
+    second = post_job(client, b"second")
+    assert second.status_code == 429
+    assert second.headers["Retry-After"] == "5"
+
+    release.set()
+    queue.get(first.get_json()["job_id"]).wait(10)
+    assert post_job(client, b"third").status_code == 202
+
+
+def test_failed_job_download_returns_500(client, use_queue):
+    use_queue(max_workers=1, use_processes=False)
+    job_id = post_job(client, b"a,b\n1,2\n").get_json()["job_id"]
+    with pytest.raises(ValueError):
+        app.get_job_queue().get(job_id).wait(30)
+
+    assert client.get(f"/jobs/{job_id}").get_json()["status"] == "failed"
+    response = client.get(f"/jobs/{job_id}/download")
+    assert response.status_code == 500
+    assert "엑셀 파일이 아닙니다" in response.get_json()["error"]
+
+
+def test_broken_pool_returns_503_then_recovers(client, use_queue, export_bytes):
+    queue = use_queue(max_workers=1, use_processes=True)
+    # 작업 프로세스가 비정상 종료되면 풀 전체가 깨짐
+    assert queue._executor.submit(os._exit, 1).exception(30) is not None
+
+    response = post_job(client, export_bytes)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+    # 다시 요청하면 새 풀에서 변환
+    job_id = post_job(client, export_bytes).get_json()["job_id"]
+    queue.get(job_id).wait(60)
+    assert client.get(f"/jobs/{job_id}/download").status_code == 200
+
+
+def test_download_name_allocated_once(client, use_queue, export_bytes):
+    use_queue(max_workers=1, use_processes=False)
+    job_id = post_job(client, export_bytes).get_json()["job_id"]
+    app.get_job_queue().get(job_id).wait(30)
+
+    names = [client.get(f"/jobs/{job_id}/download").headers["Content-Disposition"] for _ in range(2)]
+    assert names[0] == names[1]
+    assert names[0].endswith("_v01.xlsx")
+
+
+def test_job_visible_from_other_worker_queue(client, use_queue, tmp_path, export_bytes):
+    # gunicorn 워커 둘이 같은 작업 디렉토리를 쓰는 경우: 한쪽에서 받은 작업을 다른 쪽에서 조회/다운로드
+    other = job_queue.ConversionJobQueue(use_processes=False, store=job_queue.JobStore(str(tmp_path / "jobs")))
+    try:
+        job = other.submit(export_bytes, "export.xlsx")
+        job.wait(30)
+    finally:
+        other.shutdown()
+    use_queue(max_workers=1, use_processes=False, store=job_queue.JobStore(str(tmp_path / "jobs")))
+
+    status = client.get(f"/jobs/{job.id}")
+    assert status.status_code == 200
+    assert status.get_json()["status"] == "done"
+    response = client.get(f"/jobs/{job.id}/download")
+    assert response.status_code == 200
+    assert response.data == job.result.data
+    assert client.get("/jobs/0123456789abcdef/download").status_code == 404
@@ -0,0 +1,58 @@
+"""나눠 읽는 스트리밍 변환과 한 번에 읽는 변환의 결과가 같은지 확인하는 테스트"""
+import openpyxl
+import pandas as pd
+import pytest
+
+from auto_convert_excel import convert_export
+from conversion_profile import load_profile
+from generate_export import generate_export, write_export
+
+
+def workbook_cells(path):
+    # 시트별 (값, 숫자 형식, 배경색) 행 목록과 조건부 서식 규칙
+    wb = openpyxl.load_workbook(path)
+    cells = {ws.title: [[(cell.value, cell.number_format, cell.fill.fgColor.rgb) for cell in row]
+                        for row in ws.iter_rows()]
+             for ws in wb.worksheets}
+    rules = {ws.title: sorted((str(formatting.sqref), rule.type, tuple(rule.formula or ()))
+                              for formatting in ws.conditional_formatting for rule in formatting.rules)
+             for ws in wb.worksheets}
+    return cells, rules
+
+
+def test_chunked_rollups_match_in_memory():
+    # streaming_convert처럼 원본을 묶음별로 prepare(정렬 포함)한 뒤 합계를 모음
+    profile = load_profile("lylyl")
+    export = generate_export(20000, seed=11)
+    expected = profile.rollups(profile.prepare(export))
+    chunks = [export.iloc[start:start + 5000] for start in range(0, len(export), 5000)]
+    actual = profile.finish_rollups([profile.rollup_sums(profile.prepare(chunk)) for chunk in chunks])
+
+    assert list(actual) == list(expected)
+    for name, table in expected.items():
+        # 합계를 묶음별로 나눠 더하므로 값은 부동소수점 오차 안에서, 행 순서(동점 포함)는 그대로 같아야 함
+        pd.testing.assert_frame_equal(actual[name], table, check_exact=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize("conditional_formatting", [False, True])
+def test_streaming_workbook_matches_in_memory(tmp_path, conditional_formatting):
+    source = tmp_path / "export.xlsx"
+    write_export(generate_export(3000, seed=3), str(source))
+    in_memory = convert_export(str(source), str(tmp_path / "memory.xlsx"),
+                               conditional_formatting=conditional_formatting)
+    # 700행씩 나눠 읽어 여러 임시 실행(run)을 병합하도록
+    streaming = convert_export(str(source), str(tmp_path / "streaming.xlsx"), chunk_size=700,
+                               conditional_formatting=conditional_formatting)
+
+    assert (streaming.start_date, streaming.end_date) == (in_memory.start_date, in_memory.end_date)
+    expected, expected_rules = workbook_cells(in_memory.output)
+    actual, actual_rules = workbook_cells(streaming.output)
+    assert actual_rules == expected_rules
+    assert list(actual) == list(expected)
+    for name, rows in expected.items():
+        assert len(actual[name]) == len(rows), name
+        for row_index, (actual_row, expected_row) in enumerate(zip(actual[name], rows)):
+            # 집계 시트 합계는 묶음별로 나눠 더하므로 부동소수점 오차만 허용
+            assert [value for value, _, _ in actual_row] == pytest.approx(
+                [value for value, _, _ in expected_row], rel=1e-9), (name, row_index)
+            assert [cell[1:] for cell in actual_row] == [cell[1:] for cell in expected_row], (name, row_index)
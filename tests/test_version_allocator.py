@@ -0,0 +1,32 @@
+"""version_allocator.py 동시 할당 테스트: 여러 스레드/프로세스가 같은 기본 파일명의 버전을 받아도 겹치거나 빠지지 않음"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from auto_convert_excel import get_next_version
+from version_allocator import VersionAllocator
+
+BASE = "LYLYL_250414_250420"
+
+
+def allocate_many(directory, count):
+    # 작업 프로세스에서 실행 (CLI, 감시 폴더처럼 프로세스마다 카운터를 새로 엶)
+    return [int(get_next_version(BASE, "xlsx", directory)[1:]) for _ in range(count)]
+
+
+def test_concurrent_threads_get_unique_consecutive_versions(tmp_path):
+    allocator = VersionAllocator(str(tmp_path))
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        versions = list(executor.map(lambda _: allocator.allocate(BASE), range(80)))
+
+    assert sorted(versions) == list(range(1, 81))
+
+
+def test_concurrent_processes_get_unique_consecutive_versions(tmp_path):
+    # 카운터가 없을 때 기존 파일 번호를 이어받는 첫 할당도 동시에 일어나도록
+    (tmp_path / f"{BASE}_v03.xlsx").write_bytes(b"")
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        batches = list(executor.map(allocate_many, [str(tmp_path)] * 4, [15] * 4))
+
+    versions = [version for batch in batches for version in batch]
+    assert sorted(versions) == list(range(4, 64))
+    # 각 프로세스 안에서는 받은 순서대로 커짐
+    assert all(batch == sorted(batch) for batch in batches)
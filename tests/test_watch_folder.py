@@ -0,0 +1,65 @@
+"""watch_folder.py 작업 프로세스 풀 테스트: 풀이 깨져도 새 풀에서 다시 변환, 작업 프로세스의 신호 처리"""
+import os
+import signal
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import watch_folder
+from generate_export import generate_export, write_export
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    write_export(generate_export(50, seed=2), str(tmp_path / "export.xlsx"))
+    watcher = watch_folder.FolderWatcher(str(tmp_path), workers=1, debounce=0)
+    watcher._executor = watcher._new_executor()
+    yield watcher
+    watcher._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def wait_collected(watcher, timeout=60):
+    deadline = time.monotonic() + timeout
+    while watcher._running and time.monotonic() < deadline:
+        time.sleep(0.05)
+        watcher._collect()
+
+
+def sigterm_handler():
+    return signal.getsignal(signal.SIGTERM)
+
+
+def test_submit_restarts_broken_pool(watcher):
+    assert watcher._executor.submit(os._exit, 1).exception(30) is not None
+    watcher.scan()
+    watcher._submit_ready(time.monotonic())
+    wait_collected(watcher)
+
+    entry = watcher.manifest.entries["export.xlsx"]
+    assert entry["error"] is None
+    assert os.path.exists(entry["output"])
+
+
+def test_broken_job_is_requeued_then_recorded(watcher):
+    state = watch_folder._file_state(os.stat(os.path.join(watcher.directory, "export.xlsx")))
+    for attempt in range(watch_folder.BROKEN_POOL_RETRIES + 1):
+        broken = Future()
+        broken.set_exception(BrokenProcessPool("작업 프로세스 종료"))
+        watcher._running[broken] = ("export.xlsx", state)
+        watcher._collect()
+        if attempt < watch_folder.BROKEN_POOL_RETRIES:
+            # 다시 변환하도록 대기 목록에 들어가고 아직 기록하지 않음
+            assert watcher._pending.pop("export.xlsx")[1] == state
+            assert "export.xlsx" not in watcher.manifest.entries
+    assert "작업 프로세스가 비정상 종료" in watcher.manifest.entries["export.xlsx"]["error"]
+    assert "export.xlsx" not in watcher._pending
+
+
+def test_workers_do_not_inherit_interrupt_handler(watcher):
+    previous = signal.signal(signal.SIGTERM, watch_folder._interrupt)
+    try:
+        assert watcher._executor.submit(sigterm_handler).result(30) == signal.SIG_DFL
+    finally:
+        signal.signal(signal.SIGTERM, previous)
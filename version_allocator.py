@@ -0,0 +1,95 @@
+"""
+출력 파일 버전 번호 할당
+
+같은 기본 파일명(LYLYL_시작일_종료일)의 다음 버전(v01, v02 ...)을 SQLite 카운터로 원자적으로 할당한다.
+  - 할당은 행 하나를 갱신하는 트랜잭션이라 디렉토리에 파일이 몇 개 있든 걸리는 시간이 같다.
+  - BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡으므로 여러 스레드/프로세스(Flask 작업자, CLI)가
+    동시에 할당해도 같은 번호를 두 번 주지 않는다.
+  - 기본 파일명을 처음 할당할 때만 디렉토리의 기존 파일(기본파일명_vNN.확장자)을 보고 이어서 번호를 매긴다.
+"""
+import glob
+import os
+import re
+import sqlite3
+import threading
+
+DEFAULT_DB_NAME = ".lylyl_versions.sqlite"
+DEFAULT_TIMEOUT = 30  # 다른 프로세스가 잠금을 잡고 있을 때 기다리는 시간 (초)
+
+
+def format_version(number):
+    """버전 번호를 파일명에 쓰는 형식(v01)으로 바꾸는 함수"""
+    return f"v{number:02d}"
+
+
+class VersionAllocator:
+    """
+    기본 파일명과 확장자별 버전 카운터
+
+    Args:
+        directory: 출력 파일 디렉토리 (처음 할당할 때 기존 파일 번호를 이어받음)
+        path: 카운터 SQLite 파일 경로 (기본값: directory/.lylyl_versions.sqlite)
+        timeout: 잠금 대기 시간 (초)
+    """
+
+    def __init__(self, directory=".", path=None, timeout=DEFAULT_TIMEOUT):
+        self.directory = directory
+        self.path = path or os.path.join(directory, DEFAULT_DB_NAME)
+        self.timeout = timeout
+        self._local = threading.local()
+        os.makedirs(directory, exist_ok=True)
+        self._connection().execute("""
+            CREATE TABLE IF NOT EXISTS versions (
+                base TEXT NOT NULL,
+                extension TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                PRIMARY KEY (base, extension)
+            )""")
+
+    def _connection(self):
+        # sqlite3 연결은 스레드마다, 그리고 fork된 프로세스에서는 새로 만듦
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _existing_max(self, base, extension):
+        # 카운터가 생기기 전에 만들어진 파일의 최대 버전 (없으면 0)
+        pattern = re.compile(rf"{re.escape(base)}_v(\d+)\.{re.escape(extension)}")
+        prefix = os.path.join(glob.escape(self.directory), glob.escape(base))
+        versions = []
+        for path in glob.glob(f"{prefix}_v*.{extension}"):
+            match = pattern.fullmatch(os.path.basename(path))
+            if match:
+                versions.append(int(match.group(1)))
+        return max(versions, default=0)
+
+    def allocate(self, base, extension="xlsx"):
+        """
+        다음 버전 번호를 할당하는 함수 (할당한 번호는 다시 주지 않음)
+
+        Returns:
+            버전 번호 (1부터)
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "UPDATE versions SET version = version + 1 WHERE base = ? AND extension = ? RETURNING version",
+                (base, extension)).fetchall()
+            if row:
+                version = row[0][0]
+            else:
+                version = self._existing_max(base, extension) + 1
+                conn.execute("INSERT INTO versions (base, extension, version) VALUES (?, ?, ?)",
+                             (base, extension, version))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return version
+
+    def next_version(self, base, extension="xlsx"):
+        """다음 버전을 할당해 "v01" 형식으로 돌려주는 함수"""
+        return format_version(self.allocate(base, extension))
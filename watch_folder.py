@@ -0,0 +1,456 @@
+"""
+폴더 감시 자동 변환
+
+공유 폴더에 Meta 광고 내보내기(.xlsx/.xls/.csv)가 들어오면 자동으로 변환해 출력 폴더에 저장한다.
+  - 변경 감지: watchdog(리눅스는 inotify)이 설치되어 있으면 파일 이벤트로, 없으면 주기적으로 폴더를 훑는다.
+    네트워크 공유 폴더는 이벤트가 오지 않을 수 있으므로 이벤트 모드에서도 가끔 폴더를 다시 훑는다.
+  - 쓰는 중인 파일: 마지막 변경 후 debounce초 동안 크기/수정 시각이 그대로인 파일만 변환한다.
+  - 변환은 작업 프로세스 풀에서 나눠 실행하고, 결과는 임시 파일에 쓴 뒤 버전 파일명으로 바꿔 놓는다.
+  - 매니페스트(출력 폴더의 .lylyl_watch_manifest.json)에 파일별 크기/수정 시각/내용 해시/변환 규칙을 기록해
+    바뀌지 않은 파일은 다시 읽지도 변환하지도 않는다 (수정 시각만 바뀐 파일은 해시만 비교).
+    실패한 파일도 기록해 두어, 내용이 바뀌기 전에는 다시 시도하지 않는다.
+
+사용법:
+    python watch_folder.py 공유폴더
+    python watch_folder.py 공유폴더 --output-dir 변환결과 --workers 4 --debounce 5
+    python watch_folder.py 공유폴더 --once      (지금 있는 파일만 변환하고 종료 - cron용)
+    python auto_convert_excel.py --watch 공유폴더
+
+watchdog 설치: pip install watchdog (없으면 --poll-interval초마다 폴더를 훑음)
+"""
+import argparse
+import json
+import os
+import re
+import signal
+import tempfile
+import threading
+import time
+from concurrent.futures import BrokenExecutor
+from typing import NamedTuple, Optional
+
+from conversion_metrics import enable_stage_log
+
+# 감시하는 원본 파일 확장자
+WATCH_EXTENSIONS = (".xlsx", ".xls", ".csv")
+
+# 변환 결과 폴더 (감시 폴더 아래)
+DEFAULT_OUTPUT_DIR = "converted"
+MANIFEST_NAME = ".lylyl_watch_manifest.json"
+
+DEFAULT_WORKERS = 2
+DEFAULT_DEBOUNCE = 2.0        # 마지막 변경 후 이 시간(초) 동안 그대로여야 변환
+DEFAULT_POLL_INTERVAL = 2.0   # 폴링 모드에서 폴더를 훑는 간격 (초)
+DEFAULT_RESCAN_INTERVAL = 60  # 이벤트 모드에서 빠진 이벤트를 찾으려고 폴더를 다시 훑는 간격 (초)
+# 작업 프로세스가 비정상 종료(메모리 부족 등)되어 변환하지 못한 파일을 다시 시도하는 횟수
+BROKEN_POOL_RETRIES = 2
+_TICK = 0.2
+
+# 엑셀 잠금 파일(~$이름.xlsx), 숨김 파일, 변환 결과 파일명(LYLYL_시작일_종료일_v01.xlsx)은 감시하지 않음
+_OUTPUT_NAME = re.compile(r"LYLYL(_\d{6}_\d{6})?_v\d+\.\w+")
+
+
+def is_watched_file(name):
+    """감시 대상 원본 파일인지 (파일 이름 기준)"""
+    return (name.lower().endswith(WATCH_EXTENSIONS) and not name.startswith(("~$", "."))
+            and not _OUTPUT_NAME.fullmatch(name))
+
+
+def _interrupt(signum, frame):
+    # 서비스 관리자(systemd 등)의 종료 신호도 Ctrl+C처럼 정리하고 종료
+    raise KeyboardInterrupt
+
+
+def _init_worker(profile):
+    # 작업 프로세스 시작: 감시 프로세스의 신호 처리(_interrupt)를 fork로 물려받지 않도록 되돌림
+    # Ctrl+C는 감시 프로세스가 받아 하던 변환을 기다려 종료하고, SIGTERM은 기본 동작(트레이스백 없이 종료)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    from conversion_profile import load_profile
+    load_profile(profile)
+
+
+def _default_file_mode():
+    # mkstemp는 0600으로 만들므로, 공유 폴더의 다른 사용자도 읽도록 일반 파일 기본 권한(0666 & ~umask)으로 바꿈
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def _file_state(stat):
+    # 파일이 바뀌었는지 비교하는 값 (크기, 수정 시각)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class WatchResult(NamedTuple):
+    """파일 하나를 처리한 결과 (작업 프로세스 → 감시 프로세스)"""
+    name: str
+    state: tuple
+    digest: Optional[str]
+    output: Optional[str] = None
+    error: Optional[str] = None
+    skipped: bool = False
+
+
+def convert_watched_file(path, output_dir, state, known_digest=None, output_format="xlsx", profile=None):
+    """
+    감시 폴더의 파일 하나를 변환하는 함수 (작업 프로세스에서 실행)
+
+    파일을 한 번만 읽어 내용 해시를 구하고, 매니페스트의 해시(known_digest)와 같으면 변환하지 않는다.
+    변환 결과는 출력 폴더의 임시 파일에 쓴 뒤 다음 버전 파일명으로 바꿔 놓는다
+    (출력 폴더를 보는 사람이 쓰는 중인 파일을 열지 않도록).
+
+    Returns:
+        WatchResult (오류는 예외 대신 error에 담아 돌려줌)
+    """
+    from auto_convert_excel import OUTPUT_FORMATS, convert_export, get_next_version
+    from conversion_cache import upload_digest
+
+    name = os.path.basename(path)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        return WatchResult(name, state, None, error=str(e))
+    digest = upload_digest(data)
+    if digest == known_digest:
+        return WatchResult(name, state, digest, skipped=True)
+    if output_format not in OUTPUT_FORMATS:
+        return WatchResult(name, state, digest, error=f"지원하지 않는 출력 형식입니다: {output_format}")
+
+    fd, tmp_path = tempfile.mkstemp(prefix=".lylyl_", suffix=f".{output_format}", dir=output_dir)
+    os.close(fd)
+    try:
+        result = convert_export(data, tmp_path, output_format=output_format, profile=profile, filename=name)
+        base_filename = result.base_filename
+        output_path = os.path.join(
+            output_dir, f"{base_filename}_{get_next_version(base_filename, output_format, output_dir)}.{output_format}")
+        os.chmod(tmp_path, _default_file_mode())
+        os.replace(tmp_path, output_path)
+    except Exception as e:
+        os.remove(tmp_path)
+        return WatchResult(name, state, digest, error=str(e))
+    return WatchResult(name, state, digest, output=output_path)
+
+
+class WatchManifest:
+    """
+    감시 폴더 파일별 처리 기록 (JSON)
+
+    {파일 이름: {"size", "mtime_ns", "sha256", "config", "output", "error"}}
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                # 깨진 매니페스트는 버리고 새로 만듦 (모든 파일을 해시로 다시 비교)
+                self.entries = {}
+
+    def is_current(self, name, state, config):
+        """크기/수정 시각과 변환 규칙이 기록과 같으면 True (읽지 않고 건너뜀)"""
+        entry = self.entries.get(name)
+        return (entry is not None and entry.get("config") == config
+                and (entry.get("size"), entry.get("mtime_ns")) == tuple(state))
+
+    def known_digest(self, name, config):
+        """같은 변환 규칙으로 처리했던 내용 해시 (없으면 None)"""
+        entry = self.entries.get(name)
+        if entry is None or entry.get("config") != config:
+            return None
+        return entry.get("sha256")
+
+    def record(self, result, config):
+        """처리 결과를 기록 (내용이 같아 건너뛴 파일은 크기/수정 시각만 갱신)"""
+        entry = dict(self.entries.get(result.name, {})) if result.skipped else {}
+        entry.update(size=result.state[0], mtime_ns=result.state[1], sha256=result.digest, config=config)
+        if not result.skipped:
+            entry.update(output=result.output, error=result.error, processed_at=time.time())
+        self.entries[result.name] = entry
+
+    def save(self):
+        # 임시 파일에 쓴 뒤 바꿔치기 (중간에 종료되어도 매니페스트가 깨지지 않음)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".lylyl_", suffix=".json", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+class FolderWatcher:
+    """
+    폴더에 새로 들어오거나 바뀐 내보내기 파일을 작업 프로세스 풀에서 변환하는 감시기
+
+    Args:
+        directory: 감시할 폴더 (하위 폴더는 보지 않음)
+        output_dir: 변환 결과 폴더 (기본값: directory/converted)
+        workers: 동시에 변환할 프로세스 수
+        debounce: 마지막 변경 후 이 시간(초) 동안 크기/수정 시각이 그대로인 파일만 변환
+        poll_interval: 폴링 모드에서 폴더를 훑는 간격 (초)
+        use_polling: True이면 watchdog이 있어도 폴링
+        output_format: 출력 형식 (xlsx, csv, parquet)
+        profile: 변환 프로필 이름 또는 경로 (None이면 기본 프로필)
+        manifest_path: 매니페스트 경로 (기본값: output_dir/.lylyl_watch_manifest.json)
+    """
+
+    def __init__(self, directory, output_dir=None, workers=DEFAULT_WORKERS, debounce=DEFAULT_DEBOUNCE,
+                 poll_interval=DEFAULT_POLL_INTERVAL, use_polling=False, output_format="xlsx", profile=None,
+                 manifest_path=None, rescan_interval=DEFAULT_RESCAN_INTERVAL):
+        from auto_convert_excel import config_fingerprint
+
+        self.directory = os.path.abspath(directory)
+        self.output_dir = os.path.abspath(output_dir or os.path.join(self.directory, DEFAULT_OUTPUT_DIR))
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.workers = workers
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self.use_polling = use_polling
+        self.output_format = output_format
+        self.profile = profile
+        # 변환 규칙(프로필, 변환기 버전)과 출력 형식이 바뀌면 같은 파일도 다시 변환
+        self.config = f"{config_fingerprint(profile)}:{output_format}"
+        self.manifest = WatchManifest(manifest_path or os.path.join(self.output_dir, MANIFEST_NAME))
+
+        self._pending = {}   # 파일 이름 → (마지막 변경 시각, 그때의 크기/수정 시각)
+        self._running = {}   # Future → (파일 이름, 크기/수정 시각)
+        self._retries = {}   # 파일 이름 → 작업 프로세스 비정상 종료로 다시 시도한 횟수
+        self._lock = threading.Lock()
+        self._executor = None
+
+    # --- 변경 감지 ---
+
+    def notify(self, name):
+        """파일이 바뀌었다고 알리는 함수 (이벤트 스레드에서 호출, debounce 시간이 다시 시작됨)"""
+        if not is_watched_file(name):
+            return
+        try:
+            state = _file_state(os.stat(os.path.join(self.directory, name)))
+        except OSError:
+            return
+        with self._lock:
+            self._pending[name] = (time.monotonic(), state)
+
+    def scan(self):
+        """폴더를 훑어 매니페스트와 다른 파일을 대기 목록에 넣는 함수 (시작 시, 폴링/재확인 때)"""
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or not is_watched_file(entry.name):
+                    continue
+                try:
+                    state = _file_state(entry.stat())
+                except OSError:
+                    continue
+                with self._lock:
+                    pending = self._pending.get(entry.name)
+                if pending is not None and pending[1] == state:
+                    continue
+                if pending is None and self.manifest.is_current(entry.name, state, self.config):
+                    continue
+                with self._lock:
+                    self._pending[entry.name] = (time.monotonic(), state)
+
+    def _start_observer(self):
+        # watchdog(inotify 등) 이벤트 감시, 설치되어 있지 않거나 시작할 수 없으면 None (폴링)
+        if self.use_polling:
+            return None
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            print("watchdog이 설치되어 있지 않아 폴링으로 감시합니다 (pip install watchdog).")
+            return None
+
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                for path in (getattr(event, "dest_path", None), event.src_path):
+                    if path and os.path.dirname(os.path.abspath(path)) == watcher.directory:
+                        watcher.notify(os.path.basename(path))
+
+        observer = Observer()
+        try:
+            observer.schedule(_Handler(), self.directory, recursive=False)
+            observer.start()
+        except OSError as e:
+            # inotify 감시 수 한도 초과 등
+            print(f"파일 이벤트 감시를 시작할 수 없어 폴링으로 감시합니다: {e}")
+            return None
+        return observer
+
+    # --- 변환 ---
+
+    def _submit_ready(self, now):
+        # debounce 시간 동안 그대로인 파일을 작업 프로세스에 넘김
+        with self._lock:
+            running = {name for name, _ in self._running.values()}
+            candidates = [(name, state) for name, (changed_at, state) in self._pending.items()
+                          if now - changed_at >= self.debounce and name not in running]
+        for name, state in candidates:
+            path = os.path.join(self.directory, name)
+            try:
+                current = _file_state(os.stat(path))
+            except OSError:
+                # 사라진 파일 (이름 바꾸기 중간 파일 등)
+                with self._lock:
+                    self._pending.pop(name, None)
+                continue
+            with self._lock:
+                if current != state:
+                    # 아직 쓰는 중: 다시 기다림
+                    self._pending[name] = (now, current)
+                    continue
+                del self._pending[name]
+            if self.manifest.is_current(name, current, self.config):
+                continue
+            try:
+                future = self._executor.submit(convert_watched_file, path, self.output_dir, current,
+                                               self.manifest.known_digest(name, self.config),
+                                               self.output_format, self.profile)
+            except BrokenExecutor:
+                # 작업 프로세스 하나가 죽으면 풀 전체가 더 이상 작업을 받지 않으므로 새 풀로 바꾸고 바로 다시 넘김
+                self._restart_executor()
+                future = self._executor.submit(convert_watched_file, path, self.output_dir, current,
+                                               self.manifest.known_digest(name, self.config),
+                                               self.output_format, self.profile)
+            with self._lock:
+                self._running[future] = (name, current)
+
+    def _new_executor(self):
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self.profile,))
+
+    def _restart_executor(self):
+        # 이미 깨진 풀의 작업은 실패로 끝나 있으므로 기다리지 않음 (_collect가 대기 목록에 다시 넣음)
+        broken, self._executor = self._executor, self._new_executor()
+        broken.shutdown(wait=False)
+
+    def _collect(self):
+        # 끝난 작업의 결과를 매니페스트에 기록
+        with self._lock:
+            done = [future for future in self._running if future.done()]
+        if not done:
+            return
+        for future in done:
+            with self._lock:
+                name, state = self._running.pop(future)
+            try:
+                result = future.result()
+            except BrokenExecutor as e:
+                # 작업 프로세스가 비정상 종료됨: 풀의 다른 작업도 함께 실패하므로 대기 목록에 다시 넣어 새 풀에서 변환
+                # (같은 파일 때문에 계속 죽으면 BROKEN_POOL_RETRIES번까지만 다시 시도하고 실패로 기록)
+                retries = self._retries.get(name, 0)
+                if retries < BROKEN_POOL_RETRIES:
+                    self._retries[name] = retries + 1
+                    with self._lock:
+                        self._pending.setdefault(name, (time.monotonic() - self.debounce, state))
+                    continue
+                self._retries.pop(name, None)
+                result = WatchResult(name, state, None, error=f"작업 프로세스가 비정상 종료되었습니다: {e}")
+            except Exception as e:
+                # 기록하지 않고 다음 변경 때 다시 시도
+                print(f"❌ 실패: {name} - {e}")
+                continue
+            else:
+                self._retries.pop(name, None)
+            self.manifest.record(result, self.config)
+            if result.skipped:
+                continue
+            if result.error:
+                print(f"❌ 실패: {name} - {result.error}")
+            else:
+                print(f"✅ 변환: {name} → {os.path.relpath(result.output, self.directory)}")
+        self.manifest.save()
+
+    def run(self, once=False):
+        """
+        감시를 시작하는 함수 (Ctrl+C로 종료)
+
+        Args:
+            once: True이면 지금 있는 파일만 변환하고 종료 (cron 등에서 실행)
+        """
+        from auto_convert_excel import preload
+
+        # 작업 프로세스를 fork하기 전에 변환기를 한 번 불러와 둠 (작업 프로세스마다 import하지 않음)
+        preload()
+        self._executor = self._new_executor()
+        # 작업 프로세스는 처음 작업을 넘길 때 fork되므로 _init_worker가 신호 처리를 되돌림
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, _interrupt)
+        observer = None if once else self._start_observer()
+        mode = "한 번 변환" if once else ("파일 이벤트" if observer else f"폴링 {self.poll_interval:g}초")
+        print(f"감시 폴더: {self.directory} → {self.output_dir} ({mode}, 작업 프로세스 {self.workers}개)")
+
+        self.scan()
+        next_scan = time.monotonic() + (self.rescan_interval if observer else self.poll_interval)
+        try:
+            while True:
+                now = time.monotonic()
+                if not once and now >= next_scan:
+                    self.scan()
+                    next_scan = now + (self.rescan_interval if observer else self.poll_interval)
+                self._submit_ready(now)
+                self._collect()
+                if once:
+                    with self._lock:
+                        if not self._pending and not self._running:
+                            break
+                time.sleep(_TICK)
+        except KeyboardInterrupt:
+            print("\n감시를 종료합니다.")
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._collect()
+
+
+def build_parser(parser=None):
+    """감시 모드 명령행 옵션 (auto_convert_excel.py --watch와 같이 씀)"""
+    parser = parser or argparse.ArgumentParser(description="LYLYL 광고 데이터 폴더 감시 자동 변환")
+    parser.add_argument("--output-dir", default=None,
+                        help=f"변환 결과 폴더 (기본값: 감시폴더/{DEFAULT_OUTPUT_DIR})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"동시에 변환할 프로세스 수 (기본값: {DEFAULT_WORKERS})")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                        help=f"마지막 변경 후 이 시간(초) 동안 그대로인 파일만 변환 (기본값: {DEFAULT_DEBOUNCE:g})")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f"폴링 모드에서 폴더를 훑는 간격 (초, 기본값: {DEFAULT_POLL_INTERVAL:g})")
+    parser.add_argument("--polling", action="store_true", help="watchdog이 있어도 폴링으로 감시 (네트워크 드라이브 등)")
+    parser.add_argument("--once", action="store_true", help="지금 있는 파일만 변환하고 종료")
+    return parser
+
+
+def watch(directory, args, output_format="xlsx", profile=None):
+    """build_parser() 옵션으로 감시를 시작하는 함수"""
+    FolderWatcher(directory, output_dir=args.output_dir, workers=args.workers, debounce=args.debounce,
+                  poll_interval=args.poll_interval, use_polling=args.polling, output_format=output_format,
+                  profile=profile).run(once=args.once)
+
+
+if __name__ == "__main__":
+    from auto_convert_excel import OUTPUT_FORMATS
+
+    parser = build_parser()
+    parser.add_argument("directory", help="감시할 폴더")
+    parser.add_argument("--format", dest="output_format", choices=OUTPUT_FORMATS, default="xlsx",
+                        help="출력 형식 (기본값: xlsx)")
+    parser.add_argument("--profile", default=None, help="변환 프로필 이름 또는 파일 경로")
+    parser.add_argument("--stage-log", action="store_true",
+                        help="단계별 소요 시간/행 수/메모리를 JSON 한 줄씩 stderr에 출력")
+    args = parser.parse_args()
+    if args.stage_log:
+        enable_stage_log()
+    watch(args.directory, args, args.output_format, args.profile)
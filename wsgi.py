@@ -0,0 +1,11 @@
+"""
+운영 서버 진입점
+
+    gunicorn -c gunicorn.conf.py
+
+gunicorn.conf.py가 preload_app으로 이 모듈을 마스터 프로세스에서 한 번 불러오므로,
+pandas/openpyxl import와 프로필 컴파일 비용은 워커마다 다시 들지 않는다.
+"""
+from app import app, warm_up
+
+warm_up()